@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import base64
+import io
+import os
+import statistics
+import time
+
+import httpx
+import numpy as np
+import soundfile as sf
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BASE_URL = os.getenv("NEXT_PUBLIC_BACKEND_API_URL", "http://localhost:8000")
+API_KEY = os.getenv("NEXT_PUBLIC_API_KEY", "")
+
+
+def build_translation_request(service_id: str):
+    return {
+        "config": {
+            "serviceId": service_id,
+            "language": {"sourceLanguage": "en", "targetLanguage": "hi"},
+        },
+        "input": [{"source": "The weather is pleasant today."}],
+        "controlConfig": {"dataTracking": False},
+    }
+
+
+def build_asr_request(service_id: str, language: str, duration_secs: int):
+    # 48 kHz stereo, so that the server has to downmix and resample it
+    sample_rate = 48000
+    t = np.arange(duration_secs * sample_rate) / sample_rate
+    audio = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * t))
+    audio += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+
+    byte_io = io.BytesIO()
+    sf.write(byte_io, np.stack([audio, audio], axis=1), sample_rate, format="WAV")
+
+    return {
+        "config": {
+            "serviceId": service_id,
+            "language": {"sourceLanguage": language},
+            "audioFormat": "wav",
+            "samplingRate": sample_rate,
+        },
+        "audio": [{"audioContent": base64.b64encode(byte_io.getvalue()).decode()}],
+        "controlConfig": {"dataTracking": False},
+    }
+
+
+def percentile(latencies: list, fraction: float) -> float:
+    return latencies[max(int(len(latencies) * fraction) - 1, 0)]
+
+
+async def measure_text_latency(
+    client: httpx.AsyncClient, request_json: dict, total_requests: int, rate: float
+) -> list:
+    """Sends translation requests at a fixed rate and returns their latencies"""
+    latencies = []
+
+    async def send_one():
+        start = time.perf_counter()
+        await client.post(
+            "/services/inference/translation",
+            json=request_json,
+            headers={"Authorization": API_KEY},
+        )
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    for _ in range(total_requests):
+        tasks.append(asyncio.create_task(send_one()))
+        await asyncio.sleep(1 / rate)
+    await asyncio.gather(*tasks)
+
+    return sorted(latencies)
+
+
+async def run_benchmark(
+    text_request: dict,
+    asr_request: dict,
+    total_requests: int,
+    rate: float,
+    asr_concurrency: int,
+) -> None:
+    """
+    Measures translation latency of a single server worker while idle, and
+    again while the same worker keeps `asr_concurrency` ASR uploads in flight.
+
+    Run it against a worker started with AUDIO_PROCESS_POOL_WORKERS=0 and again
+    with the pool enabled to compare how much audio processing delays the event
+    loop.
+    """
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=300) as client:
+        idle_latencies = await measure_text_latency(
+            client, text_request, total_requests, rate
+        )
+
+        stop = asyncio.Event()
+        asr_requests = 0
+
+        async def upload_audio():
+            nonlocal asr_requests
+            while not stop.is_set():
+                await client.post(
+                    "/services/inference/asr",
+                    json=asr_request,
+                    headers={"Authorization": API_KEY},
+                )
+                asr_requests += 1
+
+        uploaders = [
+            asyncio.create_task(upload_audio()) for _ in range(asr_concurrency)
+        ]
+        loaded_latencies = await measure_text_latency(
+            client, text_request, total_requests, rate
+        )
+        stop.set()
+        await asyncio.gather(*uploaders)
+
+    print(f"Text requests: {total_requests} at {rate:.1f} req/s")
+    print(f"ASR uploads:   {asr_requests} ({asr_concurrency} concurrent)")
+    for name, latencies in [("idle", idle_latencies), ("loaded", loaded_latencies)]:
+        print(
+            f"{name:>6}: p50 {statistics.median(latencies) * 1000:8.1f} ms, "
+            f"p95 {percentile(latencies, 0.95) * 1000:8.1f} ms, "
+            f"p99 {percentile(latencies, 0.99) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure text endpoint latency of one server worker under ASR load"
+    )
+    parser.add_argument(
+        "--translation-service-id", default="ai4bharat/indictrans-v2-all-gpu--t4"
+    )
+    parser.add_argument("--asr-service-id", default="ai4bharat/conformer-hi-gpu--t4")
+    parser.add_argument("--asr-language", default="hi")
+    parser.add_argument("--audio-duration", type=int, default=60)
+    parser.add_argument("--asr-concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(
+        run_benchmark(
+            build_translation_request(args.translation_service_id),
+            build_asr_request(
+                args.asr_service_id, args.asr_language, args.audio_duration
+            ),
+            args.requests,
+            args.rate,
+            args.asr_concurrency,
+        )
+    )
@@ -0,0 +1,296 @@
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server")
+
+
+def generate_audio(duration_secs: int, sample_rate: int) -> np.ndarray:
+    """
+    Generates speech-like test audio: a few harmonics with a slowly varying
+    envelope and some noise.
+    """
+    t = np.arange(duration_secs * sample_rate, dtype=np.float64) / sample_rate
+    envelope = 0.5 + 0.4 * np.sin(2 * np.pi * 0.3 * t)
+    audio = envelope * (
+        0.4 * np.sin(2 * np.pi * 220 * t)
+        + 0.2 * np.sin(2 * np.pi * 440 * t)
+        + 0.1 * np.sin(2 * np.pi * 1760 * t)
+    )
+    audio += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+    return audio * 0.5
+
+
+def decode_with_tolist(file_bytes: bytes) -> np.ndarray:
+    # Previous InferenceService decode path
+    data, _ = sf.read(io.BytesIO(file_bytes))
+    data = data.tolist()
+    return np.array(data)
+
+
+def decode_to_float32(file_bytes: bytes) -> np.ndarray:
+    # AudioService.decode_audio
+    data, _ = sf.read(io.BytesIO(file_bytes), dtype="float32")
+    return data
+
+
+DECODERS = {"tolist": decode_with_tolist, "float32": decode_to_float32}
+
+
+def read_memory_kib(field: str) -> int:
+    try:
+        with open("/proc/self/status") as fhand:
+            for line in fhand:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    # Not on Linux, fall back to the peak RSS of the whole process
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as fhand:
+            fhand.write("5")
+    except OSError:
+        pass
+
+
+def measure_decode(decoder_name: str, file_path: str, results) -> None:
+    with open(file_path, "rb") as fhand:
+        file_bytes = fhand.read()
+
+    reset_peak_rss()
+    baseline_rss = read_memory_kib("VmRSS")
+    start = time.perf_counter()
+    audio = DECODERS[decoder_name](file_bytes)
+    elapsed = time.perf_counter() - start
+    peak_rss = read_memory_kib("VmHWM")
+
+    results.put((elapsed, (peak_rss - baseline_rss) / 1024, audio.dtype.name))
+
+
+def run_decode_benchmark(duration_secs: int, sample_rate: int) -> None:
+    """
+    Decodes the same WAV file with each decode path, every one in a fresh process
+    so that its peak RSS can be measured in isolation.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".wav") as wav_file:
+        sf.write(
+            wav_file.name,
+            generate_audio(duration_secs, sample_rate),
+            sample_rate,
+            subtype="PCM_16",
+        )
+
+        context = multiprocessing.get_context("spawn")
+        print(f"Audio: {duration_secs} s at {sample_rate} Hz")
+        for decoder_name in DECODERS:
+            results = context.Queue()
+            process = context.Process(
+                target=measure_decode, args=(decoder_name, wav_file.name, results)
+            )
+            process.start()
+            elapsed, peak_rss_mib, dtype = results.get()
+            process.join()
+
+            print(
+                f"{decoder_name:>8}: {elapsed * 1000:9.1f} ms, "
+                f"peak RSS +{peak_rss_mib:7.1f} MiB, {dtype}"
+            )
+
+
+def get_audio_service():
+    # Needs the server's requirements to be installed
+    sys.path.insert(0, SERVER_DIR)
+    from module.services.service.audio_service import AudioService
+
+    return AudioService(inference_gateway=None, triton_utils_service=None)  # type: ignore
+
+
+def normalize_with_pydub(audio: np.ndarray, frame_rate: int) -> np.ndarray:
+    # Previous AudioService.equalize_amplitude and dequantize_audio, which were
+    # given float64 audio
+    from pydub import AudioSegment
+    from pydub.effects import normalize as pydub_normalize
+
+    audio *= 2**15 - 1
+    audio_segment = AudioSegment(
+        data=audio.astype("int16").tobytes(),
+        sample_width=2,
+        frame_rate=frame_rate,
+        channels=1,
+    )
+    equalized_audio = pydub_normalize(audio_segment)
+    return np.asarray(
+        equalized_audio.get_array_of_samples(), dtype=np.float32
+    ) / np.float32(2**15 - 1)
+
+
+def run_normalize_benchmark(duration_secs: int, sample_rate: int) -> None:
+    """
+    Compares the NumPy peak normalization of AudioService against the previous
+    pydub based one, and fails if their outputs differ.
+    """
+    audio_service = get_audio_service()
+    # Samples of a quiet 16-bit file, which the previous path decoded in float64
+    # and AudioService decodes in float32
+    audio = np.round(generate_audio(duration_secs, sample_rate) * 0.3 * 2**15) / 2**15
+
+    timings = {}
+    start = time.perf_counter()
+    expected_audio = normalize_with_pydub(audio.copy(), sample_rate)
+    timings["pydub"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalized_audio = audio_service.normalize_peak_amplitude(audio.astype(np.float32))
+    timings["numpy"] = time.perf_counter() - start
+
+    max_difference = np.abs(normalized_audio - expected_audio).max()
+
+    print(f"Audio: {duration_secs} s at {sample_rate} Hz")
+    for name, elapsed in timings.items():
+        print(f"{name:>8}: {elapsed * 1000:9.1f} ms")
+    print(f"Max difference: {max_difference * (2**15 - 1):.2f} int16 steps")
+
+    assert max_difference == 0, "Outputs differ"
+
+
+def run_resample_benchmark(duration_secs: int) -> None:
+    """
+    Times the previous FFT based resampling against the polyphase resampling of
+    AudioService for the common rate pairs, and the streaming resampler on
+    100 ms chunks.
+    """
+    import scipy.signal as sps
+
+    audio_service = get_audio_service()
+    from module.services.service.audio_service import (
+        COMMON_RESAMPLING_RATES,
+        StreamingResampler,
+    )
+
+    print(f"Audio: {duration_secs} s")
+    for sampling_rate, target_rate in COMMON_RESAMPLING_RATES:
+        audio = generate_audio(duration_secs, sampling_rate).astype(np.float32)
+
+        start = time.perf_counter()
+        sps.resample(audio, round(len(audio) * float(target_rate) / sampling_rate))
+        fft_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        audio_service.resample_audio(audio, sampling_rate, target_rate)
+        poly_elapsed = time.perf_counter() - start
+
+        resampler = StreamingResampler(sampling_rate, target_rate)
+        chunk_size = sampling_rate // 10
+        start = time.perf_counter()
+        for i in range(0, len(audio), chunk_size):
+            resampler.process(audio[i : i + chunk_size])
+        resampler.flush()
+        streaming_elapsed = time.perf_counter() - start
+
+        print(
+            f"{sampling_rate:>6} -> {target_rate:<6}: "
+            f"fft {fft_elapsed * 1000:8.1f} ms, "
+            f"polyphase {poly_elapsed * 1000:8.1f} ms, "
+            f"streaming {streaming_elapsed * 1000:8.1f} ms"
+        )
+
+
+def encode_with_pydub(audio: np.ndarray, sample_rate: int, audio_format: str) -> bytes:
+    # Previous TTS encode path, which decodes the WAV again with ffmpeg
+    from pydub import AudioSegment
+    from scipy.io import wavfile
+
+    byte_io = io.BytesIO()
+    wavfile.write(byte_io, sample_rate, audio)
+    if audio_format != "wav":
+        audio_segment = AudioSegment.from_file_using_temporary_files(byte_io)
+        byte_io = io.BytesIO()
+        audio_segment.export(byte_io, format=audio_format)
+
+    return byte_io.getvalue()
+
+
+def run_encode_benchmark(duration_secs: int, sample_rate: int, runs: int) -> None:
+    """
+    Reports the mean encode latency per TTS output format of the previous pydub
+    path against the in-process AudioEncoder.
+    """
+    get_audio_service()
+    from module.services.service.audio_service import audio_encoder
+
+    audio = generate_audio(duration_secs, sample_rate).astype(np.float32)
+
+    print(f"Audio: {duration_secs} s at {sample_rate} Hz, mean of {runs} runs")
+    for audio_format in ["wav", "s16le", "flac", "mp3", "ogg", "flv"]:
+        timings = {}
+        for name, encode in [
+            ("pydub", encode_with_pydub),
+            (audio_encoder.get_encoder_name(audio_format), audio_encoder.encode),
+        ]:
+            try:
+                start = time.perf_counter()
+                for _ in range(runs):
+                    encode(audio, sample_rate, audio_format)
+                timings[name] = f"{(time.perf_counter() - start) / runs * 1000:8.1f} ms"
+            except Exception as e:
+                timings[name] = f"failed ({type(e).__name__})"
+
+        print(
+            f"{audio_format:>6}: "
+            + ", ".join(f"{name} {timing}" for name, timing in timings.items())
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks of the audio processing paths of AudioService"
+    )
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    decode_parser = subparsers.add_parser(
+        "decode", help="Decode time and peak RSS of long files"
+    )
+    decode_parser.add_argument("--duration", type=int, default=1800)
+    decode_parser.add_argument("--sample-rate", type=int, default=48000)
+
+    normalize_parser = subparsers.add_parser(
+        "normalize", help="Compare peak normalization against pydub"
+    )
+    normalize_parser.add_argument("--duration", type=int, default=3600)
+    normalize_parser.add_argument("--sample-rate", type=int, default=16000)
+
+    resample_parser = subparsers.add_parser(
+        "resample", help="Compare FFT and polyphase resampling"
+    )
+    resample_parser.add_argument("--duration", type=int, default=600)
+
+    encode_parser = subparsers.add_parser(
+        "encode", help="Compare TTS output encoding against pydub"
+    )
+    encode_parser.add_argument("--duration", type=int, default=10)
+    encode_parser.add_argument("--sample-rate", type=int, default=22050)
+    encode_parser.add_argument("--runs", type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "decode":
+        run_decode_benchmark(args.duration, args.sample_rate)
+    elif args.benchmark == "normalize":
+        run_normalize_benchmark(args.duration, args.sample_rate)
+    elif args.benchmark == "resample":
+        run_resample_benchmark(args.duration)
+    elif args.benchmark == "encode":
+        run_encode_benchmark(args.duration, args.sample_rate, args.runs)
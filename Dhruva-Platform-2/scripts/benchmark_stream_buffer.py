@@ -0,0 +1,126 @@
+import argparse
+import array
+import os
+import sys
+import time
+
+import numpy as np
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server")
+
+
+def generate_packets(duration_secs: int, sample_rate: int, packet_ms: int) -> list:
+    rng = np.random.default_rng(0)
+    samples_per_packet = sample_rate * packet_ms // 1000
+    return [
+        rng.integers(-(2**15), 2**15, samples_per_packet, dtype=np.int16)
+        for _ in range(duration_secs * 1000 // packet_ms)
+    ]
+
+
+class ConcatenateBuffer:
+    # Previous seq_streamer path, a float64 array concatenated on every packet
+    def __init__(self) -> None:
+        self.buffer = np.array([], dtype=np.float64)
+        self.start = 0
+
+    def append_payload(self, payload) -> None:
+        if type(payload) is list:
+            # Packed one sample at a time, as signed so that it does not fail on
+            # negative samples
+            payload = b"".join(
+                [i.to_bytes(2, sys.byteorder, signed=True) for i in payload]
+            )
+        raw_audio = np.array(array.array("h", payload), dtype=np.float64) / (2**15 - 1)
+        self.buffer = np.concatenate([self.buffer, raw_audio])
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.buffer)
+
+    def discard_until(self, offset: int) -> None:
+        self.buffer = self.buffer[offset - self.start :]
+        self.start = offset
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        return self.buffer[start - self.start : end - self.start]
+
+
+def run_session(buffer, packets: list, sample_rate: int, retain_secs: float):
+    """
+    Streams all packets into the buffer, reading the retained audio on every
+    2 s tick and dropping older audio, the way a streaming session does.
+    Returns the append latency of every packet.
+    """
+    tick_samples = 2 * sample_rate
+    retain_samples = int(retain_secs * sample_rate)
+    last_tick = 0
+    append_latencies = []
+
+    for payload in packets:
+        start = time.perf_counter()
+        buffer.append_payload(payload)
+        append_latencies.append(time.perf_counter() - start)
+
+        if buffer.end - last_tick >= tick_samples:
+            last_tick = buffer.end
+            buffer.read(max(buffer.end - retain_samples, 0), buffer.end)
+            buffer.discard_until(max(buffer.end - retain_samples, 0))
+
+    return sorted(append_latencies)
+
+
+def run_benchmark(
+    duration_secs: int, sample_rate: int, packet_ms: int, retain_secs: float
+) -> None:
+    """
+    Compares the previous concatenating float64 buffer of seq_streamer against
+    AudioRingBuffer, for bytes and for list payloads.
+    """
+    # Needs the server's requirements to be installed
+    sys.path.insert(0, SERVER_DIR)
+    from streaming.audio_buffer import AudioRingBuffer
+
+    packets = generate_packets(duration_secs, sample_rate, packet_ms)
+    print(
+        f"Session: {duration_secs} s at {sample_rate} Hz, {len(packets)} packets "
+        f"of {packet_ms} ms, {retain_secs} s retained"
+    )
+
+    for payload_type in ["bytes", "list"]:
+        if payload_type == "bytes":
+            payloads = [packet.tobytes() for packet in packets]
+        else:
+            payloads = [packet.tolist() for packet in packets]
+
+        for name, buffer in [
+            ("concatenate", ConcatenateBuffer()),
+            ("ring buffer", AudioRingBuffer(sample_rate * 30)),
+        ]:
+            start = time.perf_counter()
+            latencies = run_session(buffer, payloads, sample_rate, retain_secs)
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"{payload_type:>5} {name:>12}: total {elapsed:7.2f} s, append "
+                f"p50 {latencies[len(latencies) // 2] * 1e6:8.1f} us, "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare per-session audio buffers of the streaming servers"
+    )
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--packet-ms", type=int, default=100)
+    parser.add_argument(
+        "--retain-secs",
+        type=float,
+        default=30,
+        help="Audio kept between ticks, like the open utterance of a session",
+    )
+    args = parser.parse_args()
+
+    run_benchmark(args.duration, args.sample_rate, args.packet_ms, args.retain_secs)
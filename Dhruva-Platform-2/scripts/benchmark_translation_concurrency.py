@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BASE_URL = os.getenv("NEXT_PUBLIC_BACKEND_API_URL", "http://localhost:8000")
+API_KEY = os.getenv("NEXT_PUBLIC_API_KEY", "")
+
+
+def build_request(service_id: str, source_language: str, target_language: str):
+    return {
+        "config": {
+            "serviceId": service_id,
+            "language": {
+                "sourceLanguage": source_language,
+                "targetLanguage": target_language,
+            },
+        },
+        "input": [{"source": "The weather is pleasant today."}],
+        "controlConfig": {"dataTracking": False},
+    }
+
+
+async def run_benchmark(
+    total_requests: int, concurrency: int, request_json: dict
+) -> None:
+    """
+    Fires `total_requests` translation requests at the server, `concurrency` at a
+    time, and reports throughput and latency percentiles.
+
+    Run it once against a single worker started with USE_ASYNC_TRITON_CLIENT=false
+    and once with USE_ASYNC_TRITON_CLIENT=true to compare both gateway modes.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=120) as client:
+
+        async def send_one():
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/services/inference/translation",
+                    json=request_json,
+                    headers={"Authorization": API_KEY},
+                )
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[send_one() for _ in range(total_requests)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"Requests:    {total_requests} ({failures} failed)")
+    print(f"Concurrency: {concurrency}")
+    print(f"Throughput:  {total_requests / elapsed:.2f} req/s")
+    print(f"Latency p50: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latency p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure concurrent translation throughput of one server worker"
+    )
+    parser.add_argument("--service-id", default="ai4bharat/indictrans-v2-all-gpu--t4")
+    parser.add_argument("--source-language", default="en")
+    parser.add_argument("--target-language", default="hi")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(
+        run_benchmark(
+            args.requests,
+            args.concurrency,
+            build_request(args.service_id, args.source_language, args.target_language),
+        )
+    )
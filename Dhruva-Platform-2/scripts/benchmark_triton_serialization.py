@@ -0,0 +1,95 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "server")
+
+
+def get_asr_io(batch_size: int, chunk_secs: float, binary_data: bool):
+    # Needs the server's requirements to be installed
+    sys.path.insert(0, SERVER_DIR)
+    from module.services.service import triton_utils_service
+
+    triton_utils_service.TRITON_BINARY_DATA = binary_data
+
+    rng = np.random.default_rng(0)
+    audio_chunks = [
+        rng.uniform(-1, 1, int(chunk_secs * 16000)).astype(np.float32)
+        for _ in range(batch_size)
+    ]
+    return triton_utils_service.TritonUtilsService().get_asr_io_for_triton(
+        audio_chunks, "ai4bharat/conformer-multilingual-indo_aryan-gpu--t4", "hi"
+    )
+
+
+def serialize_http(binary_data: bool, batch_size: int, chunk_secs: float) -> int:
+    import tritonclient.http as http_client
+
+    inputs, outputs = get_asr_io(batch_size, chunk_secs, binary_data)
+    request_body, _ = http_client.InferenceServerClient.generate_request_body(
+        inputs, outputs=outputs
+    )
+    return len(request_body)
+
+
+def serialize_grpc(batch_size: int, chunk_secs: float) -> int:
+    from tritonclient.grpc import service_pb2
+
+    inputs, outputs = get_asr_io(batch_size, chunk_secs, True)
+    from module.services.dependency.triton_client import (
+        to_grpc_inputs,
+        to_grpc_outputs,
+    )
+
+    # Same request the gRPC client builds in infer(), it has no public API for it
+    request = service_pb2.ModelInferRequest(
+        model_name="asr_am_ensemble", model_version="1"
+    )
+    for grpc_input in to_grpc_inputs(inputs):
+        request.inputs.extend([grpc_input._get_tensor()])
+        request.raw_input_contents.extend([grpc_input._get_content()])
+    for grpc_output in to_grpc_outputs(outputs):
+        request.outputs.extend([grpc_output._get_tensor()])
+
+    return len(request.SerializeToString())
+
+
+def run_benchmark(batch_size: int, chunk_secs: float, runs: int) -> None:
+    """
+    Reports the payload size and serialization time of one ASR batch, including
+    building the input tensors, for each Triton transport.
+    """
+    transports = {
+        "http json": lambda: serialize_http(False, batch_size, chunk_secs),
+        "http binary": lambda: serialize_http(True, batch_size, chunk_secs),
+        "grpc": lambda: serialize_grpc(batch_size, chunk_secs),
+    }
+
+    print(f"ASR batch: {batch_size} x {chunk_secs} s at 16 kHz, mean of {runs} runs")
+    for name, serialize in transports.items():
+        payload_bytes = serialize()
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            serialize()
+        elapsed = (time.perf_counter() - start) / runs
+
+        print(
+            f"{name:>12}: {payload_bytes / 1024 / 1024:8.2f} MiB, "
+            f"{elapsed * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare Triton request payloads across transports"
+    )
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--chunk-secs", type=float, default=7)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    run_benchmark(args.batch_size, args.chunk_secs, args.runs)
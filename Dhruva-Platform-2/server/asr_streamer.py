@@ -1,23 +1,29 @@
 import socketio
 import json
-import base64
-import io
 from urllib.parse import parse_qs
 from dataclasses import dataclass
-import wave
-import requests
+from fastapi.logger import logger
+from auth.inference_session import InferenceSession
+from streaming import inference_dispatch
+from streaming.admission import admission_controller
+from streaming.audio_buffer import AudioRingBuffer
+from streaming.session_store import get_client_manager, new_session_id, session_store
 
 @dataclass
 class UserStateForASR:
-    buffer: bytes
+    buffer: AudioRingBuffer
     language: str
     sampling_rate: int
     post_processors: list
     service_id: str
-    api_key: str
+    inference_session: InferenceSession
     run_inference_once_in_bytes: int
     last_inference_position_in_bytes: int
     historical_text: str
+    # Lets a client resume the session from another connection
+    session_id: str = None
+    # Socket connection the session was last served on
+    connection_sid: str = None
 
 class StreamingServerASR:
     '''
@@ -28,7 +34,8 @@ class StreamingServerASR:
     https://github.com/AI4Bharat/speech-recognition-open-api-proxy
     '''
     def __init__(self, response_frequency_in_ms: int = 2000, bytes_per_sample: int = 2) -> None:
-        self.sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+        # Clients of other workers can be reached through Redis, if enabled
+        self.sio = socketio.AsyncServer(client_manager=get_client_manager('asr'), async_mode='asgi', cors_allowed_origins='*')
         self.app = socketio.ASGIApp(
             self.sio, socketio_path="",
             # other_asgi_app=app
@@ -40,76 +47,72 @@ class StreamingServerASR:
         
         # Storage for state specific to each client (key will be socket connection-ID string, and value would be `UserStateForASR`)
         self.client_states = {}
+        # Connections which resumed a session, and have not connected the mic stream yet
+        self.resumed_sids = set()
 
         # Setup the communication handlers
         self.configure_socket_server()
     
     def delete_user_states(self, sid: str) -> None:
         self.client_states.pop(sid, None)
+        self.resumed_sids.discard(sid)
+
+    async def save_user_state(self, sid: str) -> None:
+        # Saved at points where the client could resume from, e.g. after a tick
+        await session_store.save(self.client_states[sid].session_id, self.client_states[sid])
+
+    async def resume_user_state(self, sid: str, session_id: str, inference_session: InferenceSession) -> UserStateForASR:
+        user_state = await session_store.resume(session_id, inference_session)
+        if user_state is None:
+            return None
+
+        # The previous connection may still be open, on this or another worker
+        if user_state.connection_sid and user_state.connection_sid != sid:
+            await self.sio.disconnect(user_state.connection_sid)
+
+        user_state.connection_sid = sid
+        self.resumed_sids.add(sid)
+        return user_state
     
     def initialize_buffer(self, sid: str) -> None:
-        self.client_states[sid].buffer = bytes()
+        if self.client_states[sid].buffer is None:
+            self.client_states[sid].buffer = AudioRingBuffer(self.client_states[sid].sampling_rate * 30)
+        else:
+            self.client_states[sid].buffer.clear()
         self.client_states[sid].last_inference_position_in_bytes = 0
     
-    def run_ulca_inference_from_stream(self, sid: str, stream: io.IOBase) -> str:
-        # Convert the byte-stream into base64 string
-        encoded_bytes = base64.b64encode(stream.read())
-        encoded_string = encoded_bytes.decode()
-
-        # Construct ULCA request payload
-        request_json = {
-            # "serviceId": self.client_states[sid].service_id,
-            "audio": [
-                {
-                    "audioContent": encoded_string
-                }
-            ],
-            "config": {
+    async def run_inference(self, sid: str) -> str:
+        # Run inference in this process, on the audio as it is buffered
+        buffer = self.client_states[sid].buffer
+        response_json = await inference_dispatch.run_asr_inference(
+            self.client_states[sid].inference_session,
+            {
+                "serviceId": self.client_states[sid].service_id,
                 "language": {
                     "sourceLanguage": self.client_states[sid].language
                 },
-                "audioFormat": "wav",
-                "samplingRate": self.client_states[sid].sampling_rate,
-                "encoding": "base64"
-            }
-        }
-        
-        # Run inference via Dhruva REST API
-        response = requests.post(
-            "https://api.dhruva.ai4bharat.org/services/inference/asr?serviceId=" + self.client_states[sid].service_id,
-            json=request_json,
-            headers={"authorization": self.client_states[sid].api_key},
-            # timeout=1
+                "samplingRate": self.client_states[sid].sampling_rate
+            },
+            [buffer.read(buffer.start, buffer.end)],
         )
-        # print("response.text", response.text)
-        response_json = response.json()
         try:
             return response_json["output"][0]["source"]
-        except:
-            print(response.text)
+        except (KeyError, IndexError, TypeError):
+            logger.error(
+                f"Unexpected ASR response: {response_json}", exc_info=True
+            )
             return "<!--ERROR-->"
-
-    def run_inference(self, sid: str) -> str:
-        # Convert the raw bytes to WAV format, and create a byte-stream
-        byte_io = io.BytesIO()
-        with wave.open(byte_io, "wb") as file:
-            file.setnchannels(1)
-            file.setsampwidth(2)
-            file.setframerate(self.client_states[sid].sampling_rate)
-            file.writeframes(self.client_states[sid].buffer)
-        
-        byte_io.seek(0)
-        return self.run_ulca_inference_from_stream(sid, byte_io)
     
     async def transcribe_and_send(self, sid: str) -> None:
         if not self.client_states[sid].buffer:
             return
-        transcript = self.run_inference(sid)
+        transcript = await self.run_inference(sid)
         full_transcript = self.client_states[sid].historical_text + transcript.strip()
         await self.sio.emit(
             "response",
             data=(full_transcript, self.client_states[sid].language),
-            room=sid
+            room=sid,
+            ignore_queue=True
         )
         return transcript
 
@@ -121,9 +124,27 @@ class StreamingServerASR:
             sampling_rate = int(query_dict["samplingRate"][0])
 
             if False: # TODO: Validate the fields: api_key, service_id, language
-                await self.sio.emit("abort", room=sid)
+                await self.sio.emit("abort", room=sid, ignore_queue=True)
                 return False
             
+            # Authenticated once here, instead of on every inference of the stream
+            inference_session = await inference_dispatch.authenticate(
+                query_dict["apiKey"][0], inference_dispatch.get_client_ip(environ)
+            )
+            if inference_session is None:
+                await self.sio.emit("abort", room=sid, ignore_queue=True)
+                return False
+
+            # Counted across all workers, if the Redis backend is enabled
+            if not await admission_controller.acquire(sid):
+                await self.sio.emit("abort", room=sid, ignore_queue=True)
+                return False
+
+            user_state = await self.resume_user_state(sid, query_dict.get("sessionId", [None])[0], inference_session)
+            if user_state is not None:
+                self.client_states[sid] = user_state
+                return True
+
             # Compute the inference_frequency (once in how many bytes should we run inference)
             run_inference_once_in_bytes = int(sampling_rate * (self.response_frequency_in_ms / 1000) * self.bytes_per_sample)
 
@@ -133,23 +154,35 @@ class StreamingServerASR:
                 sampling_rate=sampling_rate,
                 post_processors=json.loads(query_dict["postProcessors"][0]) if "postProcessors" in query_dict else [],
                 service_id=query_dict["serviceId"][0],
-                api_key=query_dict["apiKey"][0],
+                inference_session=inference_session,
                 run_inference_once_in_bytes=run_inference_once_in_bytes,
                 last_inference_position_in_bytes=0,
-                historical_text=""
+                historical_text="",
+                session_id=new_session_id(),
+                connection_sid=sid
             )
             return True
         
         @self.sio.on("connect_mic_stream")
         async def connect_mic_stream(sid: str):
-            self.initialize_buffer(sid)
+            # A resumed session goes on from its buffered audio and transcript
+            resumed = sid in self.resumed_sids
+            self.resumed_sids.discard(sid)
+            if not resumed:
+                self.initialize_buffer(sid)
+                await self.save_user_state(sid)
             # print("Connected stream for:", sid)
-            await self.sio.emit("connect-success", room=sid)
+            await self.sio.emit(
+                "connect-success",
+                data={"sessionId": self.client_states[sid].session_id, "resumed": resumed},
+                room=sid,
+                ignore_queue=True
+            )
         
         @self.sio.on("mic_data")
         async def mic_data(sid, in_data: bytes, language_code: str, is_speaking: bool, disconnect_stream: bool):
             if in_data: # Append audio payload to client buffer
-                self.client_states[sid].buffer += in_data
+                self.client_states[sid].buffer.append_payload(in_data)
             
             if not is_speaking:
                 # If silence is detected, run inference once (in-case there was new data after previous inference) and clear the buffer
@@ -157,20 +190,26 @@ class StreamingServerASR:
                 if transcript:
                     self.client_states[sid].historical_text += transcript + '\n'
                 self.initialize_buffer(sid)
+                await self.save_user_state(sid)
             else:
                 # Run inference once we have accumulated enough amount of audio since previous inference
-                if len(self.client_states[sid].buffer) - self.client_states[sid].last_inference_position_in_bytes >= self.client_states[sid].run_inference_once_in_bytes:
+                buffer_size_in_bytes = len(self.client_states[sid].buffer) * self.bytes_per_sample
+                if buffer_size_in_bytes - self.client_states[sid].last_inference_position_in_bytes >= self.client_states[sid].run_inference_once_in_bytes:
                     await self.transcribe_and_send(sid)
-                    self.client_states[sid].last_inference_position_in_bytes = len(self.client_states[sid].buffer)
+                    self.client_states[sid].last_inference_position_in_bytes = buffer_size_in_bytes
+                    await self.save_user_state(sid)
             
             if disconnect_stream:
                 # If the client wants to disconnect from the stream, run inference for one last-time (in-case there was new data after previous inference)
                 await self.transcribe_and_send(sid)
                 # Remove all info related to the connection, and issue an handshake-signal to terminate
+                await session_store.delete(self.client_states[sid].session_id)
                 self.delete_user_states(sid)
-                await self.sio.emit("terminate", room=sid)
+                await self.sio.emit("terminate", room=sid, ignore_queue=True)
         
         @self.sio.event
-        def disconnect(sid):
+        async def disconnect(sid):
+            # The session is kept in the store, for the client to resume it
             self.delete_user_states(sid)
+            await admission_controller.release(sid)
             # print("Disconnected with:", sid)
@@ -1,29 +1,79 @@
-import time
-from typing import Any, Dict
+import os
 
-from fastapi import Depends, Request
+from cache.invalidation import cache_invalidation_bus
+from cache.ttl_cache import TTLCache
+from dotenv import load_dotenv
+from fastapi import Request
 from pymongo.database import Database
 from redis_om.model.model import NotFoundError
 
 from module.auth.model.api_key import ApiKeyCache
 
+from .request_user_provider import get_user
+
+load_dotenv()
+
+# API keys are cached in the worker, so that authenticating a request needs no
+# network round-trip. Changes made through AuthService are broadcast to all
+# workers, the TTL only bounds staleness if such an event is missed.
+local_api_key_cache = TTLCache(
+    max_size=int(os.environ.get("API_KEY_CACHE_MAX_ENTRIES", 10000)),
+    ttl_secs=float(os.environ.get("API_KEY_CACHE_TTL_SECS", 60)),
+)
+# Keys which do not exist, so that retries with a bad key do not reach Mongo
+missing_api_key_cache = TTLCache(
+    max_size=int(os.environ.get("API_KEY_CACHE_MAX_ENTRIES", 10000)),
+    ttl_secs=float(os.environ.get("API_KEY_NEGATIVE_CACHE_TTL_SECS", 10)),
+)
+
+
+def invalidate_local_api_key(credentials: str):
+    local_api_key_cache.delete(credentials)
+    missing_api_key_cache.delete(credentials)
+
+
+cache_invalidation_bus.subscribe("api_key", invalidate_local_api_key)
+
 
 def populate_api_key_cache(credentials, db):
     api_key_collection = db["api_key"]
     api_key = api_key_collection.find_one({"api_key": credentials})
+    if api_key is None:
+        return None
+
     api_key_cache = ApiKeyCache(**api_key)
     api_key_cache.save()
     return api_key_cache
 
 
-def validate_credentials(credentials: str, request: Request, db: Database) -> bool:
+def get_api_key(credentials: str, db: Database):
+    api_key = local_api_key_cache.get(credentials)
+    if api_key is not None:
+        return api_key
+
+    if missing_api_key_cache.get(credentials):
+        return None
+
     try:
         api_key = ApiKeyCache.get(credentials)
     except NotFoundError:
         try:
             api_key = populate_api_key_cache(credentials, db)
         except Exception:
-            return False
+            return None
+
+        if api_key is None:
+            missing_api_key_cache.set(credentials, True)
+            return None
+
+    local_api_key_cache.set(credentials, api_key)
+    return api_key
+
+
+def validate_credentials(credentials: str, request: Request, db: Database) -> bool:
+    api_key = get_api_key(credentials, db)
+    if api_key is None:
+        return False
 
     if not bool(api_key.active):
         return False
@@ -38,15 +88,7 @@ def validate_credentials(credentials: str, request: Request, db: Database) -> bo
 
 
 def fetch_session(credentials: str, db: Database):
-    api_key_collection = db["api_key"]
-    user_collection = db["user"]
-
     # Api key has to exist since it was already checked during auth verification
-    api_key: Dict[str, Any] = api_key_collection.find_one({"api_key": credentials})  # type: ignore
-
-    user_id = api_key["user_id"]
-
-    user: Dict[str, Any] = user_collection.find_one({"_id": user_id})  # type: ignore
-    del user["password"]
+    api_key = get_api_key(credentials, db)
 
-    return user
+    return get_user(api_key.user_id, db)  # type: ignore
@@ -1,17 +1,58 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import jwt
 from bson.objectid import ObjectId
+from cache.invalidation import cache_invalidation_bus
+from cache.ttl_cache import TTLCache
 from dotenv import load_dotenv
 from exception import BaseError
 from fastapi import Request
 from pymongo.database import Database
 
 from .errors import Errors
+from .request_user_provider import get_user
 
 load_dotenv()
 
+# Sessions and default API keys are looked up on every dashboard call. Sessions
+# are never modified once created, default API keys are dropped from every
+# worker when modified through AuthService.
+session_cache = TTLCache(
+    max_size=int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", 10000)),
+    ttl_secs=float(os.environ.get("SESSION_CACHE_TTL_SECS", 300)),
+)
+default_api_key_cache = TTLCache(
+    max_size=int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", 10000)),
+    ttl_secs=float(os.environ.get("SESSION_CACHE_TTL_SECS", 300)),
+)
+cache_invalidation_bus.subscribe("default_api_key", default_api_key_cache.delete)
+
+
+def get_session(sess_id: str, db: Database) -> Optional[Dict[str, Any]]:
+    session = session_cache.get(sess_id)
+    if session is None:
+        session_collection = db["session"]
+        session = session_collection.find_one({"_id": ObjectId(sess_id)})
+        if session is not None:
+            session_cache.set(sess_id, session)
+
+    return session
+
+
+def get_default_api_key(user_id: str, db: Database) -> Optional[Dict[str, Any]]:
+    api_key = default_api_key_cache.get(user_id)
+    if api_key is None:
+        api_key_collection = db["api_key"]
+        api_key = api_key_collection.find_one(
+            {"name": "default", "user_id": ObjectId(user_id)},
+            {"_id": 1, "type": 1},
+        )
+        if api_key is not None:
+            default_api_key_cache.set(user_id, api_key)
+
+    return api_key
+
 
 def validate_credentials(credentials: str, request: Request, db: Database) -> bool:
     try:
@@ -29,14 +70,9 @@ def validate_credentials(credentials: str, request: Request, db: Database) -> bo
     except Exception:
         return False
 
-    session_collection = db["session"]
-    session = session_collection.find_one({"_id": ObjectId(claims["sess_id"])})
+    session = get_session(claims["sess_id"], db)
     if "inference" in request.url.path or "feedback" in request.url.path:
-        user_id = claims["sub"]
-        api_key_collection = db["api_key"]
-        api_key = api_key_collection.find_one(
-            {"name": "default", "user_id": ObjectId(user_id)}
-        )
+        api_key = get_default_api_key(claims["sub"], db)
 
         if api_key is None:
             raise BaseError(
@@ -52,26 +88,23 @@ def validate_credentials(credentials: str, request: Request, db: Database) -> bo
     if not session:
         return False
 
-    return True
-
+    # Reused by the session provider, so the token is decoded once per request
+    request.state.token_session = session
 
-def fetch_session(credentials: str, db: Database):
-    # This cannot fail, since this was already checked during auth verification
-    claims = jwt.decode(
-        credentials, key=os.environ["JWT_SECRET_KEY"], algorithms=["HS256"]
-    )
+    return True
 
-    session_collection = db["session"]
-    user_collection = db["user"]
 
-    # Session has to exist since it was already checked during auth verification
-    session: Dict[str, Any] = session_collection.find_one(  # type: ignore
-        {"_id": ObjectId(claims["sess_id"])}
-    )
+def fetch_session(credentials: str, request: Request, db: Database):
+    session: Optional[Dict[str, Any]] = getattr(request.state, "token_session", None)
+    if session is None:
+        # This cannot fail, since this was already checked during auth verification
+        claims = jwt.decode(
+            credentials, key=os.environ["JWT_SECRET_KEY"], algorithms=["HS256"]
+        )
 
-    user_id = session["user_id"]
+        # Session has to exist since it was already checked during auth verification
+        session = get_session(claims["sess_id"], db)  # type: ignore
 
-    user: Dict[str, Any] = user_collection.find_one({"_id": user_id})  # type: ignore
-    del user["password"]
+    user_id = session["user_id"]  # type: ignore
 
-    return user
+    return get_user(str(user_id), db)
@@ -0,0 +1,54 @@
+from typing import Optional
+
+from fastapi import Request
+from pydantic import BaseModel
+from pymongo.database import Database
+from schema.auth.common import ApiKeyType
+
+from auth import api_key_provider
+
+
+class InferenceSession(BaseModel):
+    """
+    Caller of an inference request, as authenticated by AuthProvider. Lets
+    inference run without an HTTP request, e.g. for the streaming servers.
+    """
+
+    api_key_id: str
+    api_key_name: str
+    user_id: str
+    data_tracking: bool
+    client_ip: Optional[str] = None
+
+    @classmethod
+    def from_request(cls, request: Request) -> "InferenceSession":
+        return cls(
+            api_key_id=str(request.state.api_key_id),
+            api_key_name=request.state.api_key_name,
+            user_id=str(request.state.user_id),
+            data_tracking=bool(request.state._state.get("api_key_data_tracking")),
+            client_ip=request.headers.get("X-Forwarded-For", request.client.host),
+        )
+
+
+def create_inference_session(
+    credentials: str, client_ip: Optional[str], db: Database
+) -> Optional[InferenceSession]:
+    """
+    Authenticates an inference API key the way AuthProvider and
+    ApiKeyTypeAuthorizationProvider do, returning None if it is not allowed.
+    """
+    api_key = api_key_provider.get_api_key(credentials, db)
+    if api_key is None or not bool(api_key.active):
+        return None
+
+    if ApiKeyType[api_key.type] != ApiKeyType.INFERENCE:
+        return None
+
+    return InferenceSession(
+        api_key_id=str(api_key.id),
+        api_key_name=api_key.name,
+        user_id=str(api_key.user_id),
+        data_tracking=bool(api_key.data_tracking),
+        client_ip=client_ip,
+    )
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from bson import ObjectId
-from fastapi import Depends, Header
+from fastapi import Depends, Header, Request
 from fastapi.security import APIKeyHeader, HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr, Field
@@ -13,6 +13,7 @@ from db.database import AppDatabase
 
 
 def InjectRequestSession(
+    request: Request,
     credentials_bearer: Optional[HTTPAuthorizationCredentials] = Depends(
         HTTPBearer(auto_error=False)
     ),
@@ -26,13 +27,18 @@ def InjectRequestSession(
     WARNING: Only use in protected routes, otherwise it will throw an error.
     """
 
+    # The user may already have been loaded for this request
+    session = getattr(request.state, "user", None)
+    if session is not None:
+        return RequestSession(**session)
+
     match x_auth_source:
         case TokenType.AUTH_TOKEN:
             if not credentials_bearer:
                 raise Exception("Route not protected by authentication")
 
             session = auth_token_provider.fetch_session(
-                credentials_bearer.credentials, db
+                credentials_bearer.credentials, request, db
             )
         case TokenType.API_KEY:
             if not credentials_key:
@@ -40,6 +46,7 @@ def InjectRequestSession(
 
             session = api_key_provider.fetch_session(credentials_key, db)
 
+    request.state.user = session
     return RequestSession(**session)
 
 
@@ -0,0 +1,44 @@
+import os
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from cache.invalidation import cache_invalidation_bus
+from cache.ttl_cache import TTLCache
+from dotenv import load_dotenv
+from fastapi import Request
+from pymongo.database import Database
+
+load_dotenv()
+
+# Users are cached without their password, and dropped from every worker when
+# modified through UserService
+user_cache = TTLCache(
+    max_size=int(os.environ.get("USER_CACHE_MAX_ENTRIES", 10000)),
+    ttl_secs=float(os.environ.get("USER_CACHE_TTL_SECS", 300)),
+)
+cache_invalidation_bus.subscribe("user", user_cache.delete)
+
+
+def get_user(user_id: str, db: Database) -> Optional[Dict[str, Any]]:
+    user = user_cache.get(user_id)
+    if user is None:
+        user_collection = db["user"]
+        user = user_collection.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+        if user is not None:
+            user_cache.set(user_id, user)
+
+    return user
+
+
+def get_request_user(request: Request, db: Database) -> Dict[str, Any]:
+    """
+    Returns the user who made the request, loading it at most once per request.
+
+    WARNING: Only use in protected routes, otherwise it will throw an error.
+    """
+    user: Optional[Dict[str, Any]] = getattr(request.state, "user", None)
+    if user is None:
+        user = get_user(str(request.state.user_id), db)
+        request.state.user = user
+
+    return user  # type: ignore
@@ -1,22 +1,21 @@
-from typing import Any, Dict, List
+from typing import List
 
-from bson import ObjectId
 from db.database import AppDatabase
 from exception import ClientError
 from fastapi import Depends, Request, status
 from pymongo.database import Database
 from schema.auth.common import RoleType
 
+from .request_user_provider import get_request_user
+
 
 class RoleAuthorizationProvider:
     def __init__(self, roles: List[RoleType]) -> None:
         self.roles = roles
 
     def __call__(self, request: Request, db: Database = Depends(AppDatabase)):
-        user_collection = db["user"]
-        user: Dict[str, Any] = user_collection.find_one(
-            {"_id": ObjectId(request.state.user_id)}
-        )  # type: ignore
+        # Already resolved by an earlier dependency of the same request, if any
+        user = get_request_user(request, db)
 
         user_role = RoleType[user["role"]]
 
@@ -1,6 +1,8 @@
 import os
+from urllib.parse import quote
 
 from dotenv import load_dotenv
+from redis import asyncio as aioredis
 from redis_om import get_redis_connection
 
 load_dotenv()
@@ -14,3 +16,24 @@ def get_cache_connection():
         password=os.environ.get("REDIS_PASSWORD"),
         ssl=os.environ.get("REDIS_SECURE") == "true",
     )
+
+
+def get_async_cache_connection() -> aioredis.Redis:
+    """Connection to the same Redis, for use on the event loop"""
+    return aioredis.Redis(
+        host=os.environ.get("REDIS_HOST", "localhost"),
+        port=int(os.environ.get("REDIS_PORT") or 6379),
+        db=int(os.environ.get("REDIS_DB") or 0),
+        password=os.environ.get("REDIS_PASSWORD"),
+        ssl=os.environ.get("REDIS_SECURE") == "true",
+    )
+
+
+def get_cache_url() -> str:
+    scheme = "rediss" if os.environ.get("REDIS_SECURE") == "true" else "redis"
+    password = os.environ.get("REDIS_PASSWORD")
+    credentials = f":{quote(password, safe='')}@" if password else ""
+    return (
+        f"{scheme}://{credentials}{os.environ.get('REDIS_HOST', 'localhost')}"
+        f":{os.environ.get('REDIS_PORT') or 6379}/{os.environ.get('REDIS_DB') or 0}"
+    )
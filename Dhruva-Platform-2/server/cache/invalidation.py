@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from fastapi.logger import logger
+
+from .app_cache import get_cache_connection
+
+CHANNEL = "Dhruva:cache-invalidation"
+RECONNECT_DELAY_SECS = 5
+
+InvalidationCallback = Callable[[str], None]
+
+
+class CacheInvalidationBus:
+    """
+    Broadcasts cache invalidations to every worker over Redis pub/sub.
+
+    In-process caches subscribe to a namespace, and are called with the key to
+    drop whenever any worker publishes an invalidation for that namespace.
+    Invalidations are also applied to the publishing worker right away, so that
+    it is consistent even if Redis is unavailable.
+
+    Subscribing only registers the callback. Invalidations from other workers
+    are received once `start` is called, e.g. on startup of the app, so that
+    processes which merely import the caches do not listen.
+    """
+
+    def __init__(self) -> None:
+        self.__subscribers: Dict[str, List[InvalidationCallback]] = defaultdict(list)
+        self.__lock = threading.Lock()
+        self.__listener_thread: Optional[threading.Thread] = None
+
+    def subscribe(self, namespace: str, callback: InvalidationCallback) -> None:
+        with self.__lock:
+            self.__subscribers[namespace].append(callback)
+
+    def start(self) -> None:
+        with self.__lock:
+            if self.__listener_thread is None:
+                self.__listener_thread = threading.Thread(
+                    target=self.__listen, name="cache-invalidation", daemon=True
+                )
+                self.__listener_thread.start()
+
+    def publish(self, namespace: str, key: str) -> None:
+        self.__notify(namespace, key)
+
+        try:
+            get_cache_connection().publish(
+                CHANNEL, json.dumps({"namespace": namespace, "key": key})
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish cache invalidation: {str(e)}")
+
+    def __notify(self, namespace: str, key: str) -> None:
+        with self.__lock:
+            callbacks = list(self.__subscribers.get(namespace, []))
+
+        for callback in callbacks:
+            try:
+                callback(key)
+            except Exception as e:
+                logger.error(f"Failed to invalidate {namespace} cache: {str(e)}")
+
+    def __listen(self) -> None:
+        while True:
+            try:
+                pubsub = get_cache_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+
+                for message in pubsub.listen():
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+
+                    invalidation = json.loads(data)
+                    self.__notify(invalidation["namespace"], invalidation["key"])
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {str(e)}")
+
+            # Entries published while disconnected are missed, the TTL of the
+            # subscribed caches bounds how long they stay stale
+            time.sleep(RECONNECT_DELAY_SECS)
+
+
+cache_invalidation_bus = CacheInvalidationBus()
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import re
+import unicodedata
+from typing import List, Optional
+
+from custom_metrics import TRANSLATION_CACHE_HITS, TRANSLATION_CACHE_MISSES
+from dotenv import load_dotenv
+from fastapi.logger import logger
+
+from .app_cache import get_async_cache_connection, get_cache_connection
+from .invalidation import cache_invalidation_bus
+from .ttl_cache import TTLCache
+
+load_dotenv()
+
+KEY_PREFIX = "Dhruva:translation"
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationCache:
+    """
+    Two-tier cache of translated sentences, keyed on the service, language pair
+    and normalized source text.
+
+    Lookups go to the in-process LRU first and then, if enabled, to Redis, which
+    is shared by all workers. Redis failures are logged and treated as misses, so
+    that the cache never fails an inference request. Lookups and writes go
+    through the async Redis client, invalidations from the admin API through the
+    sync one.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        max_size: int,
+        ttl_secs: int,
+        redis_enabled: bool,
+    ) -> None:
+        self.enabled = enabled
+        self.ttl_secs = ttl_secs
+
+        self.__local_cache = TTLCache(max_size=max_size, ttl_secs=ttl_secs)
+        self.__redis = get_cache_connection() if enabled and redis_enabled else None
+        self.__async_redis = (
+            get_async_cache_connection() if enabled and redis_enabled else None
+        )
+
+        if enabled:
+            cache_invalidation_bus.subscribe(
+                "translation", self.__invalidate_local_service
+            )
+
+    async def get_many(
+        self,
+        service_id: str,
+        source_lang: str,
+        target_lang: str,
+        texts: List[str],
+    ) -> List[Optional[str]]:
+        if not self.enabled:
+            return [None] * len(texts)
+
+        keys = [
+            self.__get_key(service_id, source_lang, target_lang, text) for text in texts
+        ]
+        results: List[Optional[str]] = [self.__local_cache.get(key) for key in keys]
+        TRANSLATION_CACHE_HITS.labels(service_id, "local").inc(
+            sum(result is not None for result in results)
+        )
+
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        if missing and self.__async_redis is not None:
+            try:
+                redis_results = await self.__async_redis.mget(
+                    [keys[idx] for idx in missing]
+                )
+            except Exception as e:
+                logger.error(f"Failed to read translation cache: {str(e)}")
+                redis_results = [None] * len(missing)
+
+            for idx, result in zip(missing, redis_results):
+                if result is None:
+                    continue
+                if isinstance(result, bytes):
+                    result = result.decode("utf-8")
+                results[idx] = result
+                self.__local_cache.set(keys[idx], result)
+                TRANSLATION_CACHE_HITS.labels(service_id, "redis").inc()
+
+        TRANSLATION_CACHE_MISSES.labels(service_id).inc(
+            sum(result is None for result in results)
+        )
+        return results
+
+    async def set_many(
+        self,
+        service_id: str,
+        source_lang: str,
+        target_lang: str,
+        texts: List[str],
+        translations: List[str],
+    ) -> None:
+        if not self.enabled:
+            return
+
+        keys = [
+            self.__get_key(service_id, source_lang, target_lang, text) for text in texts
+        ]
+        for key, translation in zip(keys, translations):
+            self.__local_cache.set(key, translation)
+
+        if self.__async_redis is None:
+            return
+
+        try:
+            pipeline = self.__async_redis.pipeline(transaction=False)
+            for key, translation in zip(keys, translations):
+                pipeline.set(key, translation, ex=self.ttl_secs)
+            await pipeline.execute()
+        except Exception as e:
+            logger.error(f"Failed to write translation cache: {str(e)}")
+
+    def invalidate_service(self, service_id: str) -> None:
+        # Local tiers of all workers are invalidated through the bus
+        cache_invalidation_bus.publish("translation", service_id)
+
+        if self.__redis is None:
+            return
+
+        prefix = f"{KEY_PREFIX}:{service_id}:"
+        try:
+            # Escape glob characters, service IDs are matched literally
+            pattern = re.sub(r"([*?\[\]\\])", r"\\\1", prefix) + "*"
+            keys = list(self.__redis.scan_iter(match=pattern, count=1000))
+            if keys:
+                self.__redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Failed to invalidate translation cache: {str(e)}")
+
+    def __invalidate_local_service(self, service_id: str) -> None:
+        prefix = f"{KEY_PREFIX}:{service_id}:"
+        self.__local_cache.delete_matching(lambda key: key.startswith(prefix))
+
+    def __get_key(
+        self, service_id: str, source_lang: str, target_lang: str, text: str
+    ) -> str:
+        text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}:{service_id}:{source_lang}:{target_lang}:{text_hash}"
+
+
+translation_cache = TranslationCache(
+    enabled=os.environ.get("TRANSLATION_CACHE_ENABLED", "true").lower() == "true",
+    max_size=int(os.environ.get("TRANSLATION_CACHE_MAX_ENTRIES", 10000)),
+    ttl_secs=int(os.environ.get("TRANSLATION_CACHE_TTL_SECS", 86400)),
+    redis_enabled=os.environ.get("TRANSLATION_CACHE_REDIS_ENABLED", "false").lower()
+    == "true",
+)
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import re
+import time
+from typing import List, Optional, Tuple
+
+from custom_metrics import TTS_CACHE_HITS, TTS_CACHE_MISSES
+from dotenv import load_dotenv
+from fastapi.logger import logger
+
+from .app_cache import get_async_cache_connection, get_cache_connection
+from .translation_cache import normalize_text
+
+load_dotenv()
+
+KEY_PREFIX = "Dhruva:tts"
+LRU_KEY = f"{KEY_PREFIX}:__lru__"
+SIZES_KEY = f"{KEY_PREFIX}:__sizes__"
+TOTAL_SIZE_KEY = f"{KEY_PREFIX}:__total_size__"
+
+
+class TTSAudioCache:
+    """
+    Content-addressed Redis store of synthesized audio, holding the final
+    base64-encoded content returned to the client.
+
+    The store is bounded by the total size of the cached audio. Last access times
+    are kept in a sorted set, and the least recently used entries are evicted once
+    the bound is exceeded. Redis failures are logged and treated as misses.
+
+    Lookups and writes are batched per request and go through the async client,
+    invalidations from the admin API through the sync one.
+    """
+
+    def __init__(self, enabled: bool, max_bytes: int) -> None:
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+
+        self.__redis = get_cache_connection() if enabled else None
+        self.__async_redis = get_async_cache_connection() if enabled else None
+
+    def get_key(
+        self,
+        service_id: str,
+        text: str,
+        language: str,
+        gender: str,
+        sampling_rate: int,
+        audio_format: str,
+        audio_duration: Optional[float],
+    ) -> str:
+        content = "\0".join(
+            [
+                normalize_text(text),
+                language,
+                gender,
+                str(sampling_rate),
+                audio_format,
+                str(audio_duration or ""),
+            ]
+        )
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}:{service_id}:{content_hash}"
+
+    async def get_many(
+        self, service_id: str, keys: List[Optional[str]]
+    ) -> List[Optional[str]]:
+        """Looks up the audio of every key in one round trip, None keys are skipped"""
+        results: List[Optional[str]] = [None] * len(keys)
+        lookups = [(idx, key) for idx, key in enumerate(keys) if key is not None]
+        if self.__async_redis is None or not lookups:
+            return results
+
+        try:
+            audio_contents = await self.__async_redis.mget([key for _, key in lookups])
+            hit_keys = [
+                key
+                for (_, key), audio_content in zip(lookups, audio_contents)
+                if audio_content is not None
+            ]
+            if hit_keys:
+                now = time.time()
+                await self.__async_redis.zadd(LRU_KEY, {key: now for key in hit_keys})
+        except Exception as e:
+            logger.error(f"Failed to read TTS cache: {str(e)}")
+            audio_contents = [None] * len(lookups)
+
+        for (idx, _), audio_content in zip(lookups, audio_contents):
+            if isinstance(audio_content, bytes):
+                audio_content = audio_content.decode("utf-8")
+            results[idx] = audio_content
+
+        hits = sum(audio_content is not None for audio_content in audio_contents)
+        TTS_CACHE_HITS.labels(service_id).inc(hits)
+        TTS_CACHE_MISSES.labels(service_id).inc(len(lookups) - hits)
+        return results
+
+    async def set_many(self, entries: List[Tuple[str, str]]) -> None:
+        """Stores the audio of every (key, audio content) pair in one pipeline"""
+        # Repeated inputs of a request are stored and counted once
+        audio_contents = {
+            key: audio_content
+            for key, audio_content in entries
+            if len(audio_content) <= self.max_bytes
+        }
+        if self.__async_redis is None or not audio_contents:
+            return
+
+        try:
+            keys = list(audio_contents)
+            previous_sizes = await self.__async_redis.hmget(SIZES_KEY, keys)
+            size_change = sum(
+                len(audio_contents[key]) - int(previous_size or 0)
+                for key, previous_size in zip(keys, previous_sizes)
+            )
+
+            now = time.time()
+            pipeline = self.__async_redis.pipeline(transaction=False)
+            pipeline.mset(audio_contents)
+            pipeline.zadd(LRU_KEY, {key: now for key in keys})
+            pipeline.hset(
+                SIZES_KEY,
+                mapping={
+                    key: len(audio_content)
+                    for key, audio_content in audio_contents.items()
+                },
+            )
+            pipeline.incrby(TOTAL_SIZE_KEY, size_change)
+            total_size = (await pipeline.execute())[-1]
+
+            while total_size > self.max_bytes:
+                evicted = await self.__async_redis.zpopmin(LRU_KEY, count=16)
+                if not evicted:
+                    break
+                total_size = await self.__async_delete(
+                    [evicted_key for evicted_key, _ in evicted]
+                )
+        except Exception as e:
+            logger.error(f"Failed to write TTS cache: {str(e)}")
+
+    def invalidate_service(self, service_id: str) -> None:
+        if self.__redis is None:
+            return
+
+        try:
+            # Escape glob characters, service IDs are matched literally
+            pattern = re.sub(r"([*?\[\]\\])", r"\\\1", f"{KEY_PREFIX}:{service_id}:")
+            keys = list(self.__redis.scan_iter(match=pattern + "*", count=1000))
+            if keys:
+                self.__redis.zrem(LRU_KEY, *keys)
+                self.__delete(keys)
+        except Exception as e:
+            logger.error(f"Failed to invalidate TTS cache: {str(e)}")
+
+    async def __async_delete(self, keys: list) -> int:
+        sizes = await self.__async_redis.hmget(SIZES_KEY, keys)  # type: ignore
+        freed_size = sum(int(size or 0) for size in sizes)
+
+        pipeline = self.__async_redis.pipeline(transaction=False)  # type: ignore
+        pipeline.delete(*keys)
+        pipeline.hdel(SIZES_KEY, *keys)
+        pipeline.decrby(TOTAL_SIZE_KEY, freed_size)
+        return (await pipeline.execute())[-1]
+
+    def __delete(self, keys: list) -> int:
+        sizes = self.__redis.hmget(SIZES_KEY, keys)  # type: ignore
+        freed_size = sum(int(size or 0) for size in sizes)
+
+        pipeline = self.__redis.pipeline(transaction=False)  # type: ignore
+        pipeline.delete(*keys)
+        pipeline.hdel(SIZES_KEY, *keys)
+        pipeline.decrby(TOTAL_SIZE_KEY, freed_size)
+        return pipeline.execute()[-1]
+
+
+tts_cache = TTSAudioCache(
+    enabled=os.environ.get("TTS_CACHE_ENABLED", "true").lower() == "true",
+    max_bytes=int(os.environ.get("TTS_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+)
@@ -41,8 +41,12 @@ def get_audio_length(audio) -> float:
 def calculate_asr_usage(data) -> int:
     total_usage = 0
     for d in data:
-        audio = base64.b64decode(d["audioContent"])
-        length = get_audio_length(audio)
+        if d.get("audioContent"):
+            audio = base64.b64decode(d["audioContent"])
+            length = get_audio_length(audio)
+        else:
+            # Audio passed to the server in-process is logged by its duration
+            length = d["audioDuration"]
         total_usage += math.ceil(
             length * ASR_GPU_MULTIPLIER * ASR_CPU_MULTIPLIER * ASR_RAM_MULTIPLIER
         )
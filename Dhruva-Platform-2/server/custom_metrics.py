@@ -1,4 +1,4 @@
-from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
 
 registry = CollectorRegistry()
 
@@ -29,3 +29,90 @@ INFERENCE_REQUEST_DURATION_SECONDS = Histogram(
         "target_language",
     ),
 )
+
+TRITON_CLIENT_POOL_HITS = Counter(
+    "dhruva_triton_client_pool_hits_total",
+    "Triton requests served by an already warmed client",
+    registry=registry,
+    labelnames=("endpoint",),
+)
+
+TRITON_CLIENT_POOL_MISSES = Counter(
+    "dhruva_triton_client_pool_misses_total",
+    "Triton requests that had to create a new client",
+    registry=registry,
+    labelnames=("endpoint",),
+)
+
+DYNAMIC_BATCHER_QUEUE_DEPTH = Gauge(
+    "dhruva_dynamic_batcher_queue_depth",
+    "Items waiting in the dynamic batcher to be sent to Triton",
+    registry=registry,
+    labelnames=("inference_service",),
+)
+
+DYNAMIC_BATCHER_BATCH_SIZE = Histogram(
+    "dhruva_dynamic_batcher_batch_size",
+    "Number of items sent to Triton per coalesced batch",
+    registry=registry,
+    labelnames=("inference_service",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 90, 128),
+)
+
+DYNAMIC_BATCHER_WAIT_SECONDS = Histogram(
+    "dhruva_dynamic_batcher_wait_seconds",
+    "Time work items waited in the dynamic batcher before being sent",
+    registry=registry,
+    labelnames=("inference_service",),
+    buckets=(0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1),
+)
+
+TRANSLATION_CACHE_HITS = Counter(
+    "dhruva_translation_cache_hits",
+    "Translation sentences served from the cache",
+    registry=registry,
+    labelnames=("inference_service", "tier"),
+)
+
+TRANSLATION_CACHE_MISSES = Counter(
+    "dhruva_translation_cache_misses",
+    "Translation sentences not found in the cache",
+    registry=registry,
+    labelnames=("inference_service",),
+)
+
+TTS_CACHE_HITS = Counter(
+    "dhruva_tts_cache_hits",
+    "TTS inputs served from the audio cache",
+    registry=registry,
+    labelnames=("inference_service",),
+)
+
+TTS_CACHE_MISSES = Counter(
+    "dhruva_tts_cache_misses",
+    "TTS inputs not found in the audio cache",
+    registry=registry,
+    labelnames=("inference_service",),
+)
+
+AUDIO_ENCODE_DURATION_SECONDS = Histogram(
+    "dhruva_audio_encode_duration_seconds",
+    "Time taken to encode synthesized audio to the requested format",
+    registry=registry,
+    labelnames=("audio_format", "encoder"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+STREAMING_INFERENCES_COALESCED = Counter(
+    "dhruva_streaming_inferences_coalesced_total",
+    "Intermediate streaming inferences merged into one already pending",
+    registry=registry,
+    labelnames=("streaming_server",),
+)
+
+STREAMING_INFERENCES_SHED = Counter(
+    "dhruva_streaming_inferences_shed_total",
+    "Intermediate streaming inferences skipped as the worker was saturated",
+    registry=registry,
+    labelnames=("streaming_server",),
+)
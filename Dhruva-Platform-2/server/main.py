@@ -4,6 +4,7 @@ from logging.config import dictConfig
 
 import pymongo
 from cache.app_cache import get_cache_connection
+from cache.invalidation import cache_invalidation_bus
 from custom_metrics import *
 from db.database import db_client
 from db.metering_database import Base, engine
@@ -27,6 +28,8 @@ from fastapi_sqlalchemy import DBSessionMiddleware
 from log.logger import LogConfig
 from middleware import PrometheusGlobalMetricsMiddleware
 from module import *
+from module.services.dependency.audio_process_pool import audio_process_pool
+from module.services.dependency.triton_client import triton_client_registry
 from seq_streamer import StreamingServerTaskSequence
 
 dictConfig(LogConfig().dict())
@@ -39,7 +42,10 @@ app = FastAPI(
 )
 
 streamer = StreamingServerTaskSequence(
-    max_connections=int(os.environ.get("MAX_SOCKET_CONNECTIONS_PER_WORKER", -1))
+    max_connections=int(os.environ.get("MAX_SOCKET_CONNECTIONS_PER_WORKER", -1)),
+    max_in_flight_inferences=int(
+        os.environ.get("STREAMING_MAX_IN_FLIGHT_INFERENCES_PER_WORKER", 64)
+    ),
 )
 app.mount("/socket.io", streamer.app)
 
@@ -66,7 +72,22 @@ app.add_middleware(
     app_name="Dhruva",
     registry=registry,
     custom_labels=["api_key_name", "user_id"],
-    custom_metrics=[INFERENCE_REQUEST_COUNT, INFERENCE_REQUEST_DURATION_SECONDS],
+    custom_metrics=[
+        INFERENCE_REQUEST_COUNT,
+        INFERENCE_REQUEST_DURATION_SECONDS,
+        TRITON_CLIENT_POOL_HITS,
+        TRITON_CLIENT_POOL_MISSES,
+        DYNAMIC_BATCHER_QUEUE_DEPTH,
+        DYNAMIC_BATCHER_BATCH_SIZE,
+        DYNAMIC_BATCHER_WAIT_SECONDS,
+        TRANSLATION_CACHE_HITS,
+        TRANSLATION_CACHE_MISSES,
+        TTS_CACHE_HITS,
+        TTS_CACHE_MISSES,
+        AUDIO_ENCODE_DURATION_SECONDS,
+        STREAMING_INFERENCES_COALESCED,
+        STREAMING_INFERENCES_SHED,
+    ],
 )
 
 app.add_middleware(DBSessionMiddleware, custom_engine=engine)
@@ -92,6 +113,26 @@ async def flush_cache():
     cache.flushall()
 
 
+@app.on_event("startup")
+async def start_cache_invalidation_listener():
+    cache_invalidation_bus.start()
+
+
+@app.on_event("startup")
+async def start_audio_process_pool():
+    audio_process_pool.start()
+
+
+@app.on_event("shutdown")
+async def close_triton_clients():
+    await triton_client_registry.close()
+
+
+@app.on_event("shutdown")
+async def shutdown_audio_process_pool():
+    audio_process_pool.shutdown()
+
+
 @app.exception_handler(ULCASetApiKeyTrackingClientError)
 async def ulca_set_api_key_tracking_client_error_handler(
     request: Request, exc: ULCASetApiKeyTrackingClientError
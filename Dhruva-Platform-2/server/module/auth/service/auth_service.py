@@ -10,6 +10,7 @@ import jwt
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from bson import ObjectId
+from cache.invalidation import cache_invalidation_bus
 from dotenv import load_dotenv
 from exception import ClientError
 from exception.base_error import BaseError
@@ -203,6 +204,12 @@ class AuthService:
         masked_key = key[:4] + (len(key) - 8) * "*" + key[-4:]
         return masked_key
 
+    def __invalidate_api_key(self, api_key: ApiKey, key: str):
+        cache_invalidation_bus.publish("api_key", key)
+        # Default keys are also cached by user, for requests made with a JWT
+        if api_key.name == "default":
+            cache_invalidation_bus.publish("default_api_key", str(api_key.user_id))
+
     def __generate_new_api_key(self, request: CreateApiKeyRequest, id: ObjectId):
         key = secrets.token_urlsafe(48)
         api_key = ApiKey(
@@ -223,12 +230,14 @@ class AuthService:
             # Cache write
             api_key_cache = ApiKeyCache(**api_key.dict())
             api_key_cache.save()
+            self.__invalidate_api_key(api_key, api_key.api_key)
         except Exception:
             raise BaseError(Errors.DHRUVA204.value, traceback.format_exc())
 
         return key
 
     def __regenerate_api_key(self, existing_api_key: ApiKey):
+        previous_key = existing_api_key.api_key
         key = secrets.token_urlsafe(48)
         existing_api_key.api_key = key
         existing_api_key.masked_key = self.__mask_key(key)
@@ -237,9 +246,11 @@ class AuthService:
         try:
             self.api_key_repository.save(existing_api_key)
 
-            # Cache write
+            # Cache write, the previous key must stop working everywhere
             api_key_cache = ApiKeyCache(**existing_api_key.dict())
             api_key_cache.save()
+            ApiKeyCache.delete(previous_key)
+            self.__invalidate_api_key(existing_api_key, previous_key)
         except Exception:
             raise BaseError(Errors.DHRUVA204.value, traceback.format_exc())
 
@@ -372,6 +383,7 @@ class AuthService:
             # Cache write
             api_key_cache = ApiKeyCache(**api_key.dict())
             api_key_cache.save()
+            self.__invalidate_api_key(api_key, api_key.api_key)
         except Exception:
             raise BaseError(Errors.DHRUVA211.value, traceback.format_exc())
 
@@ -402,6 +414,7 @@ class AuthService:
             # Cache write
             api_key_cache = ApiKeyCache(**api_key.dict())
             api_key_cache.save()
+            self.__invalidate_api_key(api_key, api_key.api_key)
         except Exception:
             raise ULCADeleteApiKeyServerError(
                 Errors.DHRUVA209.value, traceback.format_exc()
@@ -441,6 +454,7 @@ class AuthService:
             # Cache write
             api_key_cache = ApiKeyCache(**api_key.dict())
             api_key_cache.save()
+            self.__invalidate_api_key(api_key, api_key.api_key)
         except Exception:
             raise ULCASetApiKeyTrackingServerError(
                 Errors.DHRUVA210.value, traceback.format_exc()
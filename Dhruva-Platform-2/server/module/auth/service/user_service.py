@@ -3,6 +3,7 @@ from typing import List
 
 from argon2 import PasswordHasher
 from bson import ObjectId
+from cache.invalidation import cache_invalidation_bus
 from exception import BaseError, ClientError
 from fastapi import Depends, status
 from schema.auth.common import ApiKeyType
@@ -97,4 +98,6 @@ class UserService:
         except Exception:
             raise BaseError(Errors.DHRUVA212.value, traceback.format_exc())
 
+        cache_invalidation_bus.publish("user", str(user.id))
+
         return user
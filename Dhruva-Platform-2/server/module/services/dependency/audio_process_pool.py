@@ -0,0 +1,239 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+from dotenv import load_dotenv
+from fastapi.logger import logger
+
+load_dotenv()
+
+T = TypeVar("T")
+
+
+class SharedArray:
+    """
+    Handle to a NumPy array or bytes held in shared memory. Only the handle is
+    pickled when it is sent to or from a pool worker, not the data.
+    """
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str, is_bytes: bool):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self.is_bytes = is_bytes
+
+    @classmethod
+    def create(cls, value: Any) -> Tuple["SharedArray", SharedMemory]:
+        is_bytes = isinstance(value, (bytes, bytearray))
+        array = np.frombuffer(value, dtype=np.uint8) if is_bytes else value
+
+        shared_memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared_array = np.ndarray(
+            array.shape, dtype=array.dtype, buffer=shared_memory.buf
+        )
+        shared_array[...] = array
+        del shared_array
+
+        return (
+            cls(shared_memory.name, array.shape, array.dtype.str, is_bytes),
+            shared_memory,
+        )
+
+    def attach(self) -> Tuple[Any, SharedMemory]:
+        """Returns a view of the shared data, valid until the memory is closed"""
+        shared_memory = SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=self.dtype, buffer=shared_memory.buf)
+        return (array.tobytes() if self.is_bytes else array), shared_memory
+
+    def load(self) -> Any:
+        """Copies the shared data out and frees the shared memory"""
+        value, shared_memory = self.attach()
+        if not self.is_bytes:
+            value = value.copy()
+
+        shared_memory.close()
+        shared_memory.unlink()
+        return value
+
+
+def is_shareable(value: Any, max_shared_bytes: int) -> bool:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value) <= max_shared_bytes
+    if isinstance(value, np.ndarray):
+        return value.dtype != object and value.nbytes <= max_shared_bytes
+    return False
+
+
+def share_result(result: Any, max_shared_bytes: int) -> Any:
+    if isinstance(result, tuple):
+        return tuple(share_result(value, max_shared_bytes) for value in result)
+    if not is_shareable(result, max_shared_bytes):
+        # Pickled instead, copied in case it is a view of a shared argument
+        return result.copy() if isinstance(result, np.ndarray) else result
+
+    shared_result, shared_memory = SharedArray.create(result)
+    # The server process frees the result, untrack it in the worker so that it is
+    # not unlinked when the worker exits
+    resource_tracker.unregister(shared_memory._name, "shared_memory")  # type: ignore
+    shared_memory.close()
+    return shared_result
+
+
+def load_result(result: Any) -> Any:
+    if isinstance(result, tuple):
+        return tuple(load_result(value) for value in result)
+    if isinstance(result, SharedArray):
+        return result.load()
+    return result
+
+
+def call_with_shared_memory(
+    func: Callable[..., Any], args: Tuple[Any, ...], max_shared_bytes: int
+) -> Any:
+    """Runs in a pool worker, resolving shared arguments and sharing the result"""
+    attached = [
+        arg.attach() if isinstance(arg, SharedArray) else (arg, None) for arg in args
+    ]
+    attached_memory = [memory for _, memory in attached if memory is not None]
+
+    try:
+        # The result may be a view of an argument, so it is copied out before the
+        # arguments are released
+        return share_result(func(*[arg for arg, _ in attached]), max_shared_bytes)
+    finally:
+        del attached
+        for shared_memory in attached_memory:
+            shared_memory.close()
+
+
+def warm_up_worker() -> int:
+    return os.getpid()
+
+
+class AudioProcessPool:
+    """
+    Pool of worker processes for the CPU-bound audio processing of AudioService,
+    which would otherwise block the event loop and contend for the GIL.
+
+    NumPy arrays and bytes in the arguments and results of a call are handed over
+    through shared memory, only payloads larger than `max_shared_bytes` are
+    pickled. With no workers, calls run inline in the calling thread.
+    """
+
+    def __init__(self, max_workers: int, max_shared_bytes: int) -> None:
+        self.max_workers = max_workers
+        self.max_shared_bytes = max_shared_bytes
+
+        self.__executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """Starts the workers ahead of the first call, which would otherwise wait"""
+        if self.max_workers <= 0:
+            return
+
+        executor = self.__get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(warm_up_worker)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Runs `func(*args)` in a worker. `func` has to be a module level function,
+        and callers must not rely on it modifying array arguments in place.
+        """
+        if self.max_workers <= 0:
+            return func(*args)
+
+        shared_memory_list: List[SharedMemory] = []
+        shared_args = []
+        for arg in args:
+            if is_shareable(arg, self.max_shared_bytes):
+                arg, shared_memory = SharedArray.create(arg)
+                shared_memory_list.append(shared_memory)
+            shared_args.append(arg)
+
+        try:
+            future = self.__get_executor().submit(
+                call_with_shared_memory,
+                func,
+                tuple(shared_args),
+                self.max_shared_bytes,
+            )
+        except Exception:
+            self.__free_shared_memory(shared_memory_list)
+            raise
+
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # The worker may still be using the arguments and will share its
+            # result anyway, both are freed once it is done
+            future.cancel()
+            future.add_done_callback(
+                lambda done_future: self.__discard_call(done_future, shared_memory_list)
+            )
+            raise
+        except concurrent.futures.process.BrokenProcessPool:
+            self.__free_shared_memory(shared_memory_list)
+            self.__reset_executor()
+            raise
+        except Exception:
+            self.__free_shared_memory(shared_memory_list)
+            raise
+
+        self.__free_shared_memory(shared_memory_list)
+        return load_result(result)
+
+    def shutdown(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    def __get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self.__executor is None:
+            # Forking a process running the event loop and torch threads is
+            # unsafe, workers are spawned fresh instead
+            self.__executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return self.__executor
+
+    def __reset_executor(self) -> None:
+        logger.error("Audio process pool broke, restarting it on the next call")
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    def __discard_call(
+        self,
+        future: concurrent.futures.Future,
+        shared_memory_list: List[SharedMemory],
+    ) -> None:
+        self.__free_shared_memory(shared_memory_list)
+
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        try:
+            load_result(future.result())
+        except Exception as e:
+            logger.error(f"Failed to free audio process pool result: {str(e)}")
+
+    def __free_shared_memory(self, shared_memory_list: List[SharedMemory]) -> None:
+        for shared_memory in shared_memory_list:
+            shared_memory.close()
+            shared_memory.unlink()
+
+
+audio_process_pool = AudioProcessPool(
+    max_workers=int(os.environ.get("AUDIO_PROCESS_POOL_WORKERS", 2)),
+    max_shared_bytes=int(
+        os.environ.get("AUDIO_PROCESS_POOL_MAX_SHARED_BYTES", 256 * 1024 * 1024)
+    ),
+)
@@ -0,0 +1,356 @@
+import asyncio
+import os
+import threading
+from typing import Dict, List, Optional, Union
+
+import gevent.ssl
+import httpx
+import numpy as np
+import tritonclient.grpc as grpc_client
+import tritonclient.http as http_client
+from custom_metrics import TRITON_CLIENT_POOL_HITS, TRITON_CLIENT_POOL_MISSES
+from dotenv import load_dotenv
+from fastapi.logger import logger
+from tritonclient.utils import (
+    InferenceServerException,
+    deserialize_bytes_tensor,
+    triton_to_np_dtype,
+)
+
+load_dotenv()
+
+# Endpoints of services served over gRPC are stored with this scheme, e.g.
+# "grpc://triton.example.com:8001". All other endpoints use HTTP.
+GRPC_ENDPOINT_PREFIX = "grpc://"
+
+TritonClient = Union[
+    http_client.InferenceServerClient, grpc_client.InferenceServerClient
+]
+
+
+def is_grpc_endpoint(endpoint: str) -> bool:
+    return endpoint.startswith(GRPC_ENDPOINT_PREFIX)
+
+
+def to_grpc_inputs(
+    inputs: List[http_client.InferInput],
+) -> List[grpc_client.InferInput]:
+    """
+    Converts inputs built by TritonUtilsService for HTTP to gRPC inputs, from
+    their binary tensor data.
+    """
+    grpc_inputs = []
+    for http_input in inputs:
+        raw_data = http_input._get_binary_data()
+        if raw_data is None:
+            raise ValueError(
+                f"Input {http_input.name()} has no binary data, the gRPC transport "
+                "requires TRITON_BINARY_DATA to be enabled"
+            )
+
+        if http_input.datatype() == "BYTES":
+            array = deserialize_bytes_tensor(raw_data)
+        else:
+            array = np.frombuffer(
+                raw_data, dtype=triton_to_np_dtype(http_input.datatype())
+            )
+
+        grpc_input = grpc_client.InferInput(
+            http_input.name(), http_input.shape(), http_input.datatype()
+        )
+        grpc_input.set_data_from_numpy(array.reshape(http_input.shape()))
+        grpc_inputs.append(grpc_input)
+
+    return grpc_inputs
+
+
+def to_grpc_outputs(
+    outputs: List[http_client.InferRequestedOutput],
+) -> List[grpc_client.InferRequestedOutput]:
+    return [grpc_client.InferRequestedOutput(output.name()) for output in outputs]
+
+
+class AsyncTritonClient:
+    """
+    Minimal asyncio client for the Triton HTTP/REST inference protocol.
+
+    Request and response bodies are (de)serialized by `tritonclient.http`, so the
+    same InferInput and InferRequestedOutput objects can be used with both the
+    sync and async clients.
+    """
+
+    def __init__(self, endpoint: str, concurrency: int, timeout_secs: float) -> None:
+        self.__client = httpx.AsyncClient(
+            base_url="https://" + endpoint,
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            timeout=timeout_secs,
+        )
+
+    async def infer(
+        self,
+        model_name: str,
+        inputs: list,
+        outputs: list,
+        model_version: str = "",
+        headers: Optional[dict] = None,
+    ) -> http_client.InferResult:
+        request_body, json_size = (
+            http_client.InferenceServerClient.generate_request_body(
+                inputs, outputs=outputs
+            )
+        )
+
+        request_headers = dict(headers) if headers else {}
+        if json_size is not None:
+            request_headers["Inference-Header-Content-Length"] = str(json_size)
+
+        if model_version:
+            request_uri = f"v2/models/{model_name}/versions/{model_version}/infer"
+        else:
+            request_uri = f"v2/models/{model_name}/infer"
+
+        response = await self.__client.post(
+            request_uri, content=request_body, headers=request_headers
+        )
+
+        if response.status_code >= 400:
+            try:
+                error = response.json().get("error", response.text)
+            except Exception:
+                error = response.text
+            raise InferenceServerException(msg=error, status=str(response.status_code))
+
+        header_length = response.headers.get("Inference-Header-Content-Length")
+
+        # httpx has already decompressed the body, if it was compressed
+        return http_client.InferenceServerClient.parse_response_body(
+            response.content,
+            header_length=int(header_length) if header_length else None,
+        )
+
+    async def close(self) -> None:
+        await self.__client.aclose()
+
+
+class AsyncGrpcTritonClient:
+    """
+    Awaitable wrapper of the Triton gRPC client, with the same interface as
+    AsyncTritonClient.
+
+    Requests are sent with the callback API of the gRPC client, whose results
+    are handed back to the event loop, so no thread is blocked per request.
+    """
+
+    def __init__(self, endpoint: str, timeout_secs: float) -> None:
+        self.timeout_secs = timeout_secs
+        self.__client = create_grpc_client(endpoint)
+
+    async def infer(
+        self,
+        model_name: str,
+        inputs: list,
+        outputs: list,
+        model_version: str = "",
+        headers: Optional[dict] = None,
+    ) -> grpc_client.InferResult:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def set_result(result, error) -> None:
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        self.__client.async_infer(
+            model_name,
+            to_grpc_inputs(inputs),
+            callback=lambda result, error: loop.call_soon_threadsafe(
+                set_result, result, error
+            ),
+            model_version=model_version,
+            outputs=to_grpc_outputs(outputs),
+            client_timeout=self.timeout_secs,
+            headers=headers,
+        )
+
+        return await future
+
+    async def close(self) -> None:
+        self.__client.close()
+
+
+def create_grpc_client(endpoint: str) -> grpc_client.InferenceServerClient:
+    return grpc_client.InferenceServerClient(
+        url=endpoint[len(GRPC_ENDPOINT_PREFIX) :],
+        ssl=os.environ.get("TRITON_GRPC_SSL", "true").lower() == "true",
+    )
+
+
+class TritonClientRegistry:
+    """
+    Keeps one Triton client, and hence one warmed connection pool, per endpoint
+    for the lifetime of the worker.
+
+    Server readiness is checked periodically by a background thread instead of
+    on the request path. Endpoints that fail the check have their pooled client
+    evicted, so that the next request starts with fresh connections.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        health_check_interval_secs: float,
+        request_timeout_secs: float,
+    ) -> None:
+        self.concurrency = concurrency
+        self.health_check_interval_secs = health_check_interval_secs
+        self.request_timeout_secs = request_timeout_secs
+
+        self.__clients: Dict[str, TritonClient] = {}
+        self.__async_clients: Dict[
+            str, Union[AsyncTritonClient, AsyncGrpcTritonClient]
+        ] = {}
+        self.__readiness: Dict[str, bool] = {}
+        self.__health_check_headers: Dict[str, dict] = {}
+        self.__lock = threading.Lock()
+
+        self.__health_check_thread: Optional[threading.Thread] = None
+        self.__stop_event = threading.Event()
+
+    def get_client(self, endpoint: str, headers: dict) -> TritonClient:
+        with self.__lock:
+            # Remember the latest credentials, the health checker needs them as well
+            self.__health_check_headers[endpoint] = headers
+            client = self.__clients.get(endpoint)
+
+            if client is None:
+                TRITON_CLIENT_POOL_MISSES.labels(endpoint).inc()
+                client = self.__create_client(endpoint, self.concurrency)
+                self.__clients[endpoint] = client
+            else:
+                TRITON_CLIENT_POOL_HITS.labels(endpoint).inc()
+
+        self.__ensure_health_check_thread()
+        return client
+
+    def get_async_client(
+        self, endpoint: str, headers: dict
+    ) -> Union[AsyncTritonClient, AsyncGrpcTritonClient]:
+        with self.__lock:
+            self.__health_check_headers[endpoint] = headers
+            client = self.__async_clients.get(endpoint)
+
+            if client is None:
+                TRITON_CLIENT_POOL_MISSES.labels(endpoint).inc()
+                if is_grpc_endpoint(endpoint):
+                    client = AsyncGrpcTritonClient(endpoint, self.request_timeout_secs)
+                else:
+                    client = AsyncTritonClient(
+                        endpoint, self.concurrency, self.request_timeout_secs
+                    )
+                self.__async_clients[endpoint] = client
+            else:
+                TRITON_CLIENT_POOL_HITS.labels(endpoint).inc()
+
+        self.__ensure_health_check_thread()
+        return client
+
+    def is_ready(self, endpoint: str) -> bool:
+        # Endpoints are assumed to be ready until the health checker says otherwise
+        return self.__readiness.get(endpoint, True)
+
+    def evict(self, endpoint: str) -> None:
+        # In-flight requests may still hold the evicted client, so it is not
+        # closed here. Its connections are released once it is garbage collected.
+        with self.__lock:
+            self.__clients.pop(endpoint, None)
+            self.__async_clients.pop(endpoint, None)
+
+    async def close(self) -> None:
+        self.__stop_event.set()
+        with self.__lock:
+            clients = list(self.__clients.values())
+            async_clients = list(self.__async_clients.values())
+            self.__clients.clear()
+            self.__async_clients.clear()
+
+        for client in clients:
+            client.close()
+
+        for async_client in async_clients:
+            await async_client.close()
+
+    def __create_client(self, endpoint: str, concurrency: int) -> TritonClient:
+        # A gRPC client multiplexes requests over a single channel
+        if is_grpc_endpoint(endpoint):
+            return create_grpc_client(endpoint)
+
+        return http_client.InferenceServerClient(
+            url=endpoint,
+            ssl=True,
+            ssl_context_factory=gevent.ssl._create_default_https_context,  # type: ignore
+            concurrency=concurrency,
+        )
+
+    def __ensure_health_check_thread(self) -> None:
+        if (
+            self.__health_check_thread is not None
+            or self.health_check_interval_secs <= 0
+        ):
+            return
+
+        with self.__lock:
+            if self.__health_check_thread is None:
+                self.__health_check_thread = threading.Thread(
+                    target=self.__run_health_checks,
+                    name="triton-health-check",
+                    daemon=True,
+                )
+                self.__health_check_thread.start()
+
+    def __run_health_checks(self) -> None:
+        # Triton clients are not thread safe, hence the checker uses its own clients
+        health_check_clients: Dict[str, TritonClient] = {}
+
+        while not self.__stop_event.wait(self.health_check_interval_secs):
+            with self.__lock:
+                endpoints = dict(self.__health_check_headers)
+
+            for endpoint, headers in endpoints.items():
+                try:
+                    if endpoint not in health_check_clients:
+                        health_check_clients[endpoint] = self.__create_client(
+                            endpoint, concurrency=1
+                        )
+                    is_ready = health_check_clients[endpoint].is_server_ready(
+                        headers=headers
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to check Triton server health: {str(e)}")
+                    health_check_clients.pop(endpoint, None)
+                    is_ready = False
+
+                if not is_ready and self.__readiness.get(endpoint, True):
+                    logger.warning(f"Triton server at {endpoint} is not ready")
+                    self.evict(endpoint)
+                elif is_ready and not self.__readiness.get(endpoint, True):
+                    logger.info(f"Triton server at {endpoint} is ready again")
+
+                self.__readiness[endpoint] = is_ready
+
+        for client in health_check_clients.values():
+            client.close()
+
+
+triton_client_registry = TritonClientRegistry(
+    concurrency=int(os.environ.get("TRITON_CLIENT_CONCURRENCY", 20)),
+    health_check_interval_secs=float(
+        os.environ.get("TRITON_HEALTH_CHECK_INTERVAL_SECS", 30)
+    ),
+    request_timeout_secs=float(os.environ.get("TRITON_REQUEST_TIMEOUT_SECS", 20)),
+)
@@ -1 +1,2 @@
+from .dynamic_batcher import DynamicBatcher
 from .inference_gateway import InferenceGateway
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from custom_metrics import (
+    DYNAMIC_BATCHER_BATCH_SIZE,
+    DYNAMIC_BATCHER_QUEUE_DEPTH,
+    DYNAMIC_BATCHER_WAIT_SECONDS,
+)
+
+BatchRunner = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class _PendingWork:
+    def __init__(self, items: List[Any], future: asyncio.Future) -> None:
+        self.items = items
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class _BatchQueue:
+    def __init__(self, service_id: str, run_batch: BatchRunner) -> None:
+        self.service_id = service_id
+        self.run_batch = run_batch
+        self.pending: List[_PendingWork] = []
+        self.size = 0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class DynamicBatcher:
+    """
+    Coalesces compatible work items submitted by concurrent requests into a
+    single Triton request, and routes the results back to each caller.
+
+    Items are queued per key, and a key must only be shared by work that can go
+    into the same request (same service, model and language tensors). A queue is
+    flushed once it holds `max_batch_size` items, or `max_delay_ms` after its
+    first item arrived, whichever comes first.
+    """
+
+    def __init__(self, max_batch_size: int, max_delay_ms: float) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_delay_secs = max_delay_ms / 1000
+
+        self.__queues: Dict[Hashable, _BatchQueue] = {}
+        self.__queued_items: Dict[str, int] = {}
+        # Keeps a reference to running batches so they are not garbage collected
+        self.__running_batches: Set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        service_id: str,
+        key: Hashable,
+        items: List[Any],
+        run_batch: BatchRunner,
+    ) -> List[Any]:
+        """
+        Queues `items` and returns their results once the batch they went into
+        has run. `run_batch` is used if this call starts a new batch; it must
+        return exactly one result per item.
+        """
+        if len(items) > self.max_batch_size:
+            raise ValueError("Submitted more items than the maximum batch size")
+
+        loop = asyncio.get_running_loop()
+        queue_key = (service_id, key)
+
+        queue = self.__queues.get(queue_key)
+        if queue and queue.size + len(items) > self.max_batch_size:
+            # Send what is already queued, the new items start the next batch
+            self.__flush(queue_key)
+            queue = None
+
+        if queue is None:
+            queue = _BatchQueue(service_id, run_batch)
+            self.__queues[queue_key] = queue
+
+        work = _PendingWork(items, loop.create_future())
+        queue.pending.append(work)
+        queue.size += len(items)
+        self.__update_queue_depth(service_id, len(items))
+
+        if queue.size >= self.max_batch_size:
+            self.__flush(queue_key)
+        elif queue.flush_handle is None:
+            queue.flush_handle = loop.call_later(
+                self.max_delay_secs, self.__flush, queue_key
+            )
+
+        return await work.future
+
+    def __flush(self, queue_key: Hashable) -> None:
+        queue = self.__queues.pop(queue_key, None)
+        if queue is None:
+            return
+
+        if queue.flush_handle is not None:
+            queue.flush_handle.cancel()
+
+        task = asyncio.get_running_loop().create_task(self.__run(queue))
+        self.__running_batches.add(task)
+        task.add_done_callback(self.__running_batches.discard)
+
+    async def __run(self, queue: _BatchQueue) -> None:
+        self.__update_queue_depth(queue.service_id, -queue.size)
+
+        flushed_at = time.perf_counter()
+        DYNAMIC_BATCHER_BATCH_SIZE.labels(queue.service_id).observe(queue.size)
+        for work in queue.pending:
+            DYNAMIC_BATCHER_WAIT_SECONDS.labels(queue.service_id).observe(
+                flushed_at - work.enqueued_at
+            )
+
+        try:
+            results = await queue.run_batch(
+                [item for work in queue.pending for item in work.items]
+            )
+        except asyncio.CancelledError:
+            # E.g. on shutdown, the callers would otherwise wait forever
+            for work in queue.pending:
+                work.future.cancel()
+            raise
+        except Exception as exc:
+            for work in queue.pending:
+                if not work.future.done():
+                    work.future.set_exception(exc)
+            return
+
+        offset = 0
+        for work in queue.pending:
+            # The caller may have gone away (e.g. client disconnected) meanwhile
+            if not work.future.done():
+                work.future.set_result(results[offset : offset + len(work.items)])
+            offset += len(work.items)
+
+    def __update_queue_depth(self, service_id: str, change: int) -> None:
+        self.__queued_items[service_id] = (
+            self.__queued_items.get(service_id, 0) + change
+        )
+        # Set instead of inc/dec, since custom metrics are cleared after every push
+        DYNAMIC_BATCHER_QUEUE_DEPTH.labels(service_id).set(
+            self.__queued_items[service_id]
+        )
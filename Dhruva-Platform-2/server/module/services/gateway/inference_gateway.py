@@ -2,13 +2,17 @@ import traceback
 from typing import Any
 import os
 
-import gevent.ssl
 import requests
-import tritonclient.http as http_client
 from exception.base_error import BaseError
 from fastapi.logger import logger
 from numpy import block
 
+from ..dependency.triton_client import (
+    is_grpc_endpoint,
+    to_grpc_inputs,
+    to_grpc_outputs,
+    triton_client_registry,
+)
 from ..error import Errors
 from ..model import Service
 
@@ -18,7 +22,12 @@ class InferenceGateway:
         # Get Triton endpoint from environment variable or use default
         self.triton_endpoint = os.getenv("TRITON_ENDPOINT", "http://localhost:8000")
         self.use_aws_triton = os.getenv("USE_AWS_TRITON", "false").lower() == "true"
-        logger.info(f"Initialized InferenceGateway with Triton endpoint: {self.triton_endpoint}")
+        self.use_async_triton_client = (
+            os.getenv("USE_ASYNC_TRITON_CLIENT", "true").lower() == "true"
+        )
+        logger.info(
+            f"Initialized InferenceGateway with Triton endpoint: {self.triton_endpoint}"
+        )
 
     def send_inference_request(
         self,
@@ -48,31 +57,82 @@ class InferenceGateway:
             endpoint = self.triton_endpoint if self.use_aws_triton else url
             logger.info(f"Using Triton endpoint: {endpoint} for model: {model_name}")
 
-            triton_client = http_client.InferenceServerClient(
-                url=endpoint,
-                ssl=True,
-                ssl_context_factory=gevent.ssl._create_default_https_context,  # type: ignore
-                concurrency=20,
+            triton_client = triton_client_registry.get_client(endpoint, headers)
+
+            # Readiness is checked in the background, this only surfaces the last result
+            if not triton_client_registry.is_ready(endpoint):
+                logger.warning(
+                    f"Triton server at {endpoint} failed its last health check"
+                )
+                # Continue anyway as the server might still be usable
+
+            if is_grpc_endpoint(endpoint):
+                response = triton_client.infer(
+                    model_name,
+                    model_version="1",
+                    inputs=to_grpc_inputs(input_list),
+                    outputs=to_grpc_outputs(output_list),
+                    headers=headers,
+                    client_timeout=triton_client_registry.request_timeout_secs,
+                )
+            else:
+                response = triton_client.async_infer(
+                    model_name,
+                    model_version="1",
+                    inputs=input_list,
+                    outputs=output_list,
+                    headers=headers,
+                )
+                response = response.get_result(
+                    block=True, timeout=triton_client_registry.request_timeout_secs
+                )
+
+        except Exception as e:
+            logger.error(f"Triton inference failed: {str(e)}")
+            raise BaseError(Errors.DHRUVA101.value, traceback.format_exc())
+
+        return response
+
+    async def async_send_triton_request(
+        self,
+        url: str,
+        headers: dict,
+        model_name: str,
+        input_list: list,
+        output_list: list,
+    ):
+        """
+        Same as `send_triton_request`, but awaits the response instead of blocking
+        the event loop. Falls back to the blocking client if the async client
+        is disabled.
+        """
+        if not self.use_async_triton_client:
+            return self.send_triton_request(
+                url=url,
+                headers=headers,
+                model_name=model_name,
+                input_list=input_list,
+                output_list=output_list,
             )
 
-            # Check server health
-            try:
-                health_ctx = triton_client.is_server_ready(headers=headers)
-                logger.info(f"Triton server health check: {health_ctx}")
-                if not health_ctx:
-                    raise BaseError(Errors.DHRUVA107.value, "Triton server is not ready")
-            except Exception as e:
-                logger.error(f"Failed to check Triton server health: {str(e)}")
+        try:
+            endpoint = self.triton_endpoint if self.use_aws_triton else url
+
+            triton_client = triton_client_registry.get_async_client(endpoint, headers)
+
+            if not triton_client_registry.is_ready(endpoint):
+                logger.warning(
+                    f"Triton server at {endpoint} failed its last health check"
+                )
                 # Continue anyway as the server might still be usable
 
-            response = triton_client.async_infer(
+            response = await triton_client.infer(
                 model_name,
                 model_version="1",
                 inputs=input_list,
                 outputs=output_list,
                 headers=headers,
             )
-            response = response.get_result(block=True, timeout=20)
 
         except Exception as e:
             logger.error(f"Triton inference failed: {str(e)}")
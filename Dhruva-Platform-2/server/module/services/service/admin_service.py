@@ -1,6 +1,9 @@
 import datetime
 import traceback
 
+from cache.invalidation import cache_invalidation_bus
+from cache.translation_cache import translation_cache
+from cache.tts_cache import tts_cache
 from exception.base_error import BaseError
 from fastapi import Depends
 from schema.auth.response.get_all_api_keys_response import GetAllApiKeysDetailsResponse
@@ -81,6 +84,8 @@ class AdminService:
 
         new_cache = ServiceCache(**new_cache)
         new_cache.save()
+        cache_invalidation_bus.publish("service", request.serviceId)
+        self.__invalidate_service_results(request.serviceId)
 
         return self.service_repository.update_one(request.dict())
 
@@ -96,17 +101,32 @@ class AdminService:
 
         new_cache = ModelCache(**new_cache)
         new_cache.save()
+        cache_invalidation_bus.publish("model", request.modelId)
+        self.__invalidate_model_services(request.modelId)
 
         return self.model_repository.update_one(request.dict())
 
     def delete_service(self, id):
         ServiceCache.delete(id)
+        cache_invalidation_bus.publish("service", id)
+        self.__invalidate_service_results(id)
         return self.service_repository.delete_one(id)
 
     def delete_model(self, id):
         ModelCache.delete(id)
+        cache_invalidation_bus.publish("model", id)
+        self.__invalidate_model_services(id)
         return self.model_repository.delete_one(id)
 
+    def __invalidate_model_services(self, model_id: str):
+        # Cached results of every service serving the model are now stale
+        for service in self.service_repository.find({"modelId": model_id}):
+            self.__invalidate_service_results(service.serviceId)
+
+    def __invalidate_service_results(self, service_id: str):
+        translation_cache.invalidate_service(service_id)
+        tts_cache.invalidate_service(service_id)
+
     def inference_service_status(self, request_body: ServiceHeartbeatRequest):
         try:
             service = self.service_repository.find_by_id(request_body.serviceId)
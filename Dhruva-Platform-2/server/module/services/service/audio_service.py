@@ -1,21 +1,242 @@
+import asyncio
+import io
 import json
+import math
 import os
+import shutil
 import subprocess
 import tempfile
-from typing import Dict, List, Tuple
+import threading
+import time
+from functools import lru_cache
+from typing import IO, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from urllib.request import urlopen
 
 import numpy as np
 import scipy.signal as sps
+import soundfile as sf
 import torch
+from custom_metrics import AUDIO_ENCODE_DURATION_SECONDS
 from fastapi import Depends
 from pydub import AudioSegment
-from pydub.effects import normalize as pydub_normalize
+from scipy.io import wavfile
 from torchaudio.io import AudioEffector
 
+from ..dependency.audio_process_pool import audio_process_pool
 from ..gateway import InferenceGateway
 from .triton_utils_service import TritonUtilsService
 
+# Audio fetched from audioUri is spooled to disk beyond this size
+AUDIO_INGEST_MAX_MEMORY_BYTES = int(
+    os.environ.get("AUDIO_INGEST_MAX_MEMORY_BYTES", 32 * 1024 * 1024)
+)
+# Duration of audio decoded and VAD chunked at a time when streaming
+AUDIO_INGEST_WINDOW_SECS = float(os.environ.get("AUDIO_INGEST_WINDOW_SECS", 300))
+DOWNLOAD_BLOCK_SIZE = 1024 * 1024
+
+MAX_INT16_AMPLITUDE = 2**15 - 1
+# Samples normalized at a time, in a float64 working buffer
+NORMALIZATION_BLOCK_SIZE = 1024 * 1024
+
+# (sampling rate, target rate) pairs seen on the ASR input and TTS output paths
+COMMON_RESAMPLING_RATES = [
+    (44100, 16000),
+    (48000, 16000),
+    (8000, 16000),
+    (22050, 8000),
+    (22050, 16000),
+    (22050, 44100),
+]
+
+
+def get_resampling_factors(sampling_rate: int, target_rate: int) -> Tuple[int, int]:
+    gcd = math.gcd(sampling_rate, target_rate)
+    return target_rate // gcd, sampling_rate // gcd
+
+
+@lru_cache(maxsize=64)
+def get_resampling_filter(up: int, down: int) -> np.ndarray:
+    """
+    Designs the same anti-aliasing FIR filter as `scipy.signal.resample_poly`,
+    which would otherwise redesign it on every call.
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    return sps.firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+
+
+def resample_poly(audio: np.ndarray, up: int, down: int) -> np.ndarray:
+    resampling_filter = get_resampling_filter(up, down)
+    if np.issubdtype(audio.dtype, np.floating):
+        resampling_filter = resampling_filter.astype(audio.dtype)
+
+    return sps.resample_poly(audio, up, down, window=resampling_filter)
+
+
+for _sampling_rate, _target_rate in COMMON_RESAMPLING_RATES:
+    get_resampling_filter(*get_resampling_factors(_sampling_rate, _target_rate))
+
+
+class StreamingResampler:
+    """
+    Resamples audio that arrives in chunks, giving the same output as resampling
+    the whole stream at once.
+
+    Output samples are only emitted once all input samples under their filter
+    have arrived, and enough input is kept around to compute the next ones.
+    """
+
+    def __init__(self, sampling_rate: int, target_rate: int) -> None:
+        self.up, self.down = get_resampling_factors(sampling_rate, target_rate)
+        # Input samples on either side of an output sample covered by the filter
+        if self.up == self.down == 1:
+            self.filter_reach = 0
+        else:
+            filter_half_length = len(get_resampling_filter(self.up, self.down)) // 2
+            self.filter_reach = filter_half_length // self.up + 1
+
+        self.__buffer = np.zeros(0, dtype=np.float32)
+        # Absolute index of the first buffered input sample, always a multiple of
+        # `down` so that the output grid of the buffer lines up with the stream's
+        self.__buffer_start = 0
+        self.__samples_received = 0
+        self.__samples_emitted = 0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        self.__buffer = np.concatenate([self.__buffer, chunk.astype(np.float32)])
+        self.__samples_received += len(chunk)
+
+        # Last output sample whose filter is covered by the received input
+        last_input = self.__samples_received - 1 - self.filter_reach
+        if last_input < 0:
+            return np.zeros(0, dtype=np.float32)
+
+        return self.__emit(last_input * self.up // self.down + 1)
+
+    def flush(self) -> np.ndarray:
+        # The rest of the stream is treated as silence, like in one-shot resampling
+        return self.__emit(-(-self.__samples_received * self.up // self.down))
+
+    def __emit(self, samples_end: int) -> np.ndarray:
+        if samples_end <= self.__samples_emitted:
+            return np.zeros(0, dtype=np.float32)
+
+        if self.up == self.down == 1:
+            resampled_audio = self.__buffer.copy()
+        else:
+            resampled_audio = resample_poly(self.__buffer, self.up, self.down)
+
+        buffer_offset = self.__buffer_start * self.up // self.down
+        output = resampled_audio[
+            self.__samples_emitted - buffer_offset : samples_end - buffer_offset
+        ]
+        self.__samples_emitted = samples_end
+
+        # Keep the input needed by the next output sample's filter
+        next_input = self.__samples_emitted * self.down // self.up
+        new_start = max(next_input - self.filter_reach, 0) // self.down * self.down
+        new_start = max(new_start, self.__buffer_start)
+        self.__buffer = self.__buffer[new_start - self.__buffer_start :]
+        self.__buffer_start = new_start
+
+        return output
+
+
+# libsndfile container and codec of the output formats it can encode
+SOUNDFILE_ENCODINGS = {
+    "flac": ("FLAC", "PCM_16"),
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+    "ogg": ("OGG", "VORBIS"),
+}
+
+
+class AudioEncoder:
+    """
+    Encodes mono audio to the output formats of TTS in-process.
+
+    FLAC, MP3 and Ogg Vorbis are encoded by libsndfile and PCM ("s16le") is raw
+    16-bit little-endian samples, without temporary files or subprocesses. Other formats,
+    or ones missing from the installed libsndfile, fall back to pydub and ffmpeg.
+    Encoding buffers are kept per thread and reused across calls.
+    """
+
+    def __init__(self) -> None:
+        available_formats = sf.available_formats()
+        self.soundfile_encodings = {
+            audio_format: encoding
+            for audio_format, encoding in SOUNDFILE_ENCODINGS.items()
+            if encoding[0] in available_formats
+        }
+
+        self.__buffers = threading.local()
+
+    def get_encoder_name(self, audio_format: str) -> str:
+        if audio_format in ("wav", "s16le"):
+            return "numpy"
+        if audio_format in self.soundfile_encodings:
+            return "libsndfile"
+        return "ffmpeg"
+
+    def encode(self, audio: np.ndarray, sample_rate: int, audio_format: str) -> bytes:
+        if audio_format == "s16le":
+            return self.__to_int16(audio).tobytes()
+
+        byte_io = self.__get_byte_io()
+
+        if audio_format == "wav":
+            wavfile.write(byte_io, sample_rate, audio)
+        elif audio_format in self.soundfile_encodings:
+            container, codec = self.soundfile_encodings[audio_format]
+            # Lossless codecs are given clipped int16 samples, since libsndfile
+            # wraps around float samples beyond full scale
+            sf.write(
+                byte_io,
+                self.__to_int16(audio) if codec == "PCM_16" else audio,
+                sample_rate,
+                format=container,
+                subtype=codec,
+            )
+        else:
+            audio_segment = AudioSegment(
+                self.__to_int16(audio).tobytes(),
+                sample_width=2,
+                frame_rate=sample_rate,
+                channels=1,
+            )
+            audio_segment.export(byte_io, format=audio_format)
+
+        return byte_io.getvalue()
+
+    def __get_byte_io(self) -> io.BytesIO:
+        byte_io = getattr(self.__buffers, "byte_io", None)
+        if byte_io is None:
+            byte_io = self.__buffers.byte_io = io.BytesIO()
+
+        byte_io.seek(0)
+        byte_io.truncate()
+        return byte_io
+
+    def __to_int16(self, audio: np.ndarray) -> np.ndarray:
+        """Quantizes float audio into a reused buffer, valid until the next call"""
+        if not np.issubdtype(audio.dtype, np.floating):
+            return audio.astype(np.int16)
+
+        scaled: np.ndarray = getattr(self.__buffers, "scaled", np.zeros(0, np.float32))
+        if len(scaled) < len(audio):
+            scaled = self.__buffers.scaled = np.empty(len(audio), dtype=np.float32)
+            self.__buffers.samples = np.empty(len(audio), dtype=np.int16)
+
+        scaled = scaled[: len(audio)]
+        samples = self.__buffers.samples[: len(audio)]
+
+        np.multiply(audio, MAX_INT16_AMPLITUDE, out=scaled)
+        np.clip(scaled, -(2**15), MAX_INT16_AMPLITUDE, out=scaled)
+        np.copyto(samples, scaled, casting="unsafe")
+        return samples
+
+
+audio_encoder = AudioEncoder()
+
 
 class AudioService:
     def __init__(
@@ -26,6 +247,48 @@ class AudioService:
         self.inference_gateway = inference_gateway
         self.triton_utils_service = triton_utils_service
 
+    def decode_audio(self, file_handle: io.BytesIO) -> Tuple[np.ndarray, int]:
+        # Decoded straight into a float32 buffer, which is what Triton expects
+        audio, sampling_rate = sf.read(file_handle, dtype="float32")
+        return audio, sampling_rate
+
+    def process_audio_input(
+        self, file_bytes: bytes, standard_rate: int, process_audio: bool = True
+    ) -> np.ndarray:
+        """
+        Decodes input audio and, if `process_audio` is set, downmixes, resamples
+        and normalizes it for inference.
+        """
+        raw_audio, sampling_rate = self.decode_audio(io.BytesIO(file_bytes))
+
+        if not process_audio:
+            return raw_audio
+
+        return self.process_audio_array(raw_audio, sampling_rate, standard_rate)
+
+    async def async_process_audio_input(
+        self, file_bytes: bytes, standard_rate: int, process_audio: bool = True
+    ) -> np.ndarray:
+        return await audio_process_pool.run(
+            process_audio_input_in_worker, file_bytes, standard_rate, process_audio
+        )
+
+    def process_audio_array(
+        self, audio: np.ndarray, sampling_rate: int, standard_rate: int
+    ) -> np.ndarray:
+        """Downmixes, resamples and normalizes already decoded audio for inference"""
+        # Normalized in place, on a copy so that the caller's audio is left intact
+        mono_audio = self.stereo_to_mono(audio.astype(np.float32))
+        resampled_audio = self.resample_audio(mono_audio, sampling_rate, standard_rate)
+        return self.normalize_peak_amplitude(resampled_audio)
+
+    async def async_process_audio_array(
+        self, audio: np.ndarray, sampling_rate: int, standard_rate: int
+    ) -> np.ndarray:
+        return await audio_process_pool.run(
+            process_audio_array_in_worker, audio, sampling_rate, standard_rate
+        )
+
     def stereo_to_mono(self, audio: np.ndarray):
         if len(audio.shape) > 1:  # Stereo to mono
             audio = audio.sum(axis=1) / 2
@@ -34,42 +297,143 @@ class AudioService:
 
     def resample_audio(self, audio: np.ndarray, sampling_rate: int, target_rate: int):
         if sampling_rate != target_rate:
-            number_of_samples = round(len(audio) * float(target_rate) / sampling_rate)
-
-            # Since the t param is None, it will only return resampled_x
-            audio = sps.resample(audio, number_of_samples)  # type: ignore
+            audio = resample_poly(
+                audio, *get_resampling_factors(sampling_rate, target_rate)
+            )
 
         return audio
 
-    def equalize_amplitude(self, audio: np.ndarray, frame_rate: int):
-        # Amplitude Equalization, assuming mono-streamed
-        # TODO-1: Normalize based on a reference audio from MUCS benchmark? Ref: https://stackoverflow.com/a/42496373
-        # TODO-2: Just implement it without pydub? Ref: https://stackoverflow.com/a/61254921
-        audio *= 2**15 - 1  # Quantize to int16
-        audio_segment = AudioSegment(
-            data=audio.astype("int16").tobytes(),
-            sample_width=2,
-            frame_rate=frame_rate,
-            channels=1,
+    def normalize_peak_amplitude(self, audio: np.ndarray, headroom_db: float = 0.1):
+        """
+        Amplitude equalization of mono audio, done in place on the float buffer.
+
+        Equivalent to quantizing to int16 and applying pydub's `normalize`, i.e.
+        boosting the peak to `headroom_db` below full scale, then dequantizing.
+        """
+        # TODO: Normalize based on a reference audio from MUCS benchmark? Ref: https://stackoverflow.com/a/42496373
+        gain = self.get_normalization_gain(self.get_quantized_peak(audio), headroom_db)
+        return self.apply_normalization_gain(audio, gain)
+
+    def get_quantized_peak(self, audio: np.ndarray) -> float:
+        """Peak of the audio once quantized to int16, as used for normalization"""
+        if not audio.size:
+            return 0
+
+        extremes = np.array([audio.min(), audio.max()], dtype=np.float64)
+        self.__quantize(extremes)
+        return float(np.abs(extremes).max())
+
+    def get_normalization_gain(self, peak: float, headroom_db: float = 0.1) -> float:
+        if not peak:
+            return 1
+
+        target_peak = 2**15 * 10 ** (-headroom_db / 20)
+        return 10 ** (20 * np.log10(target_peak / peak) / 20)
+
+    def apply_normalization_gain(self, audio: np.ndarray, gain: float):
+        """
+        Normalizes audio in place with a given gain, e.g. the gain of the whole
+        stream for a window of it.
+        """
+        for start in range(0, len(audio), NORMALIZATION_BLOCK_SIZE):
+            block = audio[start : start + NORMALIZATION_BLOCK_SIZE]
+
+            # Quantized and amplified in float64 like the int16 path of pydub,
+            # since float32 error here would be multiplied by the gain
+            samples = block.astype(np.float64)
+            self.__quantize(samples)
+            self.__amplify(samples, gain)
+
+            # Dequantized in float32, the int16 values are exact in it
+            np.divide(
+                samples.astype(np.float32), np.float32(MAX_INT16_AMPLITUDE), out=block
+            )
+
+        return audio.astype(np.float32, copy=False)
+
+    def __quantize(self, samples: np.ndarray) -> None:
+        # Truncated like astype("int16"), but clipped instead of wrapped around
+        np.multiply(samples, MAX_INT16_AMPLITUDE, out=samples)
+        np.trunc(samples, out=samples)
+        np.clip(samples, -(2**15), MAX_INT16_AMPLITUDE, out=samples)
+
+    def __amplify(self, samples: np.ndarray, gain: float) -> None:
+        if gain == 1:
+            return
+
+        # Same rounding and clipping as audioop.mul, which pydub uses
+        np.multiply(samples, gain, out=samples)
+        np.clip(samples, -(2**15), MAX_INT16_AMPLITUDE, out=samples)
+        np.floor(samples, out=samples)
+
+    def silero_vad_chunking(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        max_chunk_duration_s: float,
+        min_speech_duration_ms: int = 100,
+    ) -> Tuple[List[np.ndarray], List[Dict[str, float]]]:
+        inputs, outputs = self.__get_vad_io_for_chunking(
+            audio, sample_rate, min_speech_duration_ms
         )
-        equalized_audio = pydub_normalize(audio_segment)
 
-        return equalized_audio
+        response = self.inference_gateway.send_triton_request(
+            url=os.environ["SPEECH_UTILS_ENDPOINT"],
+            model_name="vad",
+            input_list=inputs,
+            output_list=outputs,
+            headers=self.__get_vad_headers(),
+        )
 
-    def dequantize_audio(self, audio: AudioSegment):
-        dequantized_audio = np.array(audio.get_array_of_samples()).astype("float64") / (
-            2**15 - 1
+        return self.__split_audio_by_vad_response(
+            response, audio, sample_rate, max_chunk_duration_s
         )
-        return dequantized_audio
 
-    def silero_vad_chunking(
+    async def async_silero_vad_chunking(
         self,
         audio: np.ndarray,
         sample_rate: int,
         max_chunk_duration_s: float,
         min_speech_duration_ms: int = 100,
     ) -> Tuple[List[np.ndarray], List[Dict[str, float]]]:
-        inputs, outputs = self.triton_utils_service.get_vad_io_for_triton(
+        inputs, outputs = self.__get_vad_io_for_chunking(
+            audio, sample_rate, min_speech_duration_ms
+        )
+
+        response = await self.inference_gateway.async_send_triton_request(
+            url=os.environ["SPEECH_UTILS_ENDPOINT"],
+            model_name="vad",
+            input_list=inputs,
+            output_list=outputs,
+            headers=self.__get_vad_headers(),
+        )
+
+        return self.__split_audio_by_vad_response(
+            response, audio, sample_rate, max_chunk_duration_s
+        )
+
+    async def async_get_speech_timestamps(
+        self, audio: np.ndarray, sample_rate: int, min_speech_duration_ms: int = 100
+    ) -> List[Dict[str, int]]:
+        """Speech segments found by the VAD model, as start and end sample offsets"""
+        inputs, outputs = self.__get_vad_io_for_chunking(
+            audio, sample_rate, min_speech_duration_ms
+        )
+
+        response = await self.inference_gateway.async_send_triton_request(
+            url=os.environ["SPEECH_UTILS_ENDPOINT"],
+            model_name="vad",
+            input_list=inputs,
+            output_list=outputs,
+            headers=self.__get_vad_headers(),
+        )
+
+        return self.__parse_vad_response(response)
+
+    def __get_vad_io_for_chunking(
+        self, audio: np.ndarray, sample_rate: int, min_speech_duration_ms: int
+    ):
+        return self.triton_utils_service.get_vad_io_for_triton(
             audio,
             sample_rate,
             threshold=0.3,
@@ -78,24 +442,26 @@ class AudioService:
             min_speech_duration_ms=min_speech_duration_ms,
         )
 
-        headers = {
+    def __get_vad_headers(self):
+        return {
             "Authorization": "Bearer " + os.environ["SPEECH_UTILS_ENDPOINT_API_KEY"]
         }
-        response = self.inference_gateway.send_triton_request(
-            url=os.environ["SPEECH_UTILS_ENDPOINT"],
-            model_name="vad",
-            input_list=inputs,
-            output_list=outputs,
-            headers=headers,
-        )
 
+    def __parse_vad_response(self, response) -> List[Dict[str, int]]:
         batch_result = response.as_numpy("TIMESTAMPS")
-
         if not batch_result:
-            speech_timestamps = None
-        else:
-            speech_timestamps = json.loads(batch_result[0].decode("utf-8"))
+            return []
 
+        return json.loads(batch_result[0].decode("utf-8")) or []
+
+    def __split_audio_by_vad_response(
+        self,
+        response,
+        audio: np.ndarray,
+        sample_rate: int,
+        max_chunk_duration_s: float,
+    ) -> Tuple[List[np.ndarray], List[Dict[str, float]]]:
+        speech_timestamps = self.__parse_vad_response(response)
         if not speech_timestamps:
             return ([], [])
 
@@ -112,31 +478,162 @@ class AudioService:
 
     def download_audio(self, url: str):
         if "youtube.com" in url or "youtu.be" in url or "drive.google.com" in url:
-            temp = tempfile.TemporaryDirectory()
-            subprocess.call(
-                [
-                    "yt-dlp",
-                    "-x",
-                    "--audio-format",
-                    "mp3",
-                    "--audio-quality",
-                    "0",
-                    url,
-                    "--output",
-                    temp.name + "/file.mp3",
-                ]
-            )
-
-            with open(temp.name + "/file.mp3", "rb") as fhand:
+            with self.__download_with_yt_dlp(url) as fhand:
                 file_bytes = fhand.read()
 
-            temp.cleanup()
-
         else:
             file_bytes = urlopen(url).read()
 
         return file_bytes
 
+    def download_audio_to_file(self, url: str) -> IO[bytes]:
+        """
+        Downloads audio into a temporary file, which is only kept in memory while
+        it is small. The caller has to close it.
+        """
+        if "youtube.com" in url or "youtu.be" in url or "drive.google.com" in url:
+            return self.__download_with_yt_dlp(url)
+
+        audio_file = tempfile.SpooledTemporaryFile(
+            max_size=AUDIO_INGEST_MAX_MEMORY_BYTES
+        )
+        try:
+            with urlopen(url) as response:
+                shutil.copyfileobj(response, audio_file, DOWNLOAD_BLOCK_SIZE)
+        except Exception:
+            audio_file.close()
+            raise
+
+        audio_file.seek(0)
+        return audio_file  # type: ignore
+
+    async def async_download_audio_to_file(self, url: str) -> IO[bytes]:
+        # Both the download and yt-dlp block, so they run in a thread
+        return await asyncio.to_thread(self.download_audio_to_file, url)
+
+    def __download_with_yt_dlp(self, url: str) -> IO[bytes]:
+        temp = tempfile.TemporaryDirectory()
+        subprocess.call(
+            [
+                "yt-dlp",
+                "-x",
+                "--audio-format",
+                "mp3",
+                "--audio-quality",
+                "0",
+                url,
+                "--output",
+                temp.name + "/file.mp3",
+            ]
+        )
+
+        # The open file stays readable once the directory has been removed
+        fhand = open(temp.name + "/file.mp3", "rb")
+        temp.cleanup()
+
+        return fhand
+
+    def iter_resampled_windows(
+        self, audio_file: IO[bytes], target_rate: int, window_secs: float
+    ) -> Iterator[np.ndarray]:
+        """
+        Decodes, downmixes and resamples audio one window at a time, so that only
+        a window of the decoded audio is held in memory.
+        """
+        with sf.SoundFile(audio_file) as sound_file:
+            resampler = StreamingResampler(sound_file.samplerate, target_rate)
+
+            for block in sound_file.blocks(
+                blocksize=int(window_secs * sound_file.samplerate), dtype="float32"
+            ):
+                yield resampler.process(self.stereo_to_mono(block))
+
+            yield resampler.flush()
+
+    async def async_iter_silero_vad_chunks(
+        self,
+        audio_file: IO[bytes],
+        sample_rate: int,
+        max_chunk_duration_s: float,
+        window_secs: float = AUDIO_INGEST_WINDOW_SECS,
+    ) -> AsyncIterator[Tuple[np.ndarray, Dict[str, float]]]:
+        """
+        Streaming equivalent of decoding, normalizing and VAD chunking a whole
+        audio file, with memory bounded by `window_secs` of audio.
+
+        Windows are decoded and resampled in a thread, the next one while VAD
+        runs on the current one, so chunks are yielded as soon as their window
+        has been through VAD. Each window is normalized with the gain of the
+        peak so far, rather than of the whole audio, which would need a full
+        pass first. Chunks are yielded with timestamps relative to the start of
+        the audio.
+        """
+        windows = self.iter_resampled_windows(audio_file, sample_rate, window_secs)
+        peak = 0.0
+
+        def read_window() -> Optional[np.ndarray]:
+            nonlocal peak
+            window = next(windows, None)
+            if window is None:
+                return None
+
+            # The gain never clips the current window, and only goes down
+            peak = max(peak, self.get_quantized_peak(window))
+            return self.apply_normalization_gain(
+                window, self.get_normalization_gain(peak)
+            )
+
+        carried_audio = np.zeros(0, dtype=np.float32)
+        # Position of carried_audio in the whole audio, in samples
+        offset = 0
+
+        window = await asyncio.to_thread(read_window)
+        while window is not None:
+            next_window = asyncio.ensure_future(asyncio.to_thread(read_window))
+            try:
+                audio = np.concatenate([carried_audio, window])
+                audio_chunks: List[np.ndarray] = []
+                speech_timestamps: List[Dict[str, float]] = []
+                if len(audio):
+                    (
+                        audio_chunks,
+                        speech_timestamps,
+                    ) = await self.async_silero_vad_chunking(
+                        audio, sample_rate, max_chunk_duration_s
+                    )
+                following_window = await next_window
+            except BaseException:
+                # The caller closes the file, so not while a window is being read
+                await asyncio.gather(next_window, return_exceptions=True)
+                raise
+
+            # Speech running into the end of the window is carried over, so that
+            # it is not cut at the window boundary
+            carry_from = len(audio)
+            if (
+                following_window is not None
+                and speech_timestamps
+                and speech_timestamps[-1]["start"] > 0
+                and speech_timestamps[-1]["end"] >= len(audio) - sample_rate
+            ):
+                carry_from = int(speech_timestamps[-1]["start"])
+                audio_chunks = audio_chunks[:-1]
+                speech_timestamps = speech_timestamps[:-1]
+
+            for audio_chunk, timestamps in zip(audio_chunks, speech_timestamps):
+                start = int(timestamps["start"]) + offset
+                end = int(timestamps["end"]) + offset
+                yield audio_chunk.copy(), {
+                    "start": start,
+                    "start_secs": round(start / sample_rate, 3),
+                    "end": end,
+                    "end_secs": round(end / sample_rate, 3),
+                }
+
+            carried_audio = audio[carry_from:]
+            offset += carry_from
+            window = following_window
+
     def stretch_audio(
         self, input_audio: np.ndarray, speed_factor: float, sample_rate: int
     ):
@@ -150,18 +647,58 @@ class AudioService:
     def append_silence(
         self, input_audio: np.ndarray, silence_duration: float, sample_rate: int
     ):
-        audio_segment = AudioSegment(
-            input_audio.tobytes(),
-            sample_width=input_audio.dtype.itemsize,
-            frame_rate=sample_rate,
-            channels=1,
+        # Padded in the input's dtype, pydub would reinterpret float samples as ints
+        silence_samples = int(silence_duration * sample_rate)
+        return np.pad(input_audio, (0, silence_samples))
+
+    def fit_audio_duration(
+        self, audio: np.ndarray, audio_duration: float, sample_rate: int
+    ) -> np.ndarray:
+        """Speeds up audio longer than `audio_duration`, or pads shorter audio"""
+        cur_duration = len(audio) / sample_rate
+        speed_factor = cur_duration / audio_duration
+
+        if speed_factor > 1:
+            audio = self.stretch_audio(audio, speed_factor, sample_rate)
+        elif speed_factor < 1:
+            audio = self.append_silence(
+                audio, audio_duration - cur_duration, sample_rate
+            )
+
+        return audio
+
+    def encode_audio(
+        self, audio: np.ndarray, sample_rate: int, audio_format: str
+    ) -> bytes:
+        return audio_encoder.encode(audio, sample_rate, audio_format)
+
+    async def async_encode_tts_audio(
+        self,
+        raw_audio: np.ndarray,
+        sampling_rate: int,
+        target_rate: int,
+        audio_duration: Optional[float],
+        audio_format: str,
+    ) -> bytes:
+        """
+        Resamples synthesized audio, fits it to `audio_duration` if given and
+        encodes it in `audio_format`.
+        """
+        audio_bytes, encode_secs = await audio_process_pool.run(
+            encode_tts_audio_in_worker,
+            raw_audio,
+            sampling_rate,
+            target_rate,
+            audio_duration,
+            audio_format,
         )
-        silence_segment = AudioSegment.silent(duration=silence_duration * 1000)
 
-        final_audio_segment = audio_segment + silence_segment
-        final_audio = np.array(final_audio_segment.get_array_of_samples())
+        # Observed here, metrics recorded in pool workers would not be exported
+        AUDIO_ENCODE_DURATION_SECONDS.labels(
+            audio_format, audio_encoder.get_encoder_name(audio_format)
+        ).observe(encode_secs)
 
-        return final_audio
+        return audio_bytes
 
     def adjust_timestamps(
         self,
@@ -283,3 +820,45 @@ class AudioService:
             start_secs = round(start / sample_rate, 3)
 
         return chunked_timestamps
+
+
+# Only the CPU-bound methods of AudioService are used in audio process pool
+# workers, which need neither the inference gateway nor Triton utils
+def get_worker_audio_service() -> AudioService:
+    return AudioService(inference_gateway=None, triton_utils_service=None)  # type: ignore
+
+
+def process_audio_input_in_worker(
+    file_bytes: bytes, standard_rate: int, process_audio: bool
+) -> np.ndarray:
+    return get_worker_audio_service().process_audio_input(
+        file_bytes, standard_rate, process_audio
+    )
+
+
+def process_audio_array_in_worker(
+    audio: np.ndarray, sampling_rate: int, standard_rate: int
+) -> np.ndarray:
+    return get_worker_audio_service().process_audio_array(
+        audio, sampling_rate, standard_rate
+    )
+
+
+def encode_tts_audio_in_worker(
+    raw_audio: np.ndarray,
+    sampling_rate: int,
+    target_rate: int,
+    audio_duration: Optional[float],
+    audio_format: str,
+) -> Tuple[bytes, float]:
+    audio_service = get_worker_audio_service()
+
+    final_audio = audio_service.resample_audio(raw_audio, sampling_rate, target_rate)
+    if audio_duration:
+        final_audio = audio_service.fit_audio_duration(
+            final_audio, audio_duration, target_rate
+        )
+
+    start = time.perf_counter()
+    audio_bytes = audio_service.encode_audio(final_audio, target_rate, audio_format)
+    return audio_bytes, time.perf_counter() - start
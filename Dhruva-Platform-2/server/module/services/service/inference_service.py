@@ -1,20 +1,25 @@
+import asyncio
 import base64
-import io
 import json
+import os
 import time
 import traceback
+from collections import deque
 from copy import deepcopy
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 import numpy as np
-import soundfile as sf
+from auth.inference_session import InferenceSession
+from cache.invalidation import cache_invalidation_bus
+from cache.translation_cache import translation_cache
+from cache.ttl_cache import TTLCache
+from cache.tts_cache import tts_cache
 from celery_backend.tasks import log_data
 from custom_metrics import INFERENCE_REQUEST_COUNT, INFERENCE_REQUEST_DURATION_SECONDS
 from exception.base_error import BaseError
 from exception.client_error import ClientError
 from exception.null_value_error import NullValueError
 from fastapi import Depends, Request, status
-from pydub import AudioSegment
 from schema.services.common import (
     LANG_CODE_TO_SCRIPT_CODE,
     AudioFormat,
@@ -51,10 +56,9 @@ from schema.services.response import (
     ULCAVadInferenceResponse,
 )
 from schema.services.response.ulca_vad_inference_response import _ULCATimestamps
-from scipy.io import wavfile
 
 from ..error.errors import Errors
-from ..gateway import InferenceGateway
+from ..gateway import DynamicBatcher, InferenceGateway
 from ..model import Model, ModelCache, Service, ServiceCache
 from ..repository import ModelRepository, ServiceRepository
 from .audio_service import AudioService
@@ -62,6 +66,49 @@ from .post_processor_service import PostProcessorService
 from .subtitle_service import SubtitleService
 from .triton_utils_service import TritonUtilsService
 
+# Maximum number of concurrent Triton requests a single inference request may
+# fan out to. Can be overridden per service with a JSON object of serviceId to limit.
+# By default, Whisper is kept sequential since it is unstable at high throughput.
+DEFAULT_MAX_INFLIGHT_TRITON_REQUESTS_PER_SERVICE = {
+    "ai4bharat/whisper--gpu-t4": 1,
+    "ai4bharat/whisper-medium-en--gpu--t4": 1,
+}
+MAX_INFLIGHT_TRITON_REQUESTS = int(os.environ.get("MAX_INFLIGHT_TRITON_REQUESTS", 4))
+MAX_INFLIGHT_TRITON_REQUESTS_PER_SERVICE: Dict[str, int] = json.loads(
+    os.environ.get(
+        "MAX_INFLIGHT_TRITON_REQUESTS_PER_SERVICE",
+        json.dumps(DEFAULT_MAX_INFLIGHT_TRITON_REQUESTS_PER_SERVICE),
+    )
+)
+
+# Long audioUri inputs with VAD are decoded and transcribed window by window
+STREAMING_AUDIO_INGEST_ENABLED = (
+    os.environ.get("STREAMING_AUDIO_INGEST_ENABLED", "true").lower() == "true"
+)
+
+TRANSLITERATION_MAX_BATCH_SIZE = int(
+    os.environ.get("TRANSLITERATION_MAX_BATCH_SIZE", 32)
+)
+
+# Coalesces translation sentences of concurrent requests to the same service and
+# language pair into shared Triton requests
+TRANSLATION_MAX_BATCH_SIZE = 90
+DYNAMIC_BATCHING_ENABLED = (
+    os.environ.get("DYNAMIC_BATCHING_ENABLED", "true").lower() == "true"
+)
+translation_batcher = DynamicBatcher(
+    max_batch_size=TRANSLATION_MAX_BATCH_SIZE,
+    max_delay_ms=float(os.environ.get("DYNAMIC_BATCHING_MAX_DELAY_MS", 5)),
+)
+
+# Service and model records are cached in the worker for a short while in front of
+# Redis, and dropped as soon as an admin updates them
+RECORD_CACHE_TTL_SECS = float(os.environ.get("RECORD_CACHE_TTL_SECS", 30))
+local_service_cache = TTLCache(max_size=1024, ttl_secs=RECORD_CACHE_TTL_SECS)
+local_model_cache = TTLCache(max_size=1024, ttl_secs=RECORD_CACHE_TTL_SECS)
+cache_invalidation_bus.subscribe("service", local_service_cache.delete)
+cache_invalidation_bus.subscribe("model", local_model_cache.delete)
+
 
 def populate_service_cache(serviceId: str, service_repository: ServiceRepository):
     service = service_repository.get_by_service_id(serviceId)
@@ -78,6 +125,10 @@ def populate_model_cache(modelId: str, model_repository: ModelRepository):
 
 
 def validate_service_id(serviceId: str, service_repository):
+    service = local_service_cache.get(serviceId)
+    if service is not None:
+        return service
+
     try:
         service = ServiceCache.get(serviceId)
     except Exception:
@@ -90,10 +141,15 @@ def validate_service_id(serviceId: str, service_repository):
         except Exception:
             raise BaseError(Errors.DHRUVA104.value, traceback.format_exc())
 
+    local_service_cache.set(serviceId, service)
     return service
 
 
 def validate_model_id(modelId: str, model_repository):
+    model = local_model_cache.get(modelId)
+    if model is not None:
+        return model
+
     try:
         model = ModelCache.get(modelId)
     except Exception:
@@ -102,9 +158,17 @@ def validate_model_id(modelId: str, model_repository):
         except Exception:
             raise BaseError(Errors.DHRUVA105.value, traceback.format_exc())
 
+    local_model_cache.set(modelId, model)
     return model
 
 
+def get_max_inflight_requests(serviceId: str) -> int:
+    if serviceId in MAX_INFLIGHT_TRITON_REQUESTS_PER_SERVICE:
+        return MAX_INFLIGHT_TRITON_REQUESTS_PER_SERVICE[serviceId]
+
+    return MAX_INFLIGHT_TRITON_REQUESTS
+
+
 class InferenceService:
     def __init__(
         self,
@@ -124,12 +188,20 @@ class InferenceService:
         self.audio_service = audio_service
         self.triton_utils_service = triton_utils_service
 
+        # Services and models resolved while serving this request
+        self.__services: Dict[str, Service] = {}
+        self.__models: Dict[str, Model] = {}
+
     async def run_inference(
-        self, request: ULCAInferenceRequest, api_key_name: str, user_id: str
+        self,
+        request: ULCAInferenceRequest,
+        api_key_name: str,
+        user_id: str,
+        audio_arrays: Optional[List[np.ndarray]] = None,
     ) -> ULCAInferenceResponse:
         serviceId = request.config.serviceId
-        service = validate_service_id(serviceId, self.service_repository)
-        model = validate_model_id(service.modelId, self.model_repository)  # type: ignore
+        service = self.__get_service(serviceId)
+        model = self.__get_model(service.modelId)
 
         task_type = model.task_type  # type: ignore
         request_body = request.dict()
@@ -148,7 +220,7 @@ class InferenceService:
             case _ULCATaskType.ASR:
                 request_obj = ULCAAsrInferenceRequest(**request_body)
                 return await self.run_asr_triton_inference(
-                    request_obj, api_key_name, user_id
+                    request_obj, api_key_name, user_id, audio_arrays
                 )
             case _ULCATaskType.TTS:
                 request_obj = ULCATtsInferenceRequest(**request_body)
@@ -164,8 +236,16 @@ class InferenceService:
                 raise BaseError(Errors.DHRUVA115.value)
 
     async def run_asr_triton_inference(
-        self, request_body: ULCAAsrInferenceRequest, api_key_name: str, user_id: str
+        self,
+        request_body: ULCAAsrInferenceRequest,
+        api_key_name: str,
+        user_id: str,
+        audio_arrays: Optional[List[np.ndarray]] = None,
     ) -> ULCAAsrInferenceResponse:
+        """
+        `audio_arrays` are already decoded inputs at `config.samplingRate`, one
+        for each entry of `request_body.audio`, which are then left empty.
+        """
         INFERENCE_REQUEST_COUNT.labels(
             api_key_name,
             user_id,
@@ -177,10 +257,8 @@ class InferenceService:
 
         serviceId = request_body.config.serviceId
 
-        service: Service = validate_service_id(serviceId, self.service_repository)  # type: ignore
-        headers = {"Authorization": "Bearer " + service.api_key}
+        service = self.__get_service(serviceId)
 
-        language = request_body.config.language.sourceLanguage
         lm_enabled = (
             "lm" in request_body.config.postProcessors
             if request_body.config.postProcessors
@@ -193,94 +271,251 @@ class InferenceService:
 
         standard_rate = 16000
 
-        res = ULCAAsrInferenceResponse(output=[])
-        for input in request_body.audio:
-            file_bytes = self.__get_audio_bytes(input)
-            file_handle = io.BytesIO(file_bytes)
+        # Shared across all audio inputs, so that the request as a whole stays
+        # within the in-flight limit of the service
+        inflight_limiter = asyncio.Semaphore(get_max_inflight_requests(serviceId))
+
+        outputs = await asyncio.gather(
+            *[
+                self.__run_asr_inference_for_audio(
+                    input,
+                    request_body,
+                    service,
+                    model_name,
+                    standard_rate,
+                    inflight_limiter,
+                    api_key_name,
+                    user_id,
+                    audio_arrays[i] if audio_arrays is not None else None,
+                )
+                for i, input in enumerate(request_body.audio)
+            ]
+        )
+
+        return ULCAAsrInferenceResponse(output=list(outputs))
+
+    async def __run_asr_inference_for_audio(
+        self,
+        input: _ULCAAudio,
+        request_body: ULCAAsrInferenceRequest,
+        service: Service,
+        model_name: str,
+        standard_rate: int,
+        inflight_limiter: asyncio.Semaphore,
+        api_key_name: str,
+        user_id: str,
+        audio_array: Optional[np.ndarray],
+    ) -> _ULCATextNBest:
+        serviceId = request_body.config.serviceId
+
+        # TODO: Specialised chunked inference for Whisper since it is unstable for long audio at high throughput
+        batch_size = 1 if "whisper" in serviceId else 32
 
-            final_audio = self.__process_audio_input(file_handle, standard_rate)
+        pre_processors = (
+            []
+            if not request_body.config.preProcessors
+            else request_body.config.preProcessors
+        )
 
-            # TODO: Specialised chunked inference for Whisper since it is unstable for long audio at high throughput
-            batch_size = 1 if "whisper" in serviceId else 32
+        def run_batch(
+            batch: List[np.ndarray], batch_timestamps: List[Dict[str, float]]
+        ):
+            return self.__run_asr_batch(
+                batch,
+                batch_timestamps,
+                request_body,
+                service,
+                model_name,
+                inflight_limiter,
+                api_key_name,
+                user_id,
+            )
 
-            pre_processors = (
-                []
-                if not request_body.config.preProcessors
-                else request_body.config.preProcessors
+        if (
+            input.audioUri
+            and "vad" in pre_processors
+            and STREAMING_AUDIO_INGEST_ENABLED
+        ):
+            batch_results = await self.__run_streaming_asr_batches(
+                input.audioUri,
+                standard_rate,
+                batch_size,
+                2 * get_max_inflight_requests(serviceId),
+                run_batch,
             )
+        else:
+            if audio_array is not None:
+                final_audio = await self.audio_service.async_process_audio_array(
+                    audio_array, request_body.config.samplingRate, standard_rate
+                )
+            else:
+                file_bytes = self.__get_audio_bytes(input)
+
+                final_audio = await self.audio_service.async_process_audio_input(
+                    file_bytes, standard_rate
+                )
 
             (
                 audio_chunks,
                 speech_timestamps,
-            ) = self.__run_asr_pre_processors(final_audio, pre_processors)
-
-            transcript_lines: List[
-                Tuple[Union[str, Dict[str, float]], Dict[str, float]]
-            ] = []
-            for i in range(0, len(audio_chunks), batch_size):
-                batch = audio_chunks[i : i + batch_size]
-                inputs, outputs = self.triton_utils_service.get_asr_io_for_triton(
-                    batch, serviceId, language, request_body.config.bestTokenCount
-                )
-
-                with INFERENCE_REQUEST_DURATION_SECONDS.labels(
-                    api_key_name,
-                    user_id,
-                    request_body.config.serviceId,
-                    "asr",
-                    request_body.config.language.sourceLanguage,
-                    None,
-                ).time():
-                    response = self.inference_gateway.send_triton_request(
-                        url=service.endpoint,
-                        model_name=model_name,
-                        input_list=inputs,
-                        output_list=outputs,
-                        headers=headers,
+            ) = await self.__run_asr_pre_processors(final_audio, pre_processors)
+
+            # Batches are dispatched concurrently, gather() returns them in order
+            batch_results = await asyncio.gather(
+                *[
+                    run_batch(
+                        audio_chunks[i : i + batch_size],
+                        speech_timestamps[i : i + batch_size],
                     )
+                    for i in range(0, len(audio_chunks), batch_size)
+                ]
+            )
 
-                encoded_result = response.as_numpy("TRANSCRIPTS")
-                if encoded_result is None:
-                    encoded_result = np.array([])
+        transcript_lines: List[
+            Tuple[Union[str, Dict[str, float]], Dict[str, float]]
+        ] = [line for batch_result in batch_results for line in batch_result]
 
-                transcript_lines.extend(
-                    [
-                        (result.decode("utf-8"), speech_timestamps[i + idx])
-                        for idx, result in enumerate(encoded_result.tolist())
-                    ]
-                )
+        transcript_source_lines: List[Tuple[str, Dict[str, float]]] = (
+            transcript_lines  # type: ignore
+        )
+        n_best_tokens: List[_NBestToken] = []
+
+        if request_body.config.bestTokenCount > 0:
+            transcript_source_lines: List[Tuple[str, Dict[str, float]]] = []
+            for transcript_line in transcript_lines:
+                js = json.loads(transcript_line[0])  # type: ignore
+                transcript_source_lines.append((js["source"], transcript_line[1]))
+                n_best_tokens.extend(js["nBestTokens"])
+
+        if request_body.config.postProcessors:
+            transcript_source_lines = await self.__run_asr_post_processors(
+                transcript_source_lines,
+                request_body.config.postProcessors,
+                request_body.config.language.sourceLanguage,
+            )
 
-            transcript_source_lines: List[Tuple[str, Dict[str, float]]] = (
-                transcript_lines  # type: ignore
+        transcript = self.__create_asr_response_format(
+            transcript_source_lines, request_body.config.transcriptionFormat.value
+        )
+
+        return _ULCATextNBest(
+            source=transcript.strip(),
+            nBestTokens=n_best_tokens if n_best_tokens else None,
+        )
+
+    async def __run_streaming_asr_batches(
+        self,
+        audio_uri: str,
+        standard_rate: int,
+        batch_size: int,
+        max_pending_batches: int,
+        run_batch: Callable[
+            [List[np.ndarray], List[Dict[str, float]]],
+            Awaitable[List[Tuple[str, Dict[str, float]]]],
+        ],
+    ) -> List[List[Tuple[str, Dict[str, float]]]]:
+        """
+        Downloads, decodes and VAD chunks the audio window by window, dispatching
+        batches while the rest of the audio is still being processed.
+
+        At most `max_pending_batches` are in flight, which bounds the audio held
+        in memory regardless of the length of the input.
+        """
+        try:
+            audio_file = await self.audio_service.async_download_audio_to_file(
+                audio_uri
             )
-            n_best_tokens: List[_NBestToken] = []
-
-            if request_body.config.bestTokenCount > 0:
-                transcript_source_lines: List[Tuple[str, Dict[str, float]]] = []
-                for transcript_line in transcript_lines:
-                    js = json.loads(transcript_line[0])  # type: ignore
-                    transcript_source_lines.append((js["source"], transcript_line[1]))
-                    n_best_tokens.extend(js["nBestTokens"])
-
-            if request_body.config.postProcessors:
-                transcript_source_lines = await self.__run_asr_post_processors(
-                    transcript_source_lines,
-                    request_body.config.postProcessors,
-                    request_body.config.language.sourceLanguage,
-                )
+        except Exception:
+            raise BaseError(Errors.DHRUVA116.value, traceback.format_exc())
 
-            transcript = self.__create_asr_response_format(
-                transcript_source_lines, request_body.config.transcriptionFormat.value
+        batch_results: List[List[Tuple[str, Dict[str, float]]]] = []
+        pending_batches: Deque[asyncio.Task] = deque()
+        batch: List[np.ndarray] = []
+        batch_timestamps: List[Dict[str, float]] = []
+
+        def dispatch_batch():
+            pending_batches.append(
+                asyncio.create_task(run_batch(batch, batch_timestamps))
             )
 
-            res.output.append(
-                _ULCATextNBest(
-                    source=transcript.strip(),
-                    nBestTokens=n_best_tokens if n_best_tokens else None,
+        try:
+            async for (
+                audio_chunk,
+                timestamps,
+            ) in self.audio_service.async_iter_silero_vad_chunks(
+                audio_file, standard_rate, 7
+            ):
+                batch.append(audio_chunk)
+                batch_timestamps.append(timestamps)
+                if len(batch) < batch_size:
+                    continue
+
+                dispatch_batch()
+                batch, batch_timestamps = [], []
+
+                # Results are collected in order, oldest batch first
+                if len(pending_batches) > max_pending_batches:
+                    batch_results.append(await pending_batches.popleft())
+
+            if batch:
+                dispatch_batch()
+
+            while pending_batches:
+                batch_results.append(await pending_batches.popleft())
+        except BaseException:
+            for pending_batch in pending_batches:
+                pending_batch.cancel()
+            raise
+        finally:
+            audio_file.close()
+
+        return batch_results
+
+    async def __run_asr_batch(
+        self,
+        batch: List[np.ndarray],
+        batch_timestamps: List[Dict[str, float]],
+        request_body: ULCAAsrInferenceRequest,
+        service: Service,
+        model_name: str,
+        inflight_limiter: asyncio.Semaphore,
+        api_key_name: str,
+        user_id: str,
+    ) -> List[Tuple[str, Dict[str, float]]]:
+        headers = {"Authorization": "Bearer " + service.api_key}
+
+        inputs, outputs = self.triton_utils_service.get_asr_io_for_triton(
+            batch,
+            request_body.config.serviceId,
+            request_body.config.language.sourceLanguage,
+            request_body.config.bestTokenCount,
+        )
+
+        async with inflight_limiter:
+            with INFERENCE_REQUEST_DURATION_SECONDS.labels(
+                api_key_name,
+                user_id,
+                request_body.config.serviceId,
+                "asr",
+                request_body.config.language.sourceLanguage,
+                None,
+            ).time():
+                response = await self.inference_gateway.async_send_triton_request(
+                    url=service.endpoint,
+                    model_name=model_name,
+                    input_list=inputs,
+                    output_list=outputs,
+                    headers=headers,
                 )
-            )
 
-        return res
+        encoded_result = response.as_numpy("TRANSCRIPTS")
+        if encoded_result is None:
+            encoded_result = np.array([])
+
+        return [
+            (result.decode("utf-8"), batch_timestamps[idx])
+            for idx, result in enumerate(encoded_result.tolist())
+        ]
 
     async def run_translation_triton_inference(
         self,
@@ -299,7 +534,7 @@ class InferenceService:
 
         serviceId = request_body.config.serviceId
 
-        service: Service = validate_service_id(serviceId, self.service_repository)  # type: ignore
+        service = self.__get_service(serviceId)
         headers = {"Authorization": "Bearer " + service.api_key}
 
         source_lang = request_body.config.language.sourceLanguage
@@ -327,13 +562,25 @@ class InferenceService:
             for input in request_body.input
         ]
 
-        max_batch_size = 90
-        output_batch = []
-        for i in range(0, len(input_texts), max_batch_size):
+        async def run_batch(texts: List[str]) -> List[List[bytes]]:
             inputs, outputs = self.triton_utils_service.get_translation_io_for_triton(
-                input_texts[i : i + max_batch_size], source_lang, target_lang
+                texts, source_lang, target_lang
+            )
+            response = await self.inference_gateway.async_send_triton_request(
+                url=service.endpoint,
+                model_name="nmt",
+                input_list=inputs,
+                output_list=outputs,
+                headers=headers,
             )
 
+            encoded_result = response.as_numpy("OUTPUT_TEXT")
+            if encoded_result is None:
+                encoded_result = np.array([])
+
+            return encoded_result.tolist()
+
+        async def translate(texts: List[str]) -> List[List[bytes]]:
             with INFERENCE_REQUEST_DURATION_SECONDS.labels(
                 api_key_name,
                 user_id,
@@ -342,23 +589,48 @@ class InferenceService:
                 request_body.config.language.sourceLanguage,
                 request_body.config.language.targetLanguage,
             ).time():
-                response = self.inference_gateway.send_triton_request(
-                    url=service.endpoint,
-                    model_name="nmt",
-                    input_list=inputs,
-                    output_list=outputs,
-                    headers=headers,
+                if not DYNAMIC_BATCHING_ENABLED:
+                    return await run_batch(texts)
+
+                return await translation_batcher.submit(
+                    serviceId,
+                    (service.endpoint, "nmt", source_lang, target_lang),
+                    texts,
+                    run_batch,
                 )
 
-            encoded_result = response.as_numpy("OUTPUT_TEXT")
-            if encoded_result is None:
-                encoded_result = np.array([])
+        # Only sentences missing from the cache are sent to Triton
+        translations = await translation_cache.get_many(
+            serviceId, source_lang, target_lang, input_texts
+        )
+        missing_texts = [
+            text
+            for text, translation in zip(input_texts, translations)
+            if translation is None
+        ]
 
-            output_batch.extend(encoded_result.tolist())
+        batch_results = await asyncio.gather(
+            *[
+                translate(missing_texts[i : i + TRANSLATION_MAX_BATCH_SIZE])
+                for i in range(0, len(missing_texts), TRANSLATION_MAX_BATCH_SIZE)
+            ]
+        )
+        missing_translations = [
+            result[0].decode("utf-8") for batch in batch_results for result in batch
+        ]
+        await translation_cache.set_many(
+            serviceId, source_lang, target_lang, missing_texts, missing_translations
+        )
 
+        # Merge the new translations back in the order of the inputs
+        new_translations = iter(missing_translations)
         results = []
-        for source_text, result in zip(input_texts, output_batch):
-            results.append({"source": source_text, "target": result[0].decode("utf-8")})
+        for source_text, translation in zip(input_texts, translations):
+            if translation is None:
+                translation = next(new_translations, None)
+                if translation is None:
+                    break
+            results.append({"source": source_text, "target": translation})
 
         return ULCATranslationInferenceResponse(output=results)
 
@@ -379,7 +651,7 @@ class InferenceService:
 
         serviceId = request_body.config.serviceId
 
-        service: Service = validate_service_id(serviceId, self.service_repository)  # type: ignore
+        service = self.__get_service(serviceId)
         headers = {"Authorization": "Bearer " + service.api_key}
 
         results = []
@@ -394,16 +666,27 @@ class InferenceService:
                 message="Topk is not valid for sentence level",
             )
 
-        for input in request_body.input:
-            input_string = input.source.replace("\n", " ").strip()
-            if input_string:
-                (
-                    inputs,
-                    outputs,
-                ) = self.triton_utils_service.get_transliteration_io_for_triton(
-                    input_string, source_lang, target_lang, is_word_level, top_k
-                )
+        input_strings = [
+            input.source.replace("\n", " ").strip() for input in request_body.input
+        ]
 
+        # Empty strings are passed through as is, only the rest go to Triton
+        non_empty_indices = [idx for idx, text in enumerate(input_strings) if text]
+        inflight_limiter = asyncio.Semaphore(get_max_inflight_requests(serviceId))
+
+        async def run_batch(batch_indices: List[int]) -> List[List[str]]:
+            (
+                inputs,
+                outputs,
+            ) = self.triton_utils_service.get_batch_transliteration_io_for_triton(
+                [input_strings[idx] for idx in batch_indices],
+                source_lang,
+                target_lang,
+                is_word_level,
+                top_k,
+            )
+
+            async with inflight_limiter:
                 with INFERENCE_REQUEST_DURATION_SECONDS.labels(
                     api_key_name,
                     user_id,
@@ -412,7 +695,7 @@ class InferenceService:
                     request_body.config.language.sourceLanguage,
                     request_body.config.language.targetLanguage,
                 ).time():
-                    response = self.inference_gateway.send_triton_request(
+                    response = await self.inference_gateway.async_send_triton_request(
                         url=service.endpoint,
                         model_name="transliteration",
                         input_list=inputs,
@@ -420,14 +703,30 @@ class InferenceService:
                         headers=headers,
                     )
 
-                encoded_result = response.as_numpy("OUTPUT_TEXT")
-                if encoded_result is None:
-                    encoded_result = np.array([np.array([])])
+            encoded_result = response.as_numpy("OUTPUT_TEXT")
+            if encoded_result is None:
+                return [[] for _ in batch_indices]
 
-                result = [r.decode("utf-8") for r in encoded_result.tolist()[0]]
-            else:
-                result = [input_string]
+            # One row of top-k suggestions per input string
+            return [[r.decode("utf-8") for r in row] for row in encoded_result.tolist()]
 
+        batch_results = await asyncio.gather(
+            *[
+                run_batch(non_empty_indices[i : i + TRANSLITERATION_MAX_BATCH_SIZE])
+                for i in range(
+                    0, len(non_empty_indices), TRANSLITERATION_MAX_BATCH_SIZE
+                )
+            ]
+        )
+        transliterations = dict(
+            zip(
+                non_empty_indices,
+                [result for batch_result in batch_results for result in batch_result],
+            )
+        )
+
+        for idx, input_string in enumerate(input_strings):
+            result = transliterations.get(idx, [input_string])
             results.append({"source": input_string, "target": result})
 
         return ULCATransliterationInferenceResponse(output=results)
@@ -446,7 +745,7 @@ class InferenceService:
 
         serviceId = request_body.config.serviceId
 
-        service: Service = validate_service_id(serviceId, self.service_repository)  # type: ignore
+        service = self.__get_service(serviceId)
         headers = {"Authorization": "Bearer " + service.api_key}
 
         ip_language = request_body.config.language.sourceLanguage
@@ -465,90 +764,108 @@ class InferenceService:
 
         results = []
 
-        for input in request_body.input:
-            input_string = self.__process_tts_input(input.source)
-
-            if input_string:
-                sents = []
-                if len(input_string) > 400:
-                    words = input_string.split(" ")
-                    tmp_sent = ""
-                    for word in words:
-                        if len(tmp_sent) + len(word) <= 400:
-                            tmp_sent += " " + word
-                        else:
-                            sents.append(tmp_sent.strip())
-                            tmp_sent = word
-
-                    sents.append(tmp_sent)
-                else:
-                    sents.append(input_string)
+        input_strings = [
+            self.__process_tts_input(input.source) for input in request_body.input
+        ]
 
-                raw_audios = []
-                for sent in sents:
-                    inputs, outputs = self.triton_utils_service.get_tts_io_for_triton(
-                        sent, ip_gender, ip_language
+        # Audio of repeated prompts is served from the cache, skipping synthesis,
+        # resampling and encoding
+        cache_keys = [
+            tts_cache.get_key(
+                serviceId,
+                input_string,
+                ip_language,
+                ip_gender,
+                target_sr,
+                format,
+                input.audioDuration,
+            )
+            for input, input_string in zip(request_body.input, input_strings)
+        ]
+        cached_audios = await tts_cache.get_many(
+            serviceId,
+            [
+                cache_key if input_string else None
+                for input_string, cache_key in zip(input_strings, cache_keys)
+            ],
+        )
+
+        sents_per_input = [
+            self.__split_tts_input(input_string)
+            if input_string and cached_audio is None
+            else []
+            for input_string, cached_audio in zip(input_strings, cached_audios)
+        ]
+
+        inflight_limiter = asyncio.Semaphore(get_max_inflight_requests(serviceId))
+
+        async def synthesize(sent: str) -> np.ndarray:
+            inputs, outputs = self.triton_utils_service.get_tts_io_for_triton(
+                sent, ip_gender, ip_language
+            )
+
+            async with inflight_limiter:
+                with INFERENCE_REQUEST_DURATION_SECONDS.labels(
+                    api_key_name,
+                    user_id,
+                    request_body.config.serviceId,
+                    "tts",
+                    request_body.config.language.sourceLanguage,
+                    None,
+                ).time():
+                    response = await self.inference_gateway.async_send_triton_request(
+                        url=service.endpoint,
+                        model_name="tts",
+                        input_list=inputs,
+                        output_list=outputs,
+                        headers=headers,
                     )
 
-                    with INFERENCE_REQUEST_DURATION_SECONDS.labels(
-                        api_key_name,
-                        user_id,
-                        request_body.config.serviceId,
-                        "tts",
-                        request_body.config.language.sourceLanguage,
-                        None,
-                    ).time():
-                        response = self.inference_gateway.send_triton_request(
-                            url=service.endpoint,
-                            model_name="tts",
-                            input_list=inputs,
-                            output_list=outputs,
-                            headers=headers,
-                        )
+            result = response.as_numpy("OUTPUT_GENERATED_AUDIO")
+            if result is None:
+                result = np.array([np.array([])])
 
-                    result = response.as_numpy("OUTPUT_GENERATED_AUDIO")
-                    if result is None:
-                        result = np.array([np.array([])])
+            return result[0]
 
-                    raw_audios.append(result[0])
+        # Segments of all inputs are synthesized concurrently, in order
+        all_raw_audios = await asyncio.gather(
+            *[synthesize(sent) for sents in sents_per_input for sent in sents]
+        )
+
+        sent_offset = 0
+        cache_entries = []
+        for input, input_string, sents, cache_key, cached_audio in zip(
+            request_body.input,
+            input_strings,
+            sents_per_input,
+            cache_keys,
+            cached_audios,
+        ):
+            if cached_audio is not None:
+                encoded_string = cached_audio
+            elif input_string:
+                raw_audios = all_raw_audios[sent_offset : sent_offset + len(sents)]
+                sent_offset += len(sents)
 
                 if len(raw_audios) > 1:
                     raw_audio = np.concatenate(raw_audios)
                 else:
                     raw_audio = raw_audios[0]
 
-                final_audio = self.audio_service.resample_audio(
-                    raw_audio, standard_rate, target_sr
+                audio_bytes = await self.audio_service.async_encode_tts_audio(
+                    raw_audio, standard_rate, target_sr, input.audioDuration, format
                 )
 
-                if input.audioDuration:
-                    cur_duration = len(final_audio) / target_sr
-                    speed_factor = cur_duration / input.audioDuration
-
-                    if speed_factor > 1:
-                        final_audio = self.audio_service.stretch_audio(
-                            final_audio, speed_factor, target_sr
-                        )
-                    elif speed_factor < 1:
-                        final_audio = self.audio_service.append_silence(
-                            final_audio, input.audioDuration - cur_duration, target_sr
-                        )
-
-                byte_io = io.BytesIO()
-                wavfile.write(byte_io, target_sr, final_audio)
-
-                if format != "wav":
-                    audio = AudioSegment.from_file_using_temporary_files(byte_io)
-                    request_body.config.audioLength
-                    audio.export(byte_io, format=format)
-
-                encoded_bytes = base64.b64encode(byte_io.read())
+                encoded_bytes = base64.b64encode(audio_bytes)
                 encoded_string = encoded_bytes.decode()
+                cache_entries.append((cache_key, encoded_string))
             else:
                 encoded_string = ""
 
             results.append(_ULCAAudio(audioContent=encoded_string))
 
+        await tts_cache.set_many(cache_entries)
+
         base_audio_config = _ULCABaseAudioConfig(
             language=_ULCALanguage(sourceLanguage=ip_language),
             audioFormat=request_body.config.audioFormat,
@@ -572,7 +889,7 @@ class InferenceService:
 
         serviceId = request_body.config.serviceId
 
-        service: Service = validate_service_id(serviceId, self.service_repository)  # type: ignore
+        service = self.__get_service(serviceId)
         headers = {"Authorization": "Bearer " + service.api_key}
 
         # TODO: Replace with real deployments
@@ -599,7 +916,7 @@ class InferenceService:
 
         serviceId = request_body.config.serviceId
 
-        service: Service = validate_service_id(serviceId, self.service_repository)  # type: ignore
+        service = self.__get_service(serviceId)
         headers = {"Authorization": "Bearer " + service.api_key}
 
         standard_rate = 16000
@@ -608,10 +925,9 @@ class InferenceService:
 
         for input in request_body.audio:
             file_bytes = self.__get_audio_bytes(input)
-            file_handle = io.BytesIO(file_bytes)
 
-            final_audio = self.__process_audio_input(
-                file_handle, standard_rate, request_body.config.preProcessAudio
+            final_audio = await self.audio_service.async_process_audio_input(
+                file_bytes, standard_rate, request_body.config.preProcessAudio
             )
 
             inputs, outputs = self.triton_utils_service.get_vad_io_for_triton(
@@ -631,7 +947,7 @@ class InferenceService:
                 None,
                 None,
             ).time():
-                response = self.inference_gateway.send_triton_request(
+                response = await self.inference_gateway.async_send_triton_request(
                     url=service.endpoint,
                     model_name="vad",
                     input_list=inputs,
@@ -662,6 +978,20 @@ class InferenceService:
         request_body: ULCAPipelineInferenceRequest,
         request_state: Request,  # for request state
     ) -> ULCAPipelineInferenceResponse:
+        return await self.run_pipeline_inference_for_session(
+            request_body, InferenceSession.from_request(request_state)
+        )
+
+    async def run_pipeline_inference_for_session(
+        self,
+        request_body: ULCAPipelineInferenceRequest,
+        session: InferenceSession,
+        audio_arrays: Optional[List[np.ndarray]] = None,
+    ) -> ULCAPipelineInferenceResponse:
+        """
+        Runs the pipeline for an already authenticated caller. `audio_arrays` are
+        the decoded inputs of a first ASR task, as in `run_asr_triton_inference`.
+        """
         results = []
 
         # Check if the pipeline construction is valid
@@ -700,7 +1030,7 @@ class InferenceService:
 
         data_tracking_consent = False
         previous_output_json = request_body.inputData.dict()
-        for pipeline_task in request_body.pipelineTasks:
+        for task_index, pipeline_task in enumerate(request_body.pipelineTasks):
             serviceId = (
                 pipeline_task.config["serviceId"]
                 if "serviceId" in pipeline_task.config
@@ -719,15 +1049,16 @@ class InferenceService:
             )
             new_request.config.serviceId = serviceId
 
+            # Only the first task takes the input audio
+            task_audio_arrays = audio_arrays if task_index == 0 else None
+
             error_msg, exception = None, None
             try:
-                api_key_id = str(
-                    request_state.state.api_key_id
-                )  # Having this here to capture all errors
                 previous_output_json = await self.run_inference(
                     request=new_request,
-                    api_key_name=request_state.state.api_key_name,
-                    user_id=request_state.state.user_id,
+                    api_key_name=session.api_key_name,
+                    user_id=session.user_id,
+                    audio_arrays=task_audio_arrays,
                 )
             except BaseError as exc:
                 exception = exc
@@ -740,7 +1071,7 @@ class InferenceService:
                 exception = other_exception
                 error_msg = str(other_exception)
 
-            if request_state.state._state.get("api_key_data_tracking"):
+            if session.data_tracking:
                 data_tracking_consent = True
                 if (
                     new_request.controlConfig
@@ -752,13 +1083,13 @@ class InferenceService:
                 (
                     pipeline_task.taskType,
                     serviceId,
-                    request_state.headers.get(
-                        "X-Forwarded-For", request_state.client.host
-                    ),
+                    session.client_ip,
                     data_tracking_consent,
                     error_msg,
-                    api_key_id,
-                    new_request.json(),
+                    session.api_key_id,
+                    self.__get_logged_request_json(
+                        new_request, task_audio_arrays, data_tracking_consent
+                    ),
                     # Error in first task will result in a dict, not pydantic model response
                     json.dumps(previous_output_json)
                     if isinstance(previous_output_json, dict)
@@ -798,6 +1129,80 @@ class InferenceService:
                 pass
         return {"pipelineResponse": results}
 
+    async def run_asr_inference_for_session(
+        self,
+        request_body: ULCAAsrInferenceRequest,
+        session: InferenceSession,
+        audio_arrays: Optional[List[np.ndarray]] = None,
+    ) -> ULCAAsrInferenceResponse:
+        """
+        Runs ASR for an already authenticated caller, logging and metering it the
+        way InferenceLoggingRoute does for HTTP requests.
+        """
+        start_time = time.perf_counter()
+        response, error_msg = None, None
+        try:
+            response = await self.run_asr_triton_inference(
+                request_body, session.api_key_name, session.user_id, audio_arrays
+            )
+            return response
+        except BaseError as exc:
+            if exc.error_kind in (
+                Errors.DHRUVA101.value["kind"],
+                Errors.DHRUVA102.value["kind"],
+            ):
+                error_msg = exc.error_kind + "_" + exc.error_message
+            raise exc
+        except Exception as other_exception:
+            error_msg = str(other_exception)
+            raise other_exception
+        finally:
+            data_tracking_consent = (
+                session.data_tracking
+                and request_body.controlConfig.dataTracking is not False
+            )
+
+            log_data.apply_async(
+                (
+                    _ULCATaskType.ASR.value,
+                    request_body.config.serviceId,
+                    session.client_ip,
+                    data_tracking_consent,
+                    error_msg,
+                    session.api_key_id,
+                    self.__get_logged_request_json(
+                        request_body, audio_arrays, data_tracking_consent
+                    ),
+                    response.json() if response else None,
+                    time.perf_counter() - start_time,
+                ),
+                queue="data-log",
+            )
+
+    def __get_logged_request_json(
+        self,
+        request: Union[ULCAGenericInferenceRequest, ULCAAsrInferenceRequest],
+        audio_arrays: Optional[List[np.ndarray]],
+        data_tracking_consent: bool,
+    ) -> str:
+        """
+        Request body logged for metering. Audio passed as arrays is logged by its
+        duration, and encoded only if it is stored for data tracking.
+        """
+        if audio_arrays is None:
+            return request.json()
+
+        request_json = json.loads(request.json())
+        sampling_rate = request.config.samplingRate
+        for audio_json, audio in zip(request_json["audio"], audio_arrays):
+            audio_json["audioDuration"] = len(audio) / sampling_rate
+            if data_tracking_consent:
+                audio_json["audioContent"] = base64.b64encode(
+                    self.audio_service.encode_audio(audio, sampling_rate, "wav")
+                ).decode("utf-8")
+
+        return json.dumps(request_json)
+
     def __get_audio_bytes(self, input: _ULCAAudio):
         try:
             if input.audioContent:
@@ -809,53 +1214,50 @@ class InferenceService:
 
         return file_bytes
 
-    def __process_audio_input(
-        self, file_handle: io.BytesIO, standard_rate: int, process_audio: bool = True
-    ):
-        data, sampling_rate = sf.read(file_handle)
-        data = data.tolist()
-        raw_audio = np.array(data)  # in float64
-
-        if not process_audio:
-            return raw_audio
-
-        mono_raw_audio = self.audio_service.stereo_to_mono(raw_audio)
-        resampled_audio = self.audio_service.resample_audio(
-            mono_raw_audio, sampling_rate, standard_rate
-        )
-        equalized_audio = self.audio_service.equalize_amplitude(
-            resampled_audio, standard_rate
-        )
-        final_audio = self.audio_service.dequantize_audio(equalized_audio)
-
-        return final_audio
-
     async def __run_asr_post_processors(
         self,
         transcript_lines: List[Tuple[str, Dict[str, float]]],
         post_processors: List[str],
         source_language: str,
     ):
-        for idx, transcript_line in enumerate(transcript_lines):
-            line = transcript_line[0]
-            if "itn" in post_processors:
-                line = await self.post_processor_service.run_itn(
-                    line,
-                    source_language,
+        run_itn = "itn" in post_processors
+        run_punctuation = "punctuation" in post_processors
+        if not (run_itn or run_punctuation):
+            return transcript_lines
+
+        async def run_post_processors(lines: List[str]) -> List[str]:
+            if run_itn:
+                lines = await self.post_processor_service.run_itn_batch(
+                    lines, source_language
                 )
 
-            if "punctuation" in post_processors:
-                line = await self.post_processor_service.run_punctuation(
-                    line,
-                    source_language,
+            if run_punctuation:
+                lines = await self.post_processor_service.run_punctuation_batch(
+                    lines, source_language
                 )
 
-            new_transcript_line = (line, transcript_line[1])
-            transcript_lines[idx] = new_transcript_line
+            return lines
+
+        # Each batch runs ITN and then punctuation on its own, so the punctuation
+        # request of one batch overlaps with the ITN request of the next
+        batch_size = self.post_processor_service.max_batch_size
+        lines = [transcript_line[0] for transcript_line in transcript_lines]
+        processed_batches = await asyncio.gather(
+            *[
+                run_post_processors(lines[i : i + batch_size])
+                for i in range(0, len(lines), batch_size)
+            ]
+        )
+        processed_lines = [line for batch in processed_batches for line in batch]
 
-        return transcript_lines
+        return [
+            (line, transcript_line[1])
+            for line, transcript_line in zip(processed_lines, transcript_lines)
+        ]
 
-    def __run_asr_pre_processors(self, audio: np.ndarray, pre_processors: List[str]):
+    async def __run_asr_pre_processors(
+        self, audio: np.ndarray, pre_processors: List[str]
+    ):
         audio_chunks, speech_timestamps = (
             [audio],
             [
@@ -869,9 +1271,10 @@ class InferenceService:
         )
 
         if "vad" in pre_processors:
-            audio_chunks, speech_timestamps = self.audio_service.silero_vad_chunking(
-                audio, 16000, 7
-            )
+            (
+                audio_chunks,
+                speech_timestamps,
+            ) = await self.audio_service.async_silero_vad_chunking(audio, 16000, 7)
 
         if "denoiser" in pre_processors:
             # call denoiser for every audio chunk
@@ -902,6 +1305,24 @@ class InferenceService:
         processed_text = text.replace("।", ".").strip()
         return processed_text
 
+    def __split_tts_input(self, input_string: str, max_length: int = 400):
+        sents = []
+        if len(input_string) > max_length:
+            words = input_string.split(" ")
+            tmp_sent = ""
+            for word in words:
+                if len(tmp_sent) + len(word) <= max_length:
+                    tmp_sent += " " + word
+                else:
+                    sents.append(tmp_sent.strip())
+                    tmp_sent = word
+
+            sents.append(tmp_sent)
+        else:
+            sents.append(input_string)
+
+        return sents
+
     def __auto_select_service_id(
         self, task_type: _ULCATaskType, config: Dict[str, Any]
     ) -> str:
@@ -928,3 +1349,17 @@ class InferenceService:
                 raise BaseError(Errors.DHRUVA115.value)
 
         return serviceId
+
+    def __get_service(self, serviceId: str) -> Service:
+        if serviceId not in self.__services:
+            self.__services[serviceId] = validate_service_id(
+                serviceId, self.service_repository
+            )
+
+        return self.__services[serviceId]
+
+    def __get_model(self, modelId: str) -> Model:
+        if modelId not in self.__models:
+            self.__models[modelId] = validate_model_id(modelId, self.model_repository)
+
+        return self.__models[modelId]
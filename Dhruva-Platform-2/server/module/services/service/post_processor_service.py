@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 from fastapi import Depends, Request
 
 from ..gateway import InferenceGateway
+from .triton_utils_service import TRITON_BINARY_DATA
 
 load_dotenv()
 
@@ -16,73 +17,99 @@ class PostProcessorService:
         self, inference_gateway: InferenceGateway = Depends(InferenceGateway)
     ) -> None:
         self.inference_gateway = inference_gateway
+        self.max_batch_size = int(os.environ.get("POST_PROCESSOR_MAX_BATCH_SIZE", 64))
 
     async def run_itn(
         self,
         line: str,
         language: str,
     ):
-        input1 = http_client.InferInput("INPUT_TEXT", [1, 1], "BYTES")
-        input1.set_data_from_numpy(
-            np.asarray([line.encode("utf-8")]).astype("object").reshape([1, 1])
-        )
-        input2 = http_client.InferInput("LANG_ID", [1, 1], "BYTES")
-        lang_id = [language]
-        input2.set_data_from_numpy(np.asarray(lang_id).astype("object").reshape([1, 1]))
-
-        inputs = [input1, input2]
+        return (await self.run_itn_batch([line], language))[0]
 
-        output0 = http_client.InferRequestedOutput("OUTPUT_TEXT")
-        outputs = [output0]
+    async def run_punctuation(
+        self,
+        line: str,
+        language: str,
+    ):
+        return (await self.run_punctuation_batch([line], language))[0]
 
-        headers = {"Authorization": "Bearer " + os.environ["ITN_ENDPOINT_API_KEY"]}
+    async def run_itn_batch(
+        self,
+        lines: List[str],
+        language: str,
+    ) -> List[str]:
+        return await self.__run_text_post_processor_batch("itn", lines, language)
 
-        response = self.inference_gateway.send_triton_request(
-            url=os.environ["ITN_ENDPOINT"],
-            model_name="itn",
-            input_list=inputs,
-            output_list=outputs,
-            headers=headers,
+    async def run_punctuation_batch(
+        self,
+        lines: List[str],
+        language: str,
+    ) -> List[str]:
+        return await self.__run_text_post_processor_batch(
+            "punctuation", lines, language
         )
 
-        batch_result = response.as_numpy("OUTPUT_TEXT")
-        if batch_result is None:
-            batch_result = np.array([])
-
-        res = " ".join([result.decode("utf8") for result in batch_result])
-        return res
-
-    async def run_punctuation(
+    async def __run_text_post_processor_batch(
         self,
-        line: str,
+        model_name: str,
+        lines: List[str],
         language: str,
-    ):
-        input1 = http_client.InferInput("INPUT_TEXT", [1, 1], "BYTES")
+    ) -> List[str]:
+        results: List[str] = []
+        for i in range(0, len(lines), self.max_batch_size):
+            results.extend(
+                await self.__send_text_post_processor_request(
+                    model_name, lines[i : i + self.max_batch_size], language
+                )
+            )
+
+        return results
+
+    async def __send_text_post_processor_request(
+        self,
+        model_name: str,
+        lines: List[str],
+        language: str,
+    ) -> List[str]:
+        batch_size = len(lines)
+
+        input1 = http_client.InferInput("INPUT_TEXT", [batch_size, 1], "BYTES")
         input1.set_data_from_numpy(
-            np.asarray([line.encode("utf-8")]).astype("object").reshape([1, 1])
+            np.asarray([line.encode("utf-8") for line in lines])
+            .astype("object")
+            .reshape([batch_size, 1]),
+            binary_data=TRITON_BINARY_DATA,
+        )
+        input2 = http_client.InferInput("LANG_ID", [batch_size, 1], "BYTES")
+        lang_id = [language] * batch_size
+        input2.set_data_from_numpy(
+            np.asarray(lang_id).astype("object").reshape([batch_size, 1]),
+            binary_data=TRITON_BINARY_DATA,
         )
-        input2 = http_client.InferInput("LANG_ID", [1, 1], "BYTES")
-        lang_id = [language]
-        input2.set_data_from_numpy(np.asarray(lang_id).astype("object").reshape([1, 1]))
 
         inputs = [input1, input2]
 
-        output0 = http_client.InferRequestedOutput("OUTPUT_TEXT")
+        output0 = http_client.InferRequestedOutput(
+            "OUTPUT_TEXT", binary_data=TRITON_BINARY_DATA
+        )
         outputs = [output0]
 
         headers = {"Authorization": "Bearer " + os.environ["ITN_ENDPOINT_API_KEY"]}
 
-        response = self.inference_gateway.send_triton_request(
+        response = await self.inference_gateway.async_send_triton_request(
             url=os.environ["ITN_ENDPOINT"],
-            model_name="punctuation",
+            model_name=model_name,
             input_list=inputs,
             output_list=outputs,
             headers=headers,
         )
 
         batch_result = response.as_numpy("OUTPUT_TEXT")
-        if batch_result is None:
-            batch_result = np.array([])
-
-        res = " ".join([result.decode("utf8") for result in batch_result])
-        return res
+        if batch_result is None or not batch_result.size:
+            return [""] * batch_size
+
+        # One row of outputs per input line
+        return [
+            " ".join([result.decode("utf8") for result in row])
+            for row in batch_result.reshape(batch_size, -1)
+        ]
@@ -1,10 +1,18 @@
+import os
 from typing import List
 
 import numpy as np
 import tritonclient.http as http_client
+from dotenv import load_dotenv
 from fastapi import Depends
 from tritonclient.utils import np_to_triton_dtype
 
+load_dotenv()
+
+# Tensors are sent and received in Triton's binary tensor extension rather than
+# as JSON arrays, which are several times larger for audio. gRPC requires it.
+TRITON_BINARY_DATA = os.environ.get("TRITON_BINARY_DATA", "true").lower() == "true"
+
 
 class TritonUtilsService:
     def get_string_tensor(self, string_values, tensor_name: str):
@@ -12,7 +20,7 @@ class TritonUtilsService:
         input_obj = http_client.InferInput(
             tensor_name, string_obj.shape, np_to_triton_dtype(string_obj.dtype)
         )
-        input_obj.set_data_from_numpy(string_obj)
+        input_obj.set_data_from_numpy(string_obj, binary_data=TRITON_BINARY_DATA)
         return input_obj
 
     def get_bool_tensor(self, bool_values, tensor_name: str):
@@ -20,7 +28,7 @@ class TritonUtilsService:
         input_obj = http_client.InferInput(
             tensor_name, bool_obj.shape, np_to_triton_dtype(bool_obj.dtype)
         )
-        input_obj.set_data_from_numpy(bool_obj)
+        input_obj.set_data_from_numpy(bool_obj, binary_data=TRITON_BINARY_DATA)
         return input_obj
 
     def get_uint8_tensor(self, uint8_values, tensor_name: str):
@@ -28,7 +36,7 @@ class TritonUtilsService:
         input_obj = http_client.InferInput(
             tensor_name, uint8_obj.shape, np_to_triton_dtype(uint8_obj.dtype)
         )
-        input_obj.set_data_from_numpy(uint8_obj)
+        input_obj.set_data_from_numpy(uint8_obj, binary_data=TRITON_BINARY_DATA)
         return input_obj
 
     def get_translation_io_for_triton(self, texts: list, src_lang: str, tgt_lang: str):
@@ -37,7 +45,11 @@ class TritonUtilsService:
             self.get_string_tensor([[src_lang]] * len(texts), "INPUT_LANGUAGE_ID"),
             self.get_string_tensor([[tgt_lang]] * len(texts), "OUTPUT_LANGUAGE_ID"),
         ]
-        outputs = [http_client.InferRequestedOutput("OUTPUT_TEXT")]
+        outputs = [
+            http_client.InferRequestedOutput(
+                "OUTPUT_TEXT", binary_data=TRITON_BINARY_DATA
+            )
+        ]
         return inputs, outputs
 
     def get_transliteration_io_for_triton(
@@ -48,14 +60,31 @@ class TritonUtilsService:
         is_word_level: bool,
         top_k: int,
     ):
+        return self.get_batch_transliteration_io_for_triton(
+            [input_string], source_lang, target_lang, is_word_level, top_k
+        )
+
+    def get_batch_transliteration_io_for_triton(
+        self,
+        input_strings: List[str],
+        source_lang: str,
+        target_lang: str,
+        is_word_level: bool,
+        top_k: int,
+    ):
+        batch_size = len(input_strings)
         inputs = [
-            self.get_string_tensor([input_string], "INPUT_TEXT"),
-            self.get_string_tensor([source_lang], "INPUT_LANGUAGE_ID"),
-            self.get_string_tensor([target_lang], "OUTPUT_LANGUAGE_ID"),
-            self.get_bool_tensor([is_word_level], "IS_WORD_LEVEL"),
-            self.get_uint8_tensor([top_k], "TOP_K"),
+            self.get_string_tensor(input_strings, "INPUT_TEXT"),
+            self.get_string_tensor([source_lang] * batch_size, "INPUT_LANGUAGE_ID"),
+            self.get_string_tensor([target_lang] * batch_size, "OUTPUT_LANGUAGE_ID"),
+            self.get_bool_tensor([is_word_level] * batch_size, "IS_WORD_LEVEL"),
+            self.get_uint8_tensor([top_k] * batch_size, "TOP_K"),
+        ]
+        outputs = [
+            http_client.InferRequestedOutput(
+                "OUTPUT_TEXT", binary_data=TRITON_BINARY_DATA
+            )
         ]
-        outputs = [http_client.InferRequestedOutput("OUTPUT_TEXT")]
         return inputs, outputs
 
     def get_tts_io_for_triton(
@@ -66,7 +95,11 @@ class TritonUtilsService:
             self.get_string_tensor([ip_gender], "INPUT_SPEAKER_ID"),
             self.get_string_tensor([ip_language], "INPUT_LANGUAGE_ID"),
         ]
-        outputs = [http_client.InferRequestedOutput("OUTPUT_GENERATED_AUDIO")]
+        outputs = [
+            http_client.InferRequestedOutput(
+                "OUTPUT_GENERATED_AUDIO", binary_data=TRITON_BINARY_DATA
+            )
+        ]
         return inputs, outputs
 
     def get_asr_io_for_triton(
@@ -79,8 +112,8 @@ class TritonUtilsService:
         o = self.__pad_batch(audio_chunks)
         input0 = http_client.InferInput("AUDIO_SIGNAL", o[0].shape, "FP32")
         input1 = http_client.InferInput("NUM_SAMPLES", o[1].shape, "INT32")
-        input0.set_data_from_numpy(o[0])
-        input1.set_data_from_numpy(o[1].astype("int32"))
+        input0.set_data_from_numpy(o[0], binary_data=TRITON_BINARY_DATA)
+        input1.set_data_from_numpy(o[1].astype("int32"), binary_data=TRITON_BINARY_DATA)
         inputs = [input0, input1]
 
         if (
@@ -94,18 +127,24 @@ class TritonUtilsService:
             input2 = http_client.InferInput("LANG_ID", (len(audio_chunks), 1), "BYTES")
             lang_id = [language] * len(audio_chunks)
             input2.set_data_from_numpy(
-                np.asarray(lang_id).astype("object").reshape((len(audio_chunks), 1))
+                np.asarray(lang_id).astype("object").reshape((len(audio_chunks), 1)),
+                binary_data=TRITON_BINARY_DATA,
             )
             inputs.append(input2)
 
         if n_best_tok > 0:
             input3 = http_client.InferInput("TOPK", o[1].shape, "INT32")
             input3.set_data_from_numpy(
-                np.array([n_best_tok] * len(o[1])).reshape(o[1].shape).astype("int32")
+                np.array([n_best_tok] * len(o[1])).reshape(o[1].shape).astype("int32"),
+                binary_data=TRITON_BINARY_DATA,
             )
             inputs.append(input3)
 
-        outputs = [http_client.InferRequestedOutput("TRANSCRIPTS")]
+        outputs = [
+            http_client.InferRequestedOutput(
+                "TRANSCRIPTS", binary_data=TRITON_BINARY_DATA
+            )
+        ]
         return inputs, outputs
 
     def get_vad_io_for_triton(
@@ -120,28 +159,41 @@ class TritonUtilsService:
         audio_signal, audio_len = self.__pad_batch([audio])
 
         input0 = http_client.InferInput("WAVPATH", audio_signal.shape, "FP32")
-        input0.set_data_from_numpy(audio_signal)
+        input0.set_data_from_numpy(audio_signal, binary_data=TRITON_BINARY_DATA)
         input1 = http_client.InferInput("SAMPLING_RATE", audio_len.shape, "INT32")
-        input1.set_data_from_numpy(np.asarray([[sample_rate]]).astype("int32"))
+        input1.set_data_from_numpy(
+            np.asarray([[sample_rate]]).astype("int32"), binary_data=TRITON_BINARY_DATA
+        )
         input2 = http_client.InferInput("THRESHOLD", audio_len.shape, "FP32")
-        input2.set_data_from_numpy(np.asarray([[threshold]]).astype("float32"))
+        input2.set_data_from_numpy(
+            np.asarray([[threshold]]).astype("float32"), binary_data=TRITON_BINARY_DATA
+        )
         input3 = http_client.InferInput(
             "MIN_SILENCE_DURATION_MS", audio_len.shape, "INT32"
         )
         input3.set_data_from_numpy(
-            np.asarray([[min_silence_duration_ms]]).astype("int32")
+            np.asarray([[min_silence_duration_ms]]).astype("int32"),
+            binary_data=TRITON_BINARY_DATA,
         )
         input4 = http_client.InferInput("SPEECH_PAD_MS", audio_len.shape, "INT32")
-        input4.set_data_from_numpy(np.asarray([[speech_pad_ms]]).astype("int32"))
+        input4.set_data_from_numpy(
+            np.asarray([[speech_pad_ms]]).astype("int32"),
+            binary_data=TRITON_BINARY_DATA,
+        )
         input5 = http_client.InferInput(
             "MIN_SPEECH_DURATION_MS", audio_len.shape, "INT32"
         )
         input5.set_data_from_numpy(
-            np.asarray([[min_speech_duration_ms]]).astype("int32")
+            np.asarray([[min_speech_duration_ms]]).astype("int32"),
+            binary_data=TRITON_BINARY_DATA,
         )
 
         inputs = [input0, input1, input2, input3, input4, input5]
-        outputs = [http_client.InferRequestedOutput("TIMESTAMPS")]
+        outputs = [
+            http_client.InferRequestedOutput(
+                "TIMESTAMPS", binary_data=TRITON_BINARY_DATA
+            )
+        ]
 
         return inputs, outputs
 
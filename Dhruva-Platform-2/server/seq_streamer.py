@@ -1,36 +1,49 @@
-import array
-import base64
-import io
-import os
-import sys
+import time
 import wave
+from functools import partial
 from urllib.parse import parse_qs
 
-import numpy as np
-import requests
 import socketio
+from auth.inference_session import InferenceSession
+from module.services.gateway.inference_gateway import InferenceGateway
 from module.services.service.audio_service import AudioService
+from module.services.service.triton_utils_service import TritonUtilsService
 from pydantic import BaseModel
 from schema.services.common import _ULCATaskType
-from scipy.io.wavfile import write as scipy_wav_write
+from streaming import inference_dispatch
+from streaming.admission import admission_controller
+from streaming.audio_buffer import AudioRingBuffer, int16_from_payload
+from streaming.backpressure import InferenceScheduler
+from streaming.session_store import get_client_manager, new_session_id, session_store
+from streaming.speech_segmenter import IncrementalSpeechSegmenter
 
 
 class UserState(BaseModel):
-    input_audio__buffer: np.ndarray = None
+    input_audio__buffer: AudioRingBuffer = None
     input_audio__run_inference_once_in_samples: int = -1
     input_audio__response_frequency_in_secs: float = None
+    # Response frequency actually used, slowed down when inference is slower
+    input_audio__effective_response_frequency_in_secs: float = None
+    # Moving average of the inference latency of the session
+    input_audio__inference_latency_in_secs: float = None
     input_audio__max_inference_duration_in_samples: int = -1
     input_audio__last_inference_position_in_samples: int = 0
     input_audio__auto_chunking: bool = True
     input_audio__sampling_rate: int = -1
+    # Segments `input_audio__buffer` when `auto_chunking` is set
+    input_audio__segmenter: IncrementalSpeechSegmenter = None
 
     task_sequence: list = []
     input_task_type: str = None
     sequence_depth_to_run: int = 0
-    http_headers: dict
+    inference_session: InferenceSession
+    # Lets a client resume the session from another connection
+    session_id: str = None
+    # Socket connection the session was last served on
+    connection_sid: str = None
 
     # Without this, pydantic throws the following exception:
-    # `RuntimeError: no validator found for <class 'numpy.ndarray'>`
+    # `RuntimeError: no validator found for <class 'AudioRingBuffer'>`
     class Config:
         arbitrary_types_allowed = True
 
@@ -40,6 +53,13 @@ DEFAULT_STREAMING_CONFIG = {
     "responseFrequencyInSecs": 2.0,
 }
 
+# Ticks are kept at least this many times the inference latency apart, so that
+# inference of a session keeps up with its audio
+LATENCY_TO_RESPONSE_FREQUENCY_FACTOR = 1.5
+MAX_RESPONSE_FREQUENCY_IN_SECS = 20.0
+# Weight of the latest inference in the moving average of the latency
+INFERENCE_LATENCY_SMOOTHING = 0.3
+
 
 class StreamingServerTaskSequence:
     """
@@ -47,9 +67,19 @@ class StreamingServerTaskSequence:
     TODO: Generalize to different sequences. Currently it supports only ASR->Translation->TTS
     """
 
-    def __init__(self, async_mode: bool = True, max_connections: int = -1) -> None:
+    def __init__(
+        self,
+        async_mode: bool = True,
+        max_connections: int = -1,
+        max_in_flight_inferences: int = 0,
+    ) -> None:
         if async_mode:
-            self.sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+            # Clients of other workers can be reached through Redis, if enabled
+            self.sio = socketio.AsyncServer(
+                client_manager=get_client_manager("task-sequence"),
+                async_mode="asgi",
+                cors_allowed_origins="*",
+            )
             self.app = socketio.ASGIApp(
                 self.sio,
                 socketio_path="",
@@ -63,30 +93,69 @@ class StreamingServerTaskSequence:
                 # other_asgi_app=app
             )
 
-        if "BACKEND_PORT" in os.environ:
-            self.inference_url = f"http://localhost:{os.environ['BACKEND_PORT']}/services/inference/pipeline"
-        else:
-            self.inference_url = "http://localhost:8000/services/inference/pipeline"
-
-        self.audio_service = AudioService()
+        self.audio_service = AudioService(
+            inference_gateway=InferenceGateway(),
+            triton_utils_service=TritonUtilsService(),
+        )
 
         # Constants. TODO: Should we allow changing this?
         self.input_audio__bytes_per_sample = 2
         self.input_audio__max_inference_time_in_ms = 30 * 1000
         self.max_connections = max_connections if max_connections > 0 else 0
 
+        # At most one inference in flight per session, and intermediate ones are
+        # shed when the worker has `max_in_flight_inferences` in flight
+        self.inference_scheduler = InferenceScheduler(
+            "task-sequence", max(max_in_flight_inferences, 0)
+        )
+
         # Storage for state specific to each client (key will be socket connection-ID string, and value would be `UserState`)
         self.client_states = {}
+        # Connections which resumed a session, and have not started a stream yet
+        self.resumed_sids = set()
 
         # Setup the communication handlers
         self.configure_socket_server()
 
     def delete_user_states(self, sid: str) -> None:
         self.client_states.pop(sid, None)
+        self.resumed_sids.discard(sid)
+        self.inference_scheduler.remove(sid)
+
+    async def save_user_state(self, sid: str) -> None:
+        # Saved at points where the client could resume from, e.g. after a tick
+        user_state = self.client_states[sid]
+        await session_store.save(user_state.session_id, user_state)
+
+    async def resume_user_state(
+        self, sid: str, session_id: str, inference_session: InferenceSession
+    ) -> UserState:
+        user_state = await session_store.resume(session_id, inference_session)
+        if user_state is None:
+            return None
+
+        segmenter = user_state.input_audio__segmenter
+        if segmenter is not None:
+            segmenter.get_speech_timestamps = (
+                self.audio_service.async_get_speech_timestamps
+            )
+
+        # The previous connection may still be open, on this or another worker
+        if user_state.connection_sid and user_state.connection_sid != sid:
+            await self.sio.disconnect(user_state.connection_sid)
+
+        user_state.connection_sid = sid
+        self.resumed_sids.add(sid)
+        return user_state
 
     def initialize_buffer(self, sid: str, clear_history: bool = False) -> None:
-        self.client_states[sid].input_audio__buffer = np.array([], dtype=np.float64)
+        if self.client_states[sid].input_audio__buffer is None:
+            self.client_states[sid].input_audio__buffer = AudioRingBuffer()
+        else:
+            self.client_states[sid].input_audio__buffer.clear()
         self.client_states[sid].input_audio__last_inference_position_in_samples = 0
+        if self.client_states[sid].input_audio__segmenter is not None:
+            self.client_states[sid].input_audio__segmenter.reset()
 
         if clear_history:
             pass
@@ -112,96 +181,156 @@ class StreamingServerTaskSequence:
                 ].input_audio__response_frequency_in_secs = streaming_config[
                     "responseFrequencyInSecs"
                 ]
-                self.client_states[
-                    sid
-                ].input_audio__run_inference_once_in_samples = int(
-                    self.client_states[sid].input_audio__sampling_rate
-                    * streaming_config["responseFrequencyInSecs"]
-                )
+                self.apply_response_frequency(sid)
+
+    def apply_response_frequency(self, sid: str) -> None:
+        user_state = self.client_states[sid]
+        frequency_in_secs = user_state.input_audio__response_frequency_in_secs
+        if frequency_in_secs is None:
+            frequency_in_secs = DEFAULT_STREAMING_CONFIG["responseFrequencyInSecs"]
+
+        # Never more often than requested, but only as often as inference keeps up
+        latency_in_secs = user_state.input_audio__inference_latency_in_secs
+        if latency_in_secs is not None:
+            frequency_in_secs = min(
+                max(
+                    frequency_in_secs,
+                    latency_in_secs * LATENCY_TO_RESPONSE_FREQUENCY_FACTOR,
+                ),
+                MAX_RESPONSE_FREQUENCY_IN_SECS,
+            )
 
-    def run_ulca_inference(self, sid: str, audio_chunks: list) -> str:
-        audio_payload_list = []
-        for audio_chunk in audio_chunks:
-            # Convert PCM to WAV bytes
-            byte_io: io.IOBase = io.BytesIO()
-            scipy_wav_write(
-                byte_io, self.client_states[sid].input_audio__sampling_rate, audio_chunk
+        user_state.input_audio__effective_response_frequency_in_secs = frequency_in_secs
+        user_state.input_audio__run_inference_once_in_samples = int(
+            user_state.input_audio__sampling_rate * frequency_in_secs
+        )
+
+    def record_inference_latency(self, sid: str, latency_in_secs: float) -> None:
+        user_state = self.client_states[sid]
+        if user_state.input_audio__inference_latency_in_secs is not None:
+            latency_in_secs = (
+                INFERENCE_LATENCY_SMOOTHING * latency_in_secs
+                + (1 - INFERENCE_LATENCY_SMOOTHING)
+                * user_state.input_audio__inference_latency_in_secs
             )
+        user_state.input_audio__inference_latency_in_secs = latency_in_secs
+
+        if user_state.input_task_type == _ULCATaskType.ASR:
+            self.apply_response_frequency(sid)
 
-            # Convert the byte-stream into base64 string
-            # TODO: Any better communication format?
-            bytes_ = byte_io.read()
-            # import datetime
-            # with open(f'{str(datetime.datetime.utcnow())}.wav', 'wb') as f:
-            #     f.write(bytes_)
-            encoded_bytes = base64.b64encode(bytes_)
-            encoded_string = encoded_bytes.decode()
-            audio_payload_list.append({"audioContent": encoded_string})
-
-        # Construct ULCA request payload
-        request_json = {
-            "inputData": {
-                "audio": audio_payload_list,
-            },
-            "pipelineTasks": self.client_states[sid].task_sequence[
+    async def run_ulca_inference(self, sid: str, audio_chunks: list) -> dict:
+        # Run inference in this process, on the audio as it is buffered
+        return await inference_dispatch.run_pipeline_inference(
+            self.client_states[sid].inference_session,
+            self.client_states[sid].task_sequence[
                 : self.client_states[sid].sequence_depth_to_run
             ],
-            "controlConfig": {"dataTracking": False},
-        }
-
-        # Run inference via Dhruva REST API
-        response = requests.post(
-            self.inference_url,
-            json=request_json,
-            headers=self.client_states[sid].http_headers,
-            # timeout=1
+            audio_chunks,
         )
-        # print("response.text", response.text)
-        return response.json()
-
-    def run_inference(self, sid: str, is_final: bool) -> str:
-        if self.client_states[sid].input_audio__auto_chunking:
-            audio_chunks, _ = list(
-                self.audio_service.silero_vad_chunking(
-                    self.client_states[sid].input_audio__buffer,
-                    self.client_states[sid].input_audio__sampling_rate,
-                    16,
-                )
-            )
-            if not audio_chunks:
-                return None
 
-            # Update the buffer to only the audio_chunk after a silence
-            self.client_states[sid].input_audio__buffer = audio_chunks[-1]
+    def get_received_samples_count(self, sid: str) -> int:
+        if self.client_states[sid].input_audio__buffer is None:
+            return 0
+
+        return self.client_states[sid].input_audio__buffer.end
+
+    async def run_incremental_inference(self, sid: str, is_final: bool) -> str:
+        segmenter = self.client_states[sid].input_audio__segmenter
+        segmentation = await segmenter.segment(is_final)
+
+        if segmentation.committed:
+            # Utterances followed by a silence are final, and are sent only once
+            audio_chunks = [utterance.audio for utterance in segmentation.committed]
+            is_intermediate = False
+        elif segmentation.open_utterance is not None:
+            # Only the utterance still in progress is run again on every tick
+            audio_chunks = [segmentation.open_utterance.audio]
+            is_intermediate = True
         else:
-            audio_chunks = [self.client_states[sid].input_audio__buffer]
+            return None
+
+        result = await self.run_ulca_inference(sid, audio_chunks)
+        streaming_status = {
+            "isIntermediateResult": is_intermediate,
+        }
+        return (result, streaming_status)
+
+    async def run_inference(self, sid: str, is_final: bool) -> str:
+        if self.client_states[sid].input_audio__segmenter is not None:
+            return await self.run_incremental_inference(sid, is_final)
+
+        buffer = self.client_states[sid].input_audio__buffer
+        audio_chunks = [buffer.read(buffer.start, buffer.end)]
 
         is_intermediate = True
         if is_final:
             # It is assumed that the buffer would be discarded after this run
             is_intermediate = False
-        elif len(audio_chunks) > 1:
-            # And run inference only for those fully-uttered chunks
-            audio_chunks = audio_chunks[:-1]
-            is_intermediate = False
 
-        result = self.run_ulca_inference(sid, audio_chunks)
+        result = await self.run_ulca_inference(sid, audio_chunks)
         streaming_status = {
             "isIntermediateResult": is_intermediate,
         }
         return (result, streaming_status)
 
     async def run_inference_and_send(self, sid: str, is_final: bool) -> None:
-        if (
-            self.client_states[sid].input_audio__buffer is not None
-            and not self.client_states[sid].input_audio__buffer.size
-        ):
+        if not self.get_received_samples_count(sid):
+            return
+        started_at = time.perf_counter()
+        response = await self.run_inference(sid, is_final)
+        if sid not in self.client_states:
+            # Disconnected meanwhile
             return
-        response = self.run_inference(sid, is_final)
+
+        self.record_inference_latency(sid, time.perf_counter() - started_at)
         if response:
-            await self.sio.emit("response", data=(response[0], response[1]), room=sid)
+            # Lets the client know how often to expect responses
+            response[1]["responseFrequencyInSecs"] = self.client_states[
+                sid
+            ].input_audio__effective_response_frequency_in_secs
+            await self.sio.emit(
+                "response",
+                data=(response[0], response[1]),
+                room=sid,
+                ignore_queue=True,
+            )
         return response
 
+    def is_intermediate_inference_due(self, sid: str) -> bool:
+        user_state = self.client_states.get(sid)
+        if user_state is None or user_state.input_task_type != _ULCATaskType.ASR:
+            return False
+
+        return (
+            self.get_received_samples_count(sid)
+            - user_state.input_audio__last_inference_position_in_samples
+            >= user_state.input_audio__run_inference_once_in_samples
+        )
+
+    async def run_intermediate_inference(self, sid: str) -> None:
+        # Checked again, as it may have been coalesced with an earlier tick
+        if not self.is_intermediate_inference_due(sid):
+            return
+
+        received = self.get_received_samples_count(sid)
+        await self.run_inference_and_send(sid, is_final=False)
+        user_state = self.client_states.get(sid)
+        if user_state is None:
+            return
+
+        user_state.input_audio__last_inference_position_in_samples = received
+        await self.save_user_state(sid)
+
+    async def reset_stream(self, sid: str) -> None:
+        if sid in self.client_states:
+            self.initialize_buffer(sid, clear_history=True)
+
+    async def run_final_inference(self, sid: str, reset_buffer: bool) -> None:
+        await self.run_inference_and_send(sid, is_final=True)
+        if reset_buffer and sid in self.client_states:
+            self.initialize_buffer(sid)
+            await self.save_user_state(sid)
+
     def configure_socket_server(self):
         @self.sio.event
         async def connect(sid: str, environ: dict, auth):
@@ -212,25 +341,83 @@ class StreamingServerTaskSequence:
                         "Server Error: Max connections exceeded! Please try again later."
                     ),
                     room=sid,
+                    ignore_queue=True,
                 )
                 return False
 
             print("Connected with:", sid)
-            # query_dict = parse_qs(environ["QUERY_STRING"])
+            query_dict = parse_qs(environ["QUERY_STRING"])
 
             if not auth:  # TODO: Validate the fields: api_key
                 await self.sio.emit(
-                    "abort", data=("Authentication headers not found!"), room=sid
+                    "abort",
+                    data=("Authentication headers not found!"),
+                    room=sid,
+                    ignore_queue=True,
                 )
                 return False
 
-            self.client_states[sid] = UserState(
-                http_headers=auth,
+            # Authenticated once here, instead of on every inference of the stream
+            inference_session = await inference_dispatch.authenticate(
+                inference_dispatch.get_api_key(auth),
+                inference_dispatch.get_client_ip(environ),
             )
+            if inference_session is None:
+                await self.sio.emit(
+                    "abort",
+                    data=("Authentication failed!"),
+                    room=sid,
+                    ignore_queue=True,
+                )
+                return False
+
+            # Counted across all workers, if the Redis backend is enabled
+            if not await admission_controller.acquire(sid):
+                await self.sio.emit(
+                    "abort",
+                    data=(
+                        "Server Error: Max concurrent streams exceeded! Please try again later."
+                    ),
+                    room=sid,
+                    ignore_queue=True,
+                )
+                return False
+
+            user_state = await self.resume_user_state(
+                sid, query_dict.get("sessionId", [None])[0], inference_session
+            )
+            if user_state is None:
+                user_state = UserState(
+                    inference_session=inference_session,
+                    session_id=new_session_id(),
+                    connection_sid=sid,
+                )
+            self.client_states[sid] = user_state
             return True
 
         @self.sio.on("start")
         async def start(sid: str, task_sequence: list, streaming_config: dict = {}):
+            if (
+                sid in self.resumed_sids
+                and self.client_states[sid].task_sequence == task_sequence
+            ):
+                # Same stream as before the reconnection, it goes on from its
+                # buffered audio
+                self.resumed_sids.discard(sid)
+                if streaming_config:
+                    self.set_streaming_config(sid, streaming_config)
+                await self.sio.emit(
+                    "ready",
+                    data={
+                        "sessionId": self.client_states[sid].session_id,
+                        "resumed": True,
+                    },
+                    room=sid,
+                    ignore_queue=True,
+                )
+                return
+
+            self.resumed_sids.discard(sid)
             self.initialize_buffer(sid)
 
             if False:  # TODO: Validate the `task_sequence`
@@ -262,6 +449,18 @@ class StreamingServerTaskSequence:
                     "config"
                 ]["samplingRate"]
 
+                segmenter = None
+                if self.client_states[sid].input_audio__auto_chunking:
+                    # VAD state is kept across ticks, so that every tick only
+                    # scans the new audio and committed utterances are not re-sent
+                    segmenter = IncrementalSpeechSegmenter(
+                        self.client_states[sid].input_audio__buffer,
+                        sampling_rate,
+                        self.audio_service.async_get_speech_timestamps,
+                        max_utterance_secs=16,
+                    )
+                self.client_states[sid].input_audio__segmenter = segmenter
+
                 if streaming_config:
                     initial_streaming_config = dict(DEFAULT_STREAMING_CONFIG)
                     initial_streaming_config.update(streaming_config)
@@ -269,14 +468,35 @@ class StreamingServerTaskSequence:
                     initial_streaming_config = DEFAULT_STREAMING_CONFIG
                 self.set_streaming_config(sid, initial_streaming_config)
 
+            await self.save_user_state(sid)
+
             # print("Ready to start stream for:", sid)
-            await self.sio.emit("ready", room=sid)
+            await self.sio.emit(
+                "ready",
+                data={
+                    "sessionId": self.client_states[sid].session_id,
+                    "resumed": False,
+                },
+                room=sid,
+                ignore_queue=True,
+            )
 
         @self.sio.on("stop")
         async def stop(sid: str, disconnect_stream: bool):
-            self.initialize_buffer(sid, clear_history=True)
+            # Not while an inference of the stream is reading the buffer
+            await self.inference_scheduler.run_exclusive(
+                sid, partial(self.reset_stream, sid)
+            )
+            # The client may have disconnected meanwhile
+            user_state = self.client_states.get(sid)
+            if user_state is None:
+                return
+
             if disconnect_stream:
-                await self.sio.emit("terminate", room=sid)
+                await session_store.delete(user_state.session_id)
+                await self.sio.emit("terminate", room=sid, ignore_queue=True)
+            else:
+                await session_store.save(user_state.session_id, user_state)
 
         @self.sio.on("data")
         async def data(
@@ -295,23 +515,11 @@ class StreamingServerTaskSequence:
                 if self.client_states[sid].input_task_type == _ULCATaskType.ASR:
                     if input_data["audio"] and input_data["audio"][0]["audioContent"]:
                         # For example, in the case of speech client, append audio payload to client buffer
-                        audioContent = input_data["audio"][0]["audioContent"]
-                        if type(audioContent) is list:
-                            # Assume int16 array, and pack it into bytes
-                            audioContent = b"".join(
-                                [
-                                    i.to_bytes(
-                                        self.input_audio__bytes_per_sample,
-                                        sys.byteorder,
-                                    )
-                                    for i in audioContent
-                                ]
-                            )
-
-                        # Convert bytes to int16 array and dequantize
-                        raw_audio = np.array(
-                            array.array("h", audioContent), dtype=np.float64
-                        ) / (2**15 - 1)
+                        # Either int16 bytes or a list of int16 samples, it is
+                        # kept quantized and dequantized only when read
+                        raw_audio = int16_from_payload(
+                            input_data["audio"][0]["audioContent"]
+                        )
 
                         if not self.client_states[sid].input_audio__auto_chunking:
                             # If max continuous stream limit exceeded, reset the server state
@@ -324,10 +532,7 @@ class StreamingServerTaskSequence:
                                 raw_audio = raw_audio[:remaining_samples_count]
                                 clear_server_state = True
 
-                        # TODO: Make it efficient. Until then, ask the client to use higher stream rate
-                        self.client_states[sid].input_audio__buffer = np.concatenate(
-                            [self.client_states[sid].input_audio__buffer, raw_audio]
-                        )
+                        self.client_states[sid].input_audio__buffer.append(raw_audio)
 
             if streaming_config:
                 # Update the user-state with the latest streaming-config
@@ -338,39 +543,44 @@ class StreamingServerTaskSequence:
                     # For example, in the case of speech client, if pause is detected, run inference once (in-case there was new data after previous inference) and clear the buffer
                     # intermediate_response__sequence_depth_to_run = self.client_states[sid].sequence_depth_to_run
                     # self.client_states[sid].sequence_depth_to_run = len(self.client_states[sid].task_sequence)
-                    await self.run_inference_and_send(sid, is_final=True)
+                    # Final results wait for the inference in flight, but are never shed
+                    await self.inference_scheduler.run_exclusive(
+                        sid, partial(self.run_final_inference, sid, reset_buffer=True)
+                    )
                     # self.client_states[sid].sequence_depth_to_run = intermediate_response__sequence_depth_to_run
-                    self.initialize_buffer(sid)
             else:
                 # For example, in the case of speech client, run inference once we have accumulated enough amount of audio since previous inference
-                if self.client_states[sid].input_task_type == _ULCATaskType.ASR:
-                    if (
-                        len(self.client_states[sid].input_audio__buffer)
-                        - self.client_states[
-                            sid
-                        ].input_audio__last_inference_position_in_samples
-                        >= self.client_states[
-                            sid
-                        ].input_audio__run_inference_once_in_samples
-                    ):
-                        await self.run_inference_and_send(sid, is_final=False)
+                if self.is_intermediate_inference_due(sid):
+                    # Coalesced while an inference of the stream is in flight, and
+                    # shed while the worker is saturated
+                    received = self.get_received_samples_count(sid)
+                    ran = await self.inference_scheduler.run_intermediate(
+                        sid, partial(self.run_intermediate_inference, sid)
+                    )
+                    if not ran and sid in self.client_states:
+                        # Shed, so the next tick comes a full interval later
                         self.client_states[
                             sid
-                        ].input_audio__last_inference_position_in_samples = len(
-                            self.client_states[sid].input_audio__buffer
-                        )
+                        ].input_audio__last_inference_position_in_samples = received
 
             if disconnect_stream:
                 # For example, if the speech client wants to disconnect from the stream, run inference for one last-time (in-case there was new data after previous inference)
                 self.client_states[sid].sequence_depth_to_run = len(
                     self.client_states[sid].task_sequence
                 )
-                await self.run_inference_and_send(sid, is_final=True)
+                await self.inference_scheduler.run_exclusive(
+                    sid, partial(self.run_final_inference, sid, reset_buffer=False)
+                )
+                if sid not in self.client_states:
+                    return
                 # Remove all info related to the connection, and issue an handshake-signal to terminate
+                await session_store.delete(self.client_states[sid].session_id)
                 self.delete_user_states(sid)
-                await self.sio.emit("terminate", room=sid)
+                await self.sio.emit("terminate", room=sid, ignore_queue=True)
 
         @self.sio.event
-        def disconnect(sid):
+        async def disconnect(sid):
+            # The session is kept in the store, for the client to resume it
             self.delete_user_states(sid)
+            await admission_controller.release(sid)
             # print("Disconnected with:", sid)
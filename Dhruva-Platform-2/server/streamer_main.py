@@ -1,8 +1,86 @@
+import asyncio
+import os
+from typing import Optional
+
+import jsonpickle
+import pymongo
+from cache.invalidation import cache_invalidation_bus
+from celery_backend.tasks import push_metrics
+from custom_metrics import *
+from db.database import db_client
+from dotenv import load_dotenv
 from fastapi import FastAPI
 from seq_streamer import StreamingServerTaskSequence
 
+load_dotenv()
+
 app = FastAPI()
-streamer = StreamingServerTaskSequence()
+
+# Streams are served over websockets, which the metrics middleware of the API
+# never sees, so the metrics of this process are pushed periodically instead
+METRICS_PUSH_INTERVAL_SECS = float(
+    os.environ.get("STREAMING_METRICS_PUSH_INTERVAL_SECS", 15)
+)
+PUSHED_METRICS = [
+    INFERENCE_REQUEST_COUNT,
+    INFERENCE_REQUEST_DURATION_SECONDS,
+    TRITON_CLIENT_POOL_HITS,
+    TRITON_CLIENT_POOL_MISSES,
+    DYNAMIC_BATCHER_QUEUE_DEPTH,
+    DYNAMIC_BATCHER_BATCH_SIZE,
+    DYNAMIC_BATCHER_WAIT_SECONDS,
+    TRANSLATION_CACHE_HITS,
+    TRANSLATION_CACHE_MISSES,
+    TTS_CACHE_HITS,
+    TTS_CACHE_MISSES,
+    AUDIO_ENCODE_DURATION_SECONDS,
+    STREAMING_INFERENCES_COALESCED,
+    STREAMING_INFERENCES_SHED,
+]
+metrics_push_task: Optional[asyncio.Task] = None
+
+
+async def push_metrics_periodically():
+    while True:
+        await asyncio.sleep(METRICS_PUSH_INTERVAL_SECS)
+
+        # Cleared after every push like the API does, as the gateway sums pushes
+        push_metrics.apply_async(
+            (jsonpickle.encode(registry, keys=True),), queue="metrics-log"
+        )
+        for metric in PUSHED_METRICS:
+            metric.clear()
+
+
+# Inference runs in this process, which needs the app database for auth and
+# service lookups
+@app.on_event("startup")
+async def init_mongo_client():
+    db_client["app"] = pymongo.MongoClient(os.environ["APP_DB_CONNECTION_STRING"])
+
+
+@app.on_event("startup")
+async def start_cache_invalidation_listener():
+    cache_invalidation_bus.start()
+
+
+@app.on_event("startup")
+async def start_metrics_push():
+    global metrics_push_task
+    metrics_push_task = asyncio.create_task(push_metrics_periodically())
+
+
+@app.on_event("shutdown")
+async def stop_metrics_push():
+    if metrics_push_task is not None:
+        metrics_push_task.cancel()
+
+
+streamer = StreamingServerTaskSequence(
+    max_in_flight_inferences=int(
+        os.environ.get("STREAMING_MAX_IN_FLIGHT_INFERENCES_PER_WORKER", 64)
+    ),
+)
 # Mount it at the default path of SocketIO engine
 app.mount("/socket.io", streamer.app)
 
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Optional, Set
+
+from cache.app_cache import get_async_cache_connection
+from dotenv import load_dotenv
+from fastapi.logger import logger
+
+from .session_store import STATE_BACKEND
+
+load_dotenv()
+
+KEY = "Dhruva:stream-admission"
+
+# Drops expired leases, then adds the lease unless the limit is reached.
+# KEYS[1]: sorted set of leases, scored by expiry
+# ARGV: current time, expiry of the new lease, lease member, max streams
+ADMIT_SCRIPT = """
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", ARGV[1])
+if redis.call("ZCARD", KEYS[1]) >= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call("ZADD", KEYS[1], ARGV[2], ARGV[3])
+return 1
+"""
+
+
+class AdmissionController:
+    """
+    Limits the number of concurrent streams, to `max_streams` if it is set.
+    This base class counts the streams of this worker only.
+    """
+
+    def __init__(self, max_streams: int) -> None:
+        self.max_streams = max_streams
+        self.streams: Set[str] = set()
+
+    async def acquire(self, stream_id: str) -> bool:
+        if self.max_streams and len(self.streams) >= self.max_streams:
+            return False
+
+        self.streams.add(stream_id)
+        return True
+
+    async def release(self, stream_id: str) -> None:
+        self.streams.discard(stream_id)
+
+
+class RedisAdmissionController(AdmissionController):
+    """
+    Limits the number of concurrent streams across all workers and pods.
+
+    Every admitted stream holds a lease in a Redis sorted set, scored by when it
+    expires. The leases of the streams of this worker are renewed in the
+    background, so the leases of a worker which died expire after `lease_secs`
+    without having been released. Redis failures are logged and the stream is
+    admitted, so that they never fail a stream.
+    """
+
+    def __init__(self, max_streams: int, lease_secs: int) -> None:
+        super().__init__(max_streams)
+        self.lease_secs = lease_secs
+
+        self.__redis = get_async_cache_connection()
+        self.__admit = self.__redis.register_script(ADMIT_SCRIPT)
+        # Stream IDs, such as socket IDs, are only unique within a worker
+        self.__host_id = uuid.uuid4().hex
+        self.__renew_task: Optional[asyncio.Task] = None
+
+    async def acquire(self, stream_id: str) -> bool:
+        if not self.max_streams:
+            return True
+
+        now = time.time()
+        try:
+            admitted = await self.__admit(
+                keys=[KEY],
+                args=[
+                    now,
+                    now + self.lease_secs,
+                    self.__get_member(stream_id),
+                    self.max_streams,
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Failed to admit stream: {str(e)}")
+            admitted = 1
+
+        if not admitted:
+            return False
+
+        self.streams.add(stream_id)
+        if self.__renew_task is None or self.__renew_task.done():
+            self.__renew_task = asyncio.create_task(self.__renew_leases())
+        return True
+
+    async def release(self, stream_id: str) -> None:
+        if stream_id not in self.streams:
+            return
+
+        self.streams.discard(stream_id)
+        try:
+            await self.__redis.zrem(KEY, self.__get_member(stream_id))
+        except Exception as e:
+            logger.error(f"Failed to release stream: {str(e)}")
+
+    async def __renew_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_secs / 3)
+            if not self.streams:
+                continue
+
+            expires_at = time.time() + self.lease_secs
+            try:
+                # Only existing leases, so that a released stream is not re-added
+                await self.__redis.zadd(
+                    KEY,
+                    {self.__get_member(stream): expires_at for stream in self.streams},
+                    xx=True,
+                )
+            except Exception as e:
+                logger.error(f"Failed to renew stream leases: {str(e)}")
+
+    def __get_member(self, stream_id: str) -> str:
+        return f"{self.__host_id}:{stream_id}"
+
+
+# Empty for no limit. With the local backend, the limit is per worker.
+MAX_CONCURRENT_STREAMS = int(os.environ.get("MAX_CONCURRENT_STREAMS") or 0)
+
+if STATE_BACKEND == "redis":
+    admission_controller: AdmissionController = RedisAdmissionController(
+        MAX_CONCURRENT_STREAMS,
+        lease_secs=int(os.environ.get("STREAMING_ADMISSION_LEASE_SECS", 30)),
+    )
+else:
+    admission_controller = AdmissionController(MAX_CONCURRENT_STREAMS)
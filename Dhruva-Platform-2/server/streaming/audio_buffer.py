@@ -0,0 +1,115 @@
+from typing import List, Union
+
+import numpy as np
+
+MAX_INT16_AMPLITUDE = 2**15 - 1
+
+
+def int16_from_payload(payload: Union[bytes, bytearray, List[int]]) -> np.ndarray:
+    """
+    Converts an audio payload of a socket event, either raw int16 bytes or a list
+    of int16 samples, to an int16 array without a Python level loop.
+    """
+    if isinstance(payload, (bytes, bytearray)):
+        # An odd trailing byte is not a full sample
+        return np.frombuffer(payload, dtype=np.int16, count=len(payload) // 2)
+
+    return np.asarray(payload, dtype=np.int16)
+
+
+class AudioRingBuffer:
+    """
+    Growable ring buffer of int16 samples for the audio of a streaming session.
+
+    Samples are addressed by their offset in the stream, which keeps increasing
+    as samples are appended, while old samples are dropped with `discard_until`.
+    Appending copies only the new samples, the storage doubles when it is full.
+    Samples are kept quantized and are converted to float only when read.
+    """
+
+    def __init__(self, capacity: int = 16000 * 30) -> None:
+        self.__data = np.zeros(max(capacity, 1), dtype=np.int16)
+        self.clear()
+
+    def __len__(self) -> int:
+        return self.__length
+
+    @property
+    def start(self) -> int:
+        """Stream offset of the oldest sample held"""
+        return self.__start
+
+    @property
+    def end(self) -> int:
+        """Stream offset after the latest sample, the number of samples received"""
+        return self.__start + self.__length
+
+    @property
+    def capacity(self) -> int:
+        return len(self.__data)
+
+    def clear(self) -> None:
+        """Drops all samples and restarts the stream offsets from zero"""
+        self.__head = 0
+        self.__start = 0
+        self.__length = 0
+
+    def append(self, samples: np.ndarray) -> None:
+        samples = np.asarray(samples, dtype=np.int16)
+        if len(samples) > self.capacity - self.__length:
+            self.__grow(self.__length + len(samples))
+
+        tail = (self.__head + self.__length) % self.capacity
+        first_part = min(len(samples), self.capacity - tail)
+        self.__data[tail : tail + first_part] = samples[:first_part]
+        self.__data[: len(samples) - first_part] = samples[first_part:]
+        self.__length += len(samples)
+
+    def append_payload(self, payload: Union[bytes, bytearray, List[int]]) -> None:
+        self.append(int16_from_payload(payload))
+
+    def discard_until(self, offset: int) -> None:
+        """Drops the samples before the stream offset `offset`"""
+        count = min(max(offset - self.__start, 0), self.__length)
+        self.__head = (self.__head + count) % self.capacity
+        self.__start += count
+        self.__length -= count
+
+    def read_int16(self, start: int, end: int) -> np.ndarray:
+        """Copies out the samples between two stream offsets"""
+        start = max(start, self.__start)
+        end = min(end, self.end)
+        out = np.empty(max(end - start, 0), dtype=np.int16)
+
+        position = (self.__head + start - self.__start) % self.capacity
+        first_part = min(len(out), self.capacity - position)
+        out[:first_part] = self.__data[position : position + first_part]
+        out[first_part:] = self.__data[: len(out) - first_part]
+        return out
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copies out the samples between two stream offsets as float32 audio"""
+        audio = self.read_int16(start, end).astype(np.float32)
+        np.divide(audio, MAX_INT16_AMPLITUDE, out=audio)
+        return audio
+
+    def __getstate__(self) -> dict:
+        # Only the samples held are pickled, not the whole storage
+        return {
+            "capacity": self.capacity,
+            "start": self.__start,
+            "samples": self.read_int16(self.__start, self.end),
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__data = np.zeros(max(state["capacity"], 1), dtype=np.int16)
+        self.clear()
+        self.__start = state["start"]
+        self.append(state["samples"])
+
+    def __grow(self, min_capacity: int) -> None:
+        data = np.zeros(max(self.capacity * 2, min_capacity), dtype=np.int16)
+        data[: self.__length] = self.read_int16(self.__start, self.end)
+
+        self.__data = data
+        self.__head = 0
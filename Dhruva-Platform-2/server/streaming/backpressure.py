@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from custom_metrics import STREAMING_INFERENCES_COALESCED, STREAMING_INFERENCES_SHED
+
+
+class InferenceScheduler:
+    """
+    Runs the inferences of the streams of a worker with backpressure.
+
+    A stream has at most one inference in flight. Intermediate inferences due
+    meanwhile are coalesced into a single one, which runs on the latest audio
+    once the inference in flight completes. While `max_in_flight` inferences of
+    the worker are in flight, intermediate inferences are shed. Exclusive runs,
+    such as final inferences, are never shed, and go before a coalesced
+    intermediate inference of the same stream.
+    """
+
+    def __init__(self, name: str, max_in_flight: int) -> None:
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+        self.__locks: Dict[str, asyncio.Lock] = {}
+        self.__pending: Set[str] = set()
+
+    def is_saturated(self) -> bool:
+        return bool(self.max_in_flight) and self.in_flight >= self.max_in_flight
+
+    async def run_intermediate(
+        self, stream_id: str, run: Callable[[], Awaitable[Any]]
+    ) -> bool:
+        """Runs `run` unless it is coalesced or shed, returns False if it was shed"""
+        lock = self.__get_lock(stream_id)
+        if lock.locked():
+            self.__pending.add(stream_id)
+            STREAMING_INFERENCES_COALESCED.labels(self.name).inc()
+            return True
+
+        ran = False
+        while True:
+            if self.is_saturated():
+                STREAMING_INFERENCES_SHED.labels(self.name).inc()
+                return ran
+
+            async with lock:
+                await self.__run(run)
+            ran = True
+
+            if stream_id not in self.__pending:
+                return ran
+            self.__pending.discard(stream_id)
+
+    async def run_exclusive(
+        self, stream_id: str, run: Callable[[], Awaitable[Any]]
+    ) -> Optional[Any]:
+        """Runs `run` once no inference of the stream is in flight"""
+        # A coalesced intermediate inference is superseded by this one
+        self.__pending.discard(stream_id)
+
+        async with self.__get_lock(stream_id):
+            return await self.__run(run)
+
+    def remove(self, stream_id: str) -> None:
+        self.__locks.pop(stream_id, None)
+        self.__pending.discard(stream_id)
+
+    def __get_lock(self, stream_id: str) -> asyncio.Lock:
+        if stream_id not in self.__locks:
+            self.__locks[stream_id] = asyncio.Lock()
+        return self.__locks[stream_id]
+
+    async def __run(self, run: Callable[[], Awaitable[Any]]) -> Any:
+        self.in_flight += 1
+        try:
+            return await run()
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from auth.inference_session import InferenceSession, create_inference_session
+from db.database import AppDatabase
+from exception.base_error import BaseError
+from exception.client_error import ClientError
+from fastapi.encoders import jsonable_encoder
+from fastapi.logger import logger
+from module.services.gateway import InferenceGateway
+from module.services.repository import ModelRepository, ServiceRepository
+from module.services.service import (
+    AudioService,
+    InferenceService,
+    PostProcessorService,
+    SubtitleService,
+    TritonUtilsService,
+)
+from pydantic import ValidationError
+from schema.services.request import (
+    ULCAAsrInferenceRequest,
+    ULCAPipelineInferenceRequest,
+)
+
+
+def get_inference_service() -> InferenceService:
+    """Builds an InferenceService the way FastAPI resolves it for a request"""
+    db = AppDatabase()
+    inference_gateway = InferenceGateway()
+    triton_utils_service = TritonUtilsService()
+
+    return InferenceService(
+        service_repository=ServiceRepository(db),
+        model_repository=ModelRepository(db),
+        inference_gateway=inference_gateway,
+        subtitle_service=SubtitleService(),
+        post_processor_service=PostProcessorService(inference_gateway),
+        audio_service=AudioService(inference_gateway, triton_utils_service),
+        triton_utils_service=triton_utils_service,
+    )
+
+
+def get_api_key(headers: Dict[str, str]) -> Optional[str]:
+    # Header names are case insensitive
+    for name, value in headers.items():
+        if name.lower() == "authorization":
+            return value
+
+    return None
+
+
+def get_client_ip(environ: dict) -> Optional[str]:
+    return environ.get("HTTP_X_FORWARDED_FOR", environ.get("REMOTE_ADDR"))
+
+
+async def authenticate(
+    api_key: Optional[str], client_ip: Optional[str]
+) -> Optional[InferenceSession]:
+    """
+    Authenticates a streaming client once, when it connects. The session is then
+    reused for every inference of the stream.
+    """
+    if not api_key:
+        return None
+
+    # The API key may have to be fetched from Redis or Mongo
+    return await asyncio.to_thread(
+        create_inference_session, api_key, client_ip, AppDatabase()
+    )
+
+
+def get_error_response(
+    exc: Union[BaseError, ClientError, ValidationError],
+) -> Dict[str, Any]:
+    # Same bodies as the exception handlers of the HTTP API
+    if isinstance(exc, ValidationError):
+        return {"detail": exc.errors()}
+
+    if isinstance(exc, ClientError):
+        return {"detail": {"message": exc.message}}
+
+    return {
+        "detail": {
+            "kind": exc.error_kind,
+            "message": "Request failed. Please try again.",
+        }
+    }
+
+
+async def run_pipeline_inference(
+    session: InferenceSession,
+    pipeline_tasks: List[Dict[str, Any]],
+    audio_arrays: List[np.ndarray],
+) -> Dict[str, Any]:
+    """
+    Runs a pipeline on audio straight from a stream, in this process, and returns
+    the JSON the pipeline endpoint would respond with.
+    """
+    try:
+        request = ULCAPipelineInferenceRequest(
+            pipelineTasks=pipeline_tasks,
+            inputData={"audio": [{} for _ in audio_arrays]},
+            controlConfig={"dataTracking": False},
+        )
+        response = await get_inference_service().run_pipeline_inference_for_session(
+            request, session, audio_arrays
+        )
+    except (BaseError, ClientError, ValidationError) as exc:
+        logger.error(exc)
+        return get_error_response(exc)
+
+    return jsonable_encoder(response)
+
+
+async def run_asr_inference(
+    session: InferenceSession,
+    config: Dict[str, Any],
+    audio_arrays: List[np.ndarray],
+) -> Dict[str, Any]:
+    """
+    Runs ASR on audio straight from a stream, in this process, and returns the
+    JSON the ASR endpoint would respond with.
+    """
+    try:
+        request = ULCAAsrInferenceRequest(
+            config=config,
+            audio=[{} for _ in audio_arrays],
+            controlConfig={"dataTracking": False},
+        )
+        response = await get_inference_service().run_asr_inference_for_session(
+            request, session, audio_arrays
+        )
+    except (BaseError, ClientError, ValidationError) as exc:
+        logger.error(exc)
+        return get_error_response(exc)
+
+    return jsonable_encoder(response)
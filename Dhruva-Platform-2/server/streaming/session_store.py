@@ -0,0 +1,144 @@
+import os
+import pickle
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+import socketio
+from auth.inference_session import InferenceSession
+from cache.app_cache import get_async_cache_connection, get_cache_url
+from cache.ttl_cache import TTLCache
+from dotenv import load_dotenv
+from fastapi.logger import logger
+
+load_dotenv()
+
+KEY_PREFIX = "Dhruva:stream-session"
+
+# Either "local", for a single worker, or "redis", to share streaming sessions
+# across workers and pods
+STATE_BACKEND = os.environ.get("STREAMING_STATE_BACKEND", "local").lower()
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class SessionStore(ABC):
+    """
+    Keeps the state of streaming sessions by session ID, so that a client which
+    reconnects, possibly to another worker, can resume its session.
+
+    States are dropped `ttl_secs` after they were last saved. States are
+    expected to have an `inference_session` attribute.
+    """
+
+    def __init__(self, ttl_secs: int) -> None:
+        self.ttl_secs = ttl_secs
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save(self, session_id: str, state: Any) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    async def resume(
+        self, session_id: Optional[str], inference_session: InferenceSession
+    ) -> Optional[Any]:
+        """Loads the state of a session, if it was started with the same API key"""
+        if not session_id:
+            return None
+
+        state = await self.load(session_id)
+        if (
+            state is None
+            or state.inference_session.api_key_id != inference_session.api_key_id
+        ):
+            return None
+
+        state.inference_session = inference_session
+        return state
+
+
+class LocalSessionStore(SessionStore):
+    """Keeps the states in the memory of this worker"""
+
+    def __init__(self, ttl_secs: int, max_sessions: int = 10000) -> None:
+        super().__init__(ttl_secs)
+        self.__states = TTLCache(max_size=max_sessions, ttl_secs=ttl_secs)
+
+    async def load(self, session_id: str) -> Optional[Any]:
+        return self.__states.get(session_id)
+
+    async def save(self, session_id: str, state: Any) -> None:
+        self.__states.set(session_id, state)
+
+    async def delete(self, session_id: str) -> None:
+        self.__states.delete(session_id)
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Keeps the states pickled in Redis, shared by all workers and pods. Redis
+    failures are logged and treated as a missing session, so that they never
+    fail a stream.
+    """
+
+    def __init__(self, ttl_secs: int) -> None:
+        super().__init__(ttl_secs)
+        self.__redis = get_async_cache_connection()
+
+    async def load(self, session_id: str) -> Optional[Any]:
+        try:
+            data = await self.__redis.get(self.__get_key(session_id))
+            return pickle.loads(data) if data is not None else None
+        except Exception as e:
+            logger.error(f"Failed to load streaming session: {str(e)}")
+            return None
+
+    async def save(self, session_id: str, state: Any) -> None:
+        try:
+            await self.__redis.set(
+                self.__get_key(session_id),
+                pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL),
+                ex=self.ttl_secs,
+            )
+        except Exception as e:
+            logger.error(f"Failed to save streaming session: {str(e)}")
+
+    async def delete(self, session_id: str) -> None:
+        try:
+            await self.__redis.delete(self.__get_key(session_id))
+        except Exception as e:
+            logger.error(f"Failed to delete streaming session: {str(e)}")
+
+    def __get_key(self, session_id: str) -> str:
+        return f"{KEY_PREFIX}:{session_id}"
+
+
+def get_client_manager(name: str) -> Optional[socketio.AsyncRedisManager]:
+    """
+    Client manager for a socket server. With the Redis backend, a client can be
+    emitted to or disconnected from any worker, not only the one it is
+    connected to.
+    """
+    if STATE_BACKEND != "redis":
+        return None
+
+    return socketio.AsyncRedisManager(
+        get_cache_url(), channel=f"Dhruva:socketio:{name}"
+    )
+
+
+SESSION_TTL_SECS = int(os.environ.get("STREAMING_SESSION_TTL_SECS", 300))
+
+if STATE_BACKEND == "redis":
+    session_store: SessionStore = RedisSessionStore(SESSION_TTL_SECS)
+else:
+    session_store = LocalSessionStore(SESSION_TTL_SECS)
@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .audio_buffer import AudioRingBuffer
+
+# Returns the speech segments of the audio as start and end sample offsets
+SpeechTimestampsFn = Callable[[np.ndarray, int], Awaitable[List[Dict[str, int]]]]
+
+
+@dataclass
+class Utterance:
+    audio: np.ndarray
+    # Sample offsets in the stream
+    start: int
+    end: int
+
+
+@dataclass
+class SegmentationResult:
+    # Utterances followed by silence, which are final and never returned again
+    committed: List[Utterance]
+    # Speech still in progress at the end of the stream
+    open_utterance: Optional[Utterance]
+
+
+class IncrementalSpeechSegmenter:
+    """
+    Splits a live audio stream into utterances, looking at every sample only
+    about once.
+
+    Each call to `segment` runs VAD over the samples received since the previous
+    call, plus `context_secs` of overlap so that speech and silence across the
+    boundary are not missed. Where the open utterance started, and up to where
+    audio has been committed, is carried over between calls. Utterances are
+    committed once they are followed by silence, or once they reach
+    `max_utterance_secs`, and audio before the open utterance is dropped from
+    `audio_buffer`, so both memory and the work per call stay bounded however
+    long the stream is.
+    """
+
+    def __init__(
+        self,
+        audio_buffer: AudioRingBuffer,
+        sample_rate: int,
+        get_speech_timestamps: SpeechTimestampsFn,
+        max_utterance_secs: float = 16,
+        context_secs: float = 1,
+        closed_margin_secs: float = 0.1,
+    ) -> None:
+        self.audio_buffer = audio_buffer
+        self.sample_rate = sample_rate
+        self.get_speech_timestamps = get_speech_timestamps
+        self.max_utterance_samples = int(max_utterance_secs * sample_rate)
+        self.context_samples = int(context_secs * sample_rate)
+        # Speech ending closer than this to the end of the stream may go on
+        self.closed_margin_samples = int(closed_margin_secs * sample_rate)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Starts over from the current end of the audio buffer"""
+        # Stream offset the next VAD scan starts from
+        self.__scan_from = self.audio_buffer.end
+        # Audio before this offset has been committed
+        self.__committed_until = self.audio_buffer.end
+        # Start of the utterance in progress, if any
+        self.__open_start: Optional[int] = None
+
+    async def segment(self, is_final: bool = False) -> SegmentationResult:
+        """
+        Segments the audio received so far. With `is_final`, the utterance in
+        progress is committed as well, as no more audio will follow.
+        """
+        end = self.audio_buffer.end
+        committed: List[Utterance] = []
+
+        if end > self.__scan_from:
+            speech_timestamps = await self.get_speech_timestamps(
+                self.audio_buffer.read(self.__scan_from, end), self.sample_rate
+            )
+
+            for timestamps in speech_timestamps:
+                speech_start = self.__scan_from + int(timestamps["start"])
+                speech_end = self.__scan_from + int(timestamps["end"])
+
+                # Speech already committed, seen again in the overlap
+                if speech_end <= self.__committed_until:
+                    continue
+
+                if self.__open_start is None:
+                    self.__open_start = max(speech_start, self.__committed_until)
+
+                if speech_end < end - self.closed_margin_samples:
+                    committed.append(self.__commit(speech_end))
+
+        # Long utterances are cut, the speech goes on in the next one
+        while (
+            self.__open_start is not None
+            and end - self.__open_start > self.max_utterance_samples
+        ):
+            cut = self.__open_start + self.max_utterance_samples
+            committed.append(self.__commit(cut))
+            self.__open_start = cut
+
+        if is_final and self.__open_start is not None:
+            committed.append(self.__commit(end))
+
+        open_utterance = None
+        if self.__open_start is not None:
+            open_utterance = Utterance(
+                self.audio_buffer.read(self.__open_start, end), self.__open_start, end
+            )
+
+        self.__scan_from = max(end - self.context_samples, self.__committed_until)
+
+        keep_from = self.__scan_from
+        if self.__open_start is not None:
+            keep_from = min(keep_from, self.__open_start)
+        self.audio_buffer.discard_until(keep_from)
+
+        return SegmentationResult(committed=committed, open_utterance=open_utterance)
+
+    def __getstate__(self) -> dict:
+        # VAD is bound to a service of the worker, it is set again when restored
+        state = self.__dict__.copy()
+        state["get_speech_timestamps"] = None
+        return state
+
+    def __commit(self, end: int) -> Utterance:
+        start: int = self.__open_start  # type: ignore
+        utterance = Utterance(self.audio_buffer.read(start, end), start, end)
+
+        self.__committed_until = end
+        self.__open_start = None
+        return utterance